@@ -9,11 +9,34 @@ WINDOW_TITLE = 'Broken Clone Lifecycle Analysis for '
 
 FILE_NAME_ALERT_COMMIT_LIST = 'alert_timestamp_list.json'
 FILE_NAME_ALERT = 'alerts.json'
+FILE_NAME_ALERT_LOG = 'alerts.jsonl'
+FILE_NAME_ALERT_LOG_HEADER = 'alerts_header.json'
 FILE_NAME_RESULT = 'results.json'
+FILE_NAME_RESULT_LOG = 'results.jsonl'
+FILE_NAME_RESULT_LOG_HEADER = 'results_header.json'
+FILE_NAME_STORE = 'results.sqlite'
+FILE_NAME_ESTIMATE = 'estimate.json'
+FILE_NAME_SAMPLE = 'sample.json'
+FILE_NAME_PROFILE = 'profile.pstats'
+FILE_NAME_MEMORY_TIMELINE = 'memory_timeline.jsonl'
+DIR_NAME_RESULT_COLUMNS = 'results_columns'
+# stored benchmark baselines, relative to the root directory
+BENCHMARK_DIR = 'benchmarks'
 
 JAVA_INT_MAX = 2147483647
 
+# version of the encoded results and logs, see serialization. Increased whenever the encoding of a type changes
+SCHEMA_VERSION = 1
+
+# compression of the files written by write_to_file: None, 'gzip' or 'zstd' (needs zstandard). Reading detects it
+FILE_COMPRESSION = None
+
+# the history after an alert commit is inspected in windows of this size
+ALERT_ANALYSIS_STEP = 7890000_000  # milliseconds. 3 months
+
 NEW_CLONE_SIMILARITY_THRESHOLD = 0.8
+# number of clone finding churn indices kept in memory. One index per commit
+CLONE_FINDING_INDEX_CACHE_SIZE = 1024
 LATEX_TEXT_WIDTH = 418.25555
 
 
@@ -21,6 +44,10 @@ def get_pgf_dir(project: str) -> str:
     return ROOT_DIR + '/' + PROJECTS_DIR + '/' + project + '/pgf/'
 
 
+def get_benchmark_baseline_file_name(suite: str) -> str:
+    return ROOT_DIR + '/' + BENCHMARK_DIR + '/' + suite + '_baseline.json'
+
+
 def get_project_dir(project: str) -> str:
     return ROOT_DIR + '/' + PROJECTS_DIR + '/' + project
 
@@ -33,9 +60,49 @@ def get_alert_file_name(project: str) -> str:
     return get_project_dir(project) + '/' + FILE_NAME_ALERT
 
 
+def get_alert_log_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_ALERT_LOG
+
+
+def get_alert_log_header_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_ALERT_LOG_HEADER
+
+
 def get_result_file_name(project: str) -> str:
     return get_project_dir(project) + '/' + FILE_NAME_RESULT
 
 
+def get_result_log_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_RESULT_LOG
+
+
+def get_result_log_header_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_RESULT_LOG_HEADER
+
+
+def get_store_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_STORE
+
+
+def get_estimate_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_ESTIMATE
+
+
+def get_sample_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_SAMPLE
+
+
+def get_profile_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_PROFILE
+
+
+def get_memory_timeline_file_name(project: str) -> str:
+    return get_project_dir(project) + '/' + FILE_NAME_MEMORY_TIMELINE
+
+
+def get_result_columns_dir(project: str) -> str:
+    return get_project_dir(project) + '/' + DIR_NAME_RESULT_COLUMNS
+
+
 def get_window_title(project: str) -> str:
     return WINDOW_TITLE + project
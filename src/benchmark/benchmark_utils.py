@@ -0,0 +1,110 @@
+import json
+import platform
+import statistics
+import sys
+import timeit
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+
+REPORT_SCHEMA_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """seconds per call of one benchmark. min is the most stable measure and the one that is compared"""
+    name: str
+    params: dict = field(default_factory=dict)
+    loops: int = 0
+    repeat: int = 0
+    min: float = 0.0
+    median: float = 0.0
+    mean: float = 0.0
+    stdev: float = 0.0
+
+    def get_id(self) -> str:
+        if not self.params:
+            return self.name
+        return self.name + "[" + ",".join(key + "=" + str(value) for key, value in sorted(self.params.items())) + "]"
+
+
+@dataclass
+class Comparison:
+    benchmark_id: str
+    baseline: float
+    current: float
+
+    def get_ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def measure(name: str, func, params: dict = None, repeat: int = 5, min_time: float = 0.2) -> BenchmarkResult:
+    """Times the callable like timeit: the number of loops is chosen so that one repeat takes at least min_time."""
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        if timer.timeit(loops) >= min_time:
+            break
+        loops *= 10 if loops < 1000 else 2
+    times = [t / loops for t in timer.repeat(repeat, loops)]
+    return BenchmarkResult(name, params or {}, loops, repeat, min(times), statistics.median(times), statistics.fmean(times),
+                           statistics.stdev(times) if len(times) > 1 else 0.0)
+
+
+def build_report(suite: str, results: [BenchmarkResult]) -> dict:
+    return {
+        "schema": REPORT_SCHEMA_VERSION, "suite": suite, "created": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0], "platform": platform.platform(),
+        "results": [{"id": result.get_id(), **asdict(result)} for result in results]
+    }
+
+
+def write_report(file_name: str, report: dict):
+    with open(file_name, "w") as file:
+        json.dump(report, file, indent=1)
+
+
+def read_report(file_name: str) -> dict:
+    with open(file_name, "r") as file:
+        report = json.load(file)
+    if report.get("schema") != REPORT_SCHEMA_VERSION:
+        raise ValueError("Unsupported benchmark report schema in " + file_name + ": " + str(report.get("schema")))
+    return report
+
+
+def compare_reports(report: dict, baseline: dict) -> [Comparison]:
+    """compares the min of every benchmark that is in both reports"""
+    baseline_results = {result["id"]: result for result in baseline["results"]}
+    return [
+        Comparison(result["id"], baseline_results[result["id"]]["min"], result["min"])
+        for result in report["results"] if result["id"] in baseline_results
+    ]
+
+
+def get_regressions(comparisons: [Comparison], threshold: float) -> [Comparison]:
+    """the benchmarks that got slower by more than threshold, e.g. 0.2 for 20%"""
+    return [comparison for comparison in comparisons if comparison.get_ratio() > 1 + threshold]
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, factor in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= factor:
+            return "{0:.3f} {1}".format(seconds / factor, unit)
+    return "{0:.1f} ns".format(seconds / 1e-9)
+
+
+def format_results(results: [BenchmarkResult]) -> str:
+    return "\n".join(
+        "{0:60}{1:>14}{2:>14}".format(result.get_id(), format_seconds(result.min), format_seconds(result.median))
+        for result in results
+    )
+
+
+def format_comparisons(comparisons: [Comparison], threshold: float) -> str:
+    lines = []
+    for comparison in comparisons:
+        ratio = comparison.get_ratio()
+        marker = "  REGRESSION" if ratio > 1 + threshold else ("  faster" if ratio < 1 - threshold else "")
+        lines.append("{0:60}{1:>14}{2:>14}{3:>8.2f}x{4}".format(
+            comparison.benchmark_id, format_seconds(comparison.baseline), format_seconds(comparison.current), ratio, marker
+        ))
+    return "\n".join(lines)
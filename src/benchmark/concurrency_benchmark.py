@@ -0,0 +1,244 @@
+"""Scaling of the parallel analysis against a local stand-in server with simulated latency.
+
+Call ```python -m src.benchmark.concurrency_benchmark --help``` from the repository root."""
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+from teamscale_client import TeamscaleClient
+
+from src.benchmark.replay_benchmark import run_from_scratch, compare_results
+from src.benchmark.synthetic_history import SyntheticHistory, HistoryConfig
+from src.main.analysis.scheduling import SchedulingPolicy
+from src.main.pretty_print import MyPrinter, LogLevel, set_module_levels
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+CONCURRENCY_LEVELS = (1, 2, 4, 8, 16, 32)
+LATENCIES = (0.0, 0.01, 0.05)
+# requests the stand-in server works on at a time, like the handler pool of a real server. Below the highest concurrency
+# level, so the queueing at the server is measured
+SERVER_THREADS = 8
+REPORT_SCHEMA_VERSION = 1
+
+
+class StandInServer:
+    """Serves a synthetic history over HTTP on localhost like a Teamscale server. Every request takes the given latency.
+    The server works on at most threads requests at a time and the others queue, like the request handler pool of a real
+    server. None or 0 is unlimited. The queueing and service time of every request is recorded."""
+
+    def __init__(self, history: SyntheticHistory, latency: float = 0.0, threads: int = SERVER_THREADS):
+        self.history = history
+        self.latency = latency
+        self._slots = threading.Semaphore(threads) if threads else None
+        self._lock = threading.Lock()
+        self.queue_seconds: [float] = []
+        self.service_seconds: [float] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                arrival = time.perf_counter()
+                url = urlsplit(self.path)
+                parameters = {key: values[0] if len(values) == 1 else values for key, values in parse_qs(url.query).items()}
+                if server._slots is not None:
+                    server._slots.acquire()
+                start = time.perf_counter()
+                try:
+                    if server.latency > 0:
+                        time.sleep(server.latency)
+                    status, text = 200, server.history.respond(url.path, parameters)
+                except KeyError as e:
+                    status, text = 404, str(e)
+                finally:
+                    if server._slots is not None:
+                        server._slots.release()
+                server.record(start - arrival, time.perf_counter() - start)
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True)
+
+    def get_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return "http://" + host + ":" + str(port)
+
+    def record(self, queue_seconds: float, service_seconds: float):
+        with self._lock:
+            self.queue_seconds.append(queue_seconds)
+            self.service_seconds.append(service_seconds)
+
+    def reset(self):
+        with self._lock:
+            self.queue_seconds.clear()
+            self.service_seconds.clear()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TimedClient(TeamscaleClient):
+    """a Teamscale client that records the latency of every request as the analysis sees it"""
+
+    def __init__(self, url: str, project: str, branch: str):
+        self.latencies: [float] = []
+        self._lock = threading.Lock()
+        super().__init__(url, "benchmark", "benchmark", project, branch=branch)
+
+    def get(self, url, parameters=None):
+        start = time.perf_counter()
+        try:
+            return super().get(url, parameters)
+        finally:
+            with self._lock:
+                self.latencies.append(time.perf_counter() - start)
+
+
+def get_percentiles(values: [float]) -> dict:
+    if not values:
+        return {"p50": None, "p99": None, "mean": None}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {"p50": round(float(p50), 6), "p99": round(float(p99), 6), "mean": round(float(np.mean(values)), 6)}
+
+
+def measure_level(server: StandInServer, concurrency: int, expected: dict[int, dict] = None) -> (dict, dict[int, dict]):
+    client = TimedClient(server.get_url(), server.history.config.project, server.history.config.branch)
+    server.reset()
+    run, records = run_from_scratch(client, SchedulingPolicy.ORIGINAL, concurrency)
+    alert_commit_count = sum(run["results"].values())
+    return {
+        "latency": server.latency, "concurrency": concurrency, "wall_seconds": run["wall_seconds"],
+        "cpu_seconds": run["cpu_seconds"], "request_count": run["request_count"],
+        "requests_per_second": round(run["request_count"] / run["wall_seconds"], 2),
+        "alert_commits_per_second": round(alert_commit_count / run["wall_seconds"], 3),
+        "request_latency": get_percentiles(client.latencies), "server_queueing": get_percentiles(server.queue_seconds),
+        "server_service": get_percentiles(server.service_seconds),
+        "mismatches": None if expected is None else compare_results(records, expected)
+    }, records
+
+
+def run_concurrency_benchmark(history: SyntheticHistory, latencies=LATENCIES, levels=CONCURRENCY_LEVELS,
+                              server_threads: int = SERVER_THREADS) -> [dict]:
+    """Measures the analysis of the history at every concurrency level for every latency. The results of every run are
+    checked against the first one, so parallelism cannot change them. speedup and efficiency relate to the lowest level."""
+    measurements: [dict] = []
+    expected = None
+    for latency in latencies:
+        with StandInServer(history, latency, server_threads) as server:
+            baseline = None
+            for concurrency in levels:
+                measurement, records = measure_level(server, concurrency, expected)
+                if expected is None:
+                    expected = records
+                    measurement["mismatches"] = []
+                if baseline is None:
+                    baseline = measurement
+                measurement["speedup"] = round(baseline["wall_seconds"] / measurement["wall_seconds"], 3)
+                measurement["efficiency"] = round(
+                    measurement["speedup"] * baseline["concurrency"] / measurement["concurrency"], 3
+                )
+                measurements.append(measurement)
+                printer.white(lambda: format_measurement(measurements[-1]), LogLevel.CRUCIAL)
+    return measurements
+
+
+def format_measurement(measurement: dict) -> str:
+    return "latency {0:6.3f} s, concurrency {1:3}: {2:8.2f} s, {3:9.1f} req/s, speedup {4:6.2f}, efficiency {5:5.0%}, " \
+           "latency p50/p99 {6:.4f}/{7:.4f} s, queueing p99 {8:.4f} s{9}".format(
+                measurement["latency"], measurement["concurrency"], measurement["wall_seconds"],
+                measurement["requests_per_second"], measurement["speedup"], measurement["efficiency"],
+                measurement["request_latency"]["p50"] or 0, measurement["request_latency"]["p99"] or 0,
+                measurement["server_queueing"]["p99"] or 0, ", RESULTS DIFFER" if measurement["mismatches"] else "")
+
+
+def plot_scaling(measurements: [dict], file_name: str):
+    """throughput and request latency over the concurrency level, one line per latency"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+
+    fig, (throughput_axis, latency_axis) = plt.subplots(1, 2, figsize=(12, 4.5))
+    for latency in sorted({m["latency"] for m in measurements}):
+        series = [m for m in measurements if m["latency"] == latency]
+        levels = [m["concurrency"] for m in series]
+        label = "latency " + str(latency) + " s"
+        throughput_axis.plot(levels, [m["requests_per_second"] for m in series], marker="o", label=label)
+        latency_axis.plot(levels, [m["request_latency"]["p99"] for m in series], marker="o", label=label + " p99")
+        latency_axis.plot(levels, [m["server_queueing"]["p99"] for m in series], marker="x", linestyle="--",
+                          label=label + " queueing p99")
+    for axis, y_label in ((throughput_axis, "requests per second"), (latency_axis, "seconds")):
+        axis.set_xscale("log", base=2)
+        axis.set_xlabel("concurrency")
+        axis.set_ylabel(y_label)
+        axis.grid(True, alpha=0.3)
+        axis.legend(fontsize="small")
+    throughput_axis.set_title("Throughput")
+    latency_axis.set_title("Request latency")
+    fig.tight_layout()
+    fig.savefig(file_name)
+    plt.close(fig)
+
+
+def parse_levels(text: str, value_type=int) -> list:
+    return [value_type(value) for value in text.split(",") if value]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Runs the analysis against a local stand-in server at several "
+                                                 "concurrency levels and simulated latencies.")
+    parser.add_argument("--levels", default=",".join(map(str, CONCURRENCY_LEVELS)), help="comma separated worker counts")
+    parser.add_argument("--latencies", default=",".join(map(str, LATENCIES)), help="comma separated seconds per request")
+    parser.add_argument("--server_threads", type=int, default=SERVER_THREADS,
+                        help="requests the server works on at a time. Others queue. 0 is unlimited, so nothing queues")
+    parser.add_argument("--commits", type=int, default=300)
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--alerts", type=int, default=32, help="alert commits. At least the highest level to keep all busy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the measurements as JSON to this file")
+    parser.add_argument("--plot", help="draw the scaling curve to this image file")
+    parser.add_argument("--log_level", default="CRUCIAL,concurrency_benchmark=INFO")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    set_module_levels(args.log_level)
+    config = HistoryConfig(commit_count=args.commits, file_count=args.files, alert_count=args.alerts, seed=args.seed)
+    measurements = run_concurrency_benchmark(SyntheticHistory(config), parse_levels(args.latencies, float),
+                                             parse_levels(args.levels), args.server_threads)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"schema": REPORT_SCHEMA_VERSION, "suite": "concurrency", "server_threads": args.server_threads,
+                       "history": vars(config), "measurements": measurements}, file, indent=1)
+    if args.plot:
+        plot_scaling(measurements, args.plot)
+        printer.blue("Scaling curve written to " + args.plot, LogLevel.CRUCIAL)
+    if any(m["mismatches"] for m in measurements):
+        printer.red("The results differ between concurrency levels", LogLevel.CRUCIAL)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,66 @@
+"""Helpers of the benchmarks and the tests: a scratch project directory and server responses in the JSON format of
+Teamscale. Only the standard library and defintions are imported, so the tests using them stay light."""
+import tempfile
+from contextlib import contextmanager
+
+import defintions
+
+
+@contextmanager
+def scratch_root_dir():
+    """Points the project directories to a temporary directory, so a run starts from scratch and the files of real
+    analyses are untouched."""
+    root_dir = defintions.ROOT_DIR
+    with tempfile.TemporaryDirectory() as directory:
+        defintions.ROOT_DIR = directory
+        try:
+            yield directory
+        finally:
+            defintions.ROOT_DIR = root_dir
+
+
+def generate_commit_json(timestamp: int, branch: str = "main", parent_timestamps: [int] = None) -> dict:
+    commit = {"branchName": branch, "timestamp": timestamp, "type": "simple"}
+    if parent_timestamps is not None:
+        commit["type"] = "parented"
+        commit["parentCommits"] = [{"branchName": branch, "timestamp": t, "type": "simple"} for t in parent_timestamps]
+    return commit
+
+
+def generate_location_json(uniform_path: str, start_line: int, end_line: int) -> dict:
+    return {
+        "location": uniform_path, "rawStartLine": start_line, "rawEndLine": end_line,
+        "rawStartOffset": start_line * 40, "rawEndOffset": end_line * 40, "type": "TextRegionLocation",
+        "uniformPath": uniform_path
+    }
+
+
+def generate_commit_alert_json(file: str, file_lines: (int, int), sibling: str, sibling_lines: (int, int)) -> dict:
+    return {
+        "context": {
+            "expectedCloneLocation": generate_location_json(file, *file_lines),
+            "expectedSiblingLocation": generate_location_json(sibling, *sibling_lines),
+            "oldCloneLocation": generate_location_json(file, *file_lines),
+            "removedCloneId": "removed-clone"
+        },
+        "message": "Found potential inconsistent clone change"
+    }
+
+
+def generate_file_change_json(uniform_path: str, timestamp: int, change_type: str = "EDIT", origin_path: str = None) -> dict:
+    file_change = {"changeType": change_type, "uniformPath": uniform_path, "commit": generate_commit_json(timestamp)}
+    if origin_path is not None:
+        file_change["originPath"] = origin_path
+        file_change["originCommit"] = generate_commit_json(timestamp - 1)
+    return file_change
+
+
+def get_timestamp(commit: str) -> int:
+    """the timestamp of a 'branch:timestamp' parameter"""
+    return int(str(commit).rpartition(":")[2])
+
+
+def parse_element(element: str, project: str) -> (str, int):
+    """path and timestamp of a compare-elements parameter 'project/path#@#branch:timestamp'"""
+    path, _, commit = element.partition("#@#")
+    return path[len(project) + 1:], get_timestamp(commit)
@@ -0,0 +1,175 @@
+"""Micro benchmarks of the hot paths of the analysis and the data model on synthetic inputs.
+
+Call ```python -m src.benchmark.micro_benchmarks --help``` from the repository root."""
+import argparse
+import copy
+import fnmatch
+import os
+import sys
+from pathlib import Path
+
+import portion
+
+from defintions import get_benchmark_baseline_file_name
+from src.benchmark.benchmark_utils import BenchmarkResult, measure, build_report, write_report, read_report, \
+    compare_reports, get_regressions, format_results, format_comparisons
+from src.benchmark.synthetic import generate_change_lines, generate_diff_json, generate_churn_json
+from src.main.analysis.analysis_utils import correct_lines, deletion_pre_check, are_left_lines_affected_at_diff, \
+    filter_clone_finding_churn_by_file, filter_relevant_clone_findings, AnalysisResult
+from src.main.api.data import DiffDescription, DiffType, CloneFindingChurn, CommitAlert, Commit, FileChange, \
+    TextRegionLocation, CloneFinding
+from src.main.pretty_print import MyPrinter, LogLevel
+from src.main.utils.interval_utils import list_to_interval_list, overlaps_more_than_threshold
+from src.benchmark.fixtures import generate_commit_alert_json, generate_commit_json, generate_file_change_json, \
+    generate_location_json
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+SUITE = "micro"
+HUNK_COUNTS = (10, 1_000, 100_000)
+FINDING_COUNTS = (1_000, 10_000)
+# sizes of a --quick run, e.g. in CI
+QUICK_HUNK_COUNTS = (10, 1_000)
+QUICK_FINDING_COUNTS = (1_000,)
+
+SINGLE_BENCHMARKS = (
+    "overlaps_more_than_threshold.overlapping", "overlaps_more_than_threshold.disjoint", "Commit.from_json",
+    "TextRegionLocation.from_json", "CommitAlert.from_json", "FileChange.from_json", "CloneFinding.from_json"
+)
+# parameterized by the number of hunks of the diff
+DIFF_BENCHMARKS = (
+    "correct_lines", "deletion_pre_check", "are_left_lines_affected_at_diff", "list_to_interval_list",
+    "DiffDescription.from_json"
+)
+# parameterized by the number of findings of the churn
+CHURN_BENCHMARKS = ("filter_clone_finding_churn_by_file", "filter_relevant_clone_findings", "CloneFindingChurn.from_json")
+
+
+def build_diff(hunk_count: int) -> (DiffDescription, (int, int)):
+    """a line based diff and a location in an unchanged region in its middle"""
+    left_lines, right_lines, location = generate_change_lines(hunk_count)
+    return DiffDescription(DiffType.LINE_BASED, left_lines, [], right_lines, []), location
+
+
+def get_relevant_query(churn_json: dict) -> (str, str, AnalysisResult):
+    """an expected file and sibling matching the first added finding, so queries have a result"""
+    finding = next(f for f in churn_json["addedFindings"] if f["categoryName"] == "Code Duplication" and "death" not in f)
+    file, sibling = finding["location"], finding["siblingLocations"][0]
+    commit_alert = CommitAlert.from_json(generate_commit_alert_json(
+        file["uniformPath"], (file["rawStartLine"], file["rawEndLine"]),
+        sibling["uniformPath"], (sibling["rawStartLine"], sibling["rawEndLine"])
+    ))
+    return file["uniformPath"], sibling["uniformPath"], AnalysisResult.from_alert("project", 0, 0, 0, commit_alert)
+
+
+def get_diff_benchmarks(hunk_count: int) -> dict:
+    diff, (start_line, end_line) = build_diff(hunk_count)
+    diff_json = generate_diff_json(hunk_count)
+    interval = portion.closedopen(start_line, end_line)
+    left_lines = diff_json["leftChangeLines"]
+    return {
+        "correct_lines": lambda: correct_lines(start_line, end_line, diff),
+        "deletion_pre_check": lambda: deletion_pre_check(interval, diff),
+        "are_left_lines_affected_at_diff": lambda: are_left_lines_affected_at_diff(start_line, end_line, diff),
+        "list_to_interval_list": lambda: list_to_interval_list(left_lines),
+        "DiffDescription.from_json": lambda: DiffDescription.from_json(diff_json),
+    }
+
+
+def get_churn_benchmarks(finding_count: int) -> dict:
+    churn_json = generate_churn_json(finding_count)
+    churn = CloneFindingChurn.from_json(churn_json)
+    file, sibling, analysis_result = get_relevant_query(churn_json)
+    return {
+        # the filter replaces the finding lists of the churn, so it gets a shallow copy
+        "filter_clone_finding_churn_by_file": lambda: filter_clone_finding_churn_by_file([file, sibling], copy.copy(churn)),
+        "filter_relevant_clone_findings": lambda: filter_relevant_clone_findings(churn, file, sibling, analysis_result),
+        "CloneFindingChurn.from_json": lambda: CloneFindingChurn.from_json(churn_json),
+    }
+
+
+def get_single_benchmarks() -> dict:
+    overlapping, other = portion.closedopen(10, 60), portion.closedopen(20, 70)
+    disjoint = portion.closedopen(100, 120)
+    commit_json = generate_commit_json(1600000000000, parent_timestamps=[1599999999000])
+    location_json = generate_location_json("src/main/java/File.java", 10, 60)
+    commit_alert_json = generate_commit_alert_json("src/main/java/A.java", (10, 60), "src/main/java/B.java", (20, 70))
+    file_change_json = generate_file_change_json("src/main/java/A.java", 1600000000000, "MOVE", "src/main/java/Old.java")
+    finding_json = generate_churn_json(1, seed=1)
+    finding_json = next(findings[0] for key, findings in finding_json.items() if key != "commit" and findings)
+    return {
+        "overlaps_more_than_threshold.overlapping": lambda: overlaps_more_than_threshold(overlapping, other, 0.8),
+        "overlaps_more_than_threshold.disjoint": lambda: overlaps_more_than_threshold(overlapping, disjoint, 0.8),
+        "Commit.from_json": lambda: Commit.from_json(commit_json),
+        "TextRegionLocation.from_json": lambda: TextRegionLocation.from_json(location_json),
+        "CommitAlert.from_json": lambda: CommitAlert.from_json(commit_alert_json),
+        "FileChange.from_json": lambda: FileChange.from_json(file_change_json),
+        "CloneFinding.from_json": lambda: CloneFinding.from_json(finding_json),
+    }
+
+
+def run_micro_benchmarks(hunk_counts=HUNK_COUNTS, finding_counts=FINDING_COUNTS, pattern: str = "*", repeat: int = 5,
+                         min_time: float = 0.2) -> [BenchmarkResult]:
+    """Runs all benchmarks whose id matches the glob pattern. Inputs are generated with fixed seeds."""
+    # inputs are only generated for sizes with a matching benchmark
+    groups = [({}, SINGLE_BENCHMARKS, get_single_benchmarks)]
+    groups += [({"hunks": n}, DIFF_BENCHMARKS, lambda n=n: get_diff_benchmarks(n)) for n in hunk_counts]
+    groups += [({"findings": n}, CHURN_BENCHMARKS, lambda n=n: get_churn_benchmarks(n)) for n in finding_counts]
+
+    results: [BenchmarkResult] = []
+    for params, names, get_benchmarks in groups:
+        names = [name for name in names if fnmatch.fnmatch(BenchmarkResult(name, params).get_id(), pattern)]
+        if not names:
+            continue
+        benchmarks: dict = get_benchmarks()
+        for name in names:
+            results.append(measure(name, benchmarks[name], params, repeat, min_time))
+            printer.white(lambda: format_results(results[-1:]), LogLevel.VERBOSE)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Micro benchmarks of the analysis hot paths on synthetic inputs.")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", default=get_benchmark_baseline_file_name(SUITE),
+                        help="compare against this report. Default: the stored baseline")
+    parser.add_argument("--save_baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="a benchmark regressed if it is slower than the baseline by more than this share")
+    parser.add_argument("--filter", default="*", help="glob pattern of the benchmark ids to run, e.g. 'correct_lines*'")
+    parser.add_argument("--quick", action="store_true", help="skip the largest inputs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min_time", type=float, default=0.2, help="minimum seconds of one repeat")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    results = run_micro_benchmarks(
+        QUICK_HUNK_COUNTS if args.quick else HUNK_COUNTS, QUICK_FINDING_COUNTS if args.quick else FINDING_COUNTS,
+        args.filter, args.repeat, args.min_time
+    )
+    report = build_report(SUITE, results)
+    printer.white("{0:60}{1:>14}{2:>14}\n".format("benchmark", "min", "median") + format_results(results), LogLevel.CRUCIAL)
+    if args.output:
+        write_report(args.output, report)
+    if args.save_baseline:
+        Path(os.path.dirname(args.baseline)).mkdir(parents=True, exist_ok=True)
+        write_report(args.baseline, report)
+        printer.blue("Baseline written to " + args.baseline, LogLevel.CRUCIAL)
+        return 0
+    if not os.path.isfile(args.baseline):
+        printer.yellow("No baseline at " + args.baseline + ". Store one with --save_baseline", LogLevel.CRUCIAL)
+        return 0
+    comparisons = compare_reports(report, read_report(args.baseline))
+    printer.white("{0:60}{1:>14}{2:>14}{3:>9}\n".format("benchmark", "baseline", "current", "ratio")
+                  + format_comparisons(comparisons, args.threshold), LogLevel.CRUCIAL)
+    regressions = get_regressions(comparisons, args.threshold)
+    if regressions:
+        printer.red(str(len(regressions)) + " benchmarks regressed by more than " + "{0:.0%}".format(args.threshold),
+                    LogLevel.CRUCIAL)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,141 @@
+"""End-to-end benchmark of a full project analysis against recorded server responses.
+
+Record a fresh analysis with ```python main.py --record recording.jsonl.gz```, then call
+```python -m src.benchmark.replay_benchmark recording.jsonl.gz``` from the repository root."""
+import argparse
+import json
+import os
+import sys
+import time
+
+from teamscale_client import TeamscaleClient
+
+from defintions import get_result_log_file_name
+from src.main.analysis.analysis import clone_finding_index_cache
+from src.main.analysis.scheduling import SchedulingPolicy
+from src.main.api.api_utils import api_statistics
+from src.main.api.replay import ReplayClient, RecordingClient, get_expected_results_file_name
+from src.main.main import run_analysis, save_expected_results
+from src.main.persistence import read_result_records, create_project_dir, ResultLogWriter
+from src.main.pretty_print import MyPrinter, LogLevel, set_module_levels
+from src.main.utils.time_utils import display_time
+from src.benchmark.fixtures import scratch_root_dir
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+REPORT_SCHEMA_VERSION = 1
+
+
+def get_peak_rss() -> int:
+    """the peak resident set size of the process in bytes. None if unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def compare_results(records: dict[int, dict], expected: dict[int, dict]) -> [int]:
+    """returns the alert commits whose results differ from the expected ones, including missing and additional ones"""
+    return sorted(ts for ts in records.keys() | expected.keys() if records.get(ts) != expected.get(ts))
+
+
+def run_from_scratch(client: TeamscaleClient, policy: SchedulingPolicy, workers: int) -> (dict, dict[int, dict]):
+    """Runs the discovery of the alert commits and the analysis from scratch and measures it. Returns the measurements
+    and the result records. If the client is a RecordingClient, the recording is closed and the results are stored next
+    to it."""
+    clone_finding_index_cache.clear()
+    api_statistics.reset()
+    with scratch_root_dir():
+        create_project_dir(client.project)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        run_analysis(client, policy, workers, plot=False)
+        wall_seconds, cpu_seconds = time.perf_counter() - start_wall, time.process_time() - start_cpu
+        records = read_result_records(get_result_log_file_name(client.project))
+        if isinstance(client, RecordingClient):
+            client.close()
+            save_expected_results(client.project, client.file_name)
+    kinds = [record["kind"] for record in records.values()]
+    run = {
+        "wall_seconds": round(wall_seconds, 3), "cpu_seconds": round(cpu_seconds, 3),
+        "request_count": api_statistics.get_request_count(), "requests_per_endpoint": dict(api_statistics.request_counts),
+        "peak_rss_bytes": get_peak_rss(),
+        "results": {kind: kinds.count(kind) for kind in (ResultLogWriter.SUCCESSFUL, ResultLogWriter.FAILED,
+                                                         ResultLogWriter.UNFINISHED)},
+        "result_count": sum(len(record["results"] or []) for record in records.values())
+    }
+    return run, records
+
+
+def replay_analysis(client: TeamscaleClient, policy: SchedulingPolicy, workers: int, expected: dict[int, dict] = None) -> dict:
+    """measures a run from scratch. mismatches lists the alert commits whose results differ from the expected ones"""
+    run, records = run_from_scratch(client, policy, workers)
+    run["mismatches"] = None if expected is None else compare_results(records, expected)
+    return run
+
+
+def read_expected_results(recording_file_name: str) -> dict[int, dict]:
+    file_name = get_expected_results_file_name(recording_file_name)
+    if not os.path.isfile(file_name):
+        return None
+    with open(file_name, "r") as file:
+        return {int(ts): record for ts, record in json.load(file).items()}
+
+
+def format_run(run: dict) -> str:
+    line = ("wall " + "{0:.2f}".format(run["wall_seconds"]) + " s, cpu " + "{0:.2f}".format(run["cpu_seconds"]) + " s, "
+            + str(run["request_count"]) + " requests, results " + json.dumps(run["results"]))
+    if run["peak_rss_bytes"] is not None:
+        line += ", peak RSS " + "{0:.1f}".format(run["peak_rss_bytes"] / 2 ** 20) + " MiB"
+    if run["mismatches"] is not None:
+        line += ", " + ("results match" if not run["mismatches"] else str(len(run["mismatches"])) + " alert commits DIFFER")
+    return line
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replays a recorded analysis and measures it.")
+    parser.add_argument("recording", help="recording written by main.py --record")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per request")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--schedule", default="original", choices=["original", "longest-first", "shortest-first"])
+    parser.add_argument("--repeat", type=int, default=1, help="number of replays")
+    parser.add_argument("--output", help="write the measurements as JSON to this file")
+    parser.add_argument("--log_level", default="CRUCIAL,replay_benchmark=INFO",
+                        help="log levels per module. By default only the measurements are printed")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    set_module_levels(args.log_level)
+    client = ReplayClient(args.recording, args.latency)
+    expected = read_expected_results(args.recording)
+    if expected is None:
+        printer.yellow("No recorded results at " + get_expected_results_file_name(args.recording)
+                       + ". The results are not checked", LogLevel.CRUCIAL)
+    runs = []
+    for idx in range(args.repeat):
+        runs.append(replay_analysis(client, SchedulingPolicy(args.schedule), args.workers, expected))
+        printer.white("Replay " + str(idx + 1) + ": " + format_run(runs[-1]), LogLevel.CRUCIAL)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({
+                "schema": REPORT_SCHEMA_VERSION, "suite": "replay", "recording": args.recording, "project": client.project,
+                "latency": args.latency, "workers": args.workers, "schedule": args.schedule, "runs": runs
+            }, file, indent=1)
+    best = min(run["wall_seconds"] for run in runs)
+    printer.blue("Best wall time: " + (display_time(int(best * 1000)) or "< 1 second"), LogLevel.CRUCIAL)
+    mismatches = next((run["mismatches"] for run in runs if run["mismatches"]), None)
+    if mismatches:
+        printer.red("The replayed results differ from the recorded ones at alert commits " + str(mismatches[:20]),
+                    LogLevel.CRUCIAL)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
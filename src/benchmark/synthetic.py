@@ -0,0 +1,86 @@
+import random
+
+from src.benchmark.fixtures import generate_commit_json, generate_location_json
+
+# the diffs leave this many lines around the quiet location untouched
+QUIET_REGION_LENGTH = 200
+
+
+def generate_change_lines(hunk_count: int, seed: int = 0, quiet_at: int = None) -> ([int], [int], (int, int)):
+    """Generates the left and right change lines of a line based diff with the given number of hunks, as Teamscale
+    returns them: flat lists of [start, end) pairs. Hunks are edits, deletions (empty right interval) and insertions
+    (empty left interval). Before hunk quiet_at (default: the middle one) a long unchanged region is left. Returns the
+    change lines and the (start, end) of a location in the middle of that region."""
+    rnd = random.Random(seed)
+    if quiet_at is None:
+        quiet_at = hunk_count // 2
+    left_lines, right_lines = [], []
+    left_line, right_line = 1, 1
+    location = None
+    for hunk in range(hunk_count):
+        if hunk == quiet_at:
+            location = (left_line + QUIET_REGION_LENGTH // 4, left_line + 3 * QUIET_REGION_LENGTH // 4)
+            left_line += QUIET_REGION_LENGTH
+            right_line += QUIET_REGION_LENGTH
+        gap = rnd.randint(1, 20)
+        left_line += gap
+        right_line += gap
+        kind = rnd.random()
+        left_length = 0 if kind < 0.2 else rnd.randint(1, 10)
+        right_length = 0 if 0.2 <= kind < 0.4 else rnd.randint(1, 10)
+        left_lines += [left_line, left_line + left_length]
+        right_lines += [right_line, right_line + right_length]
+        left_line += left_length
+        right_line += right_length
+    if location is None:
+        location = (left_line + QUIET_REGION_LENGTH // 4, left_line + 3 * QUIET_REGION_LENGTH // 4)
+    return left_lines, right_lines, location
+
+
+def generate_diff_json(hunk_count: int, seed: int = 0, name: str = "line-based") -> dict:
+    left_lines, right_lines, _ = generate_change_lines(hunk_count, seed)
+    return {
+        "name": name, "leftChangeLines": left_lines, "rightChangeLines": right_lines,
+        # regions are character offsets. Their exact values are not used by the analysis
+        "leftChangeRegions": [line * 40 for line in left_lines], "rightChangeRegions": [line * 40 for line in right_lines]
+    }
+
+
+def generate_file_paths(file_count: int) -> [str]:
+    return ["src/main/java/module" + str(i % 10) + "/File" + str(i) + ".java" for i in range(file_count)]
+
+
+def generate_clone_finding_json(rnd: random.Random, finding_id: str, file_paths: [str], timestamp: int,
+                                dead=False, category="Code Duplication") -> dict:
+    length = rnd.randint(5, 60)
+    locations = []
+    for path in rnd.sample(file_paths, min(len(file_paths), rnd.randint(2, 4))):
+        start_line = rnd.randint(1, 2000)
+        locations.append(generate_location_json(path, start_line, start_line + length))
+    finding = {
+        "groupName": "Redundancy", "categoryName": category, "message": "Clone with " + str(len(locations)) + " instances",
+        "location": locations[0], "siblingLocations": locations[1:], "id": finding_id,
+        "birth": generate_commit_json(timestamp), "assessment": "YELLOW",
+        "properties": {"Instances": len(locations), "Length": length, "Gaps": 0}, "analysisTimestamp": timestamp,
+        "typeId": "clone"
+    }
+    if dead:
+        finding["death"] = generate_commit_json(timestamp)
+    return finding
+
+
+def generate_churn_json(finding_count: int, seed: int = 0, timestamp: int = 1600000000000, file_count: int = None) -> dict:
+    """Generates a clone finding churn with the given number of findings in total, spread over the finding lists like
+    real churns. A few findings are of other categories or already dead."""
+    rnd = random.Random(seed)
+    file_paths = generate_file_paths(file_count or max(10, finding_count // 20))
+    lists = {"addedFindings": [], "findingsAddedInBranch": [], "findingsInChangedCode": [], "removedFindings": [],
+             "findingsRemovedInBranch": []}
+    weights = [0.4, 0.05, 0.3, 0.2, 0.05]
+    for idx in range(finding_count):
+        key = rnd.choices(list(lists), weights)[0]
+        category = "Code Duplication" if rnd.random() < 0.9 else "Code Anomalies"
+        lists[key].append(generate_clone_finding_json(
+            rnd, "F" + str(seed) + "-" + str(idx), file_paths, timestamp, dead=rnd.random() < 0.05, category=category
+        ))
+    return {"commit": generate_commit_json(timestamp), **lists}
@@ -0,0 +1,381 @@
+"""Synthetic Teamscale repository histories at configurable scale, served to the analysis by a client without a server.
+
+Call ```python -m src.benchmark.synthetic_history --help``` from the repository root."""
+import argparse
+import json
+import random
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, fields
+
+from teamscale_client import TeamscaleClient
+
+from src.benchmark.synthetic import generate_clone_finding_json
+from src.main.api.replay import build_response, RecordingClient
+from src.benchmark.fixtures import generate_commit_json, generate_location_json, get_timestamp, parse_element
+
+DAY = 86400_000
+
+ADD = "ADD"
+EDIT = "EDIT"
+MOVE = "MOVE"
+DELETE = "DELETE"
+
+
+@dataclass
+class HistoryConfig:
+    """Size and shape of a synthetic history. scale() multiplies the sizes, e.g. for 10x and 100x of a real project."""
+    project: str = "synthetic"
+    branch: str = "main"
+    commit_count: int = 2_000
+    file_count: int = 500
+    # alert commits and the maximal number of commit alerts of one alert commit
+    alert_count: int = 50
+    alerts_per_commit: int = 2
+    # maximal number of files changed by one commit
+    files_per_commit: int = 4
+    # maximal number of hunks of one diff
+    max_hunks: int = 10
+    findings_per_churn: int = 20
+    move_probability: float = 0.02
+    delete_probability: float = 0.01
+    add_probability: float = 0.02
+    # mean milliseconds between two commits
+    commit_interval: int = DAY // 4
+    start: int = 1_500_000_000_000
+    seed: int = 0
+
+    def scale(self, factor: float) -> "HistoryConfig":
+        sizes = {"commit_count", "file_count", "alert_count"}
+        return HistoryConfig(**{
+            f.name: max(1, int(getattr(self, f.name) * factor)) if f.name in sizes else getattr(self, f.name)
+            for f in fields(self)
+        })
+
+
+@dataclass
+class FileChangeEntry:
+    change_type: str
+    file_id: int
+    uniform_path: str
+    origin_path: str = None
+    # seed and line count the hunks of the change are generated from. The hunks are only generated when requested
+    hunk_seed: int = 0
+    line_count: int = 0
+
+
+def generate_hunks(rnd: random.Random, line_count: int, max_hunks: int) -> ([int], [int]):
+    """Left and right change lines of a diff of a file with the given line count: flat [start, end) pairs of edits,
+    deletions (empty right interval) and insertions (empty left interval), ordered and not overlapping."""
+    hunk_count = rnd.randint(1, max_hunks)
+    mean_gap = max(1, line_count // (hunk_count + 1))
+    left_lines, right_lines = [], []
+    left_line = right_line = 1
+    for _ in range(hunk_count):
+        gap = rnd.randint(0, 2 * mean_gap)
+        kind = rnd.random()
+        left_length = 0 if kind < 0.2 else rnd.randint(1, 8)
+        right_length = 0 if 0.2 <= kind < 0.35 else rnd.randint(1, 8)
+        if left_line + gap + left_length > line_count + 1:
+            break
+        left_line += gap
+        right_line += gap
+        left_lines += [left_line, left_line + left_length]
+        right_lines += [right_line, right_line + right_length]
+        left_line += left_length
+        right_line += right_length
+    return left_lines, right_lines
+
+
+def get_line_delta(left_lines: [int], right_lines: [int]) -> int:
+    return sum(right_lines[1::2]) - sum(right_lines[::2]) - sum(left_lines[1::2]) + sum(left_lines[::2])
+
+
+class SyntheticHistory:
+    """A consistent synthetic repository history: commits changing, moving, adding and deleting files, commit alerts
+    between files that exist at their commit, diffs whose hunks fit the line counts of the files, and clone finding
+    churn in the changed files. Commits, file changes and alerts are simulated up front. Diffs and churns are generated
+    deterministically when they are requested, so large histories stay small in memory.
+
+    respond() answers the requests of src/main/api/api.py with the JSON of a Teamscale server."""
+
+    def __init__(self, config: HistoryConfig):
+        self.config = config
+        rnd = random.Random(config.seed)
+        self.timestamps: [int] = []
+        self.changes: [[FileChangeEntry]] = []
+        self.alert_commit_indices: [int] = []
+        self.alerts: dict[int, list] = {}
+        # file id -> [(timestamp, path)], sorted. The path of a file changes with moves
+        self.file_paths: [[tuple[int, str]]] = []
+        self.file_deleted: [int] = []
+        self.path_ids: dict[str, int] = {}
+        # path -> timestamps at which the file with this path changed
+        self.path_changes: dict[str, list[int]] = {}
+        # file id -> [(timestamp, index of the change in the changes of the commit)]
+        self.file_changes: [[tuple[int, int]]] = []
+        self._simulate(rnd)
+
+    def _add_file(self, timestamp: int, line_count: int) -> int:
+        file_id = len(self.file_paths)
+        path = "src/main/java/module" + str(file_id % 20) + "/File" + str(file_id) + ".java"
+        self.file_paths.append([(timestamp, path)])
+        self.file_deleted.append(None)
+        self.file_changes.append([])
+        self.path_ids[path] = file_id
+        self.line_counts.append(line_count)
+        return file_id
+
+    def _simulate(self, rnd: random.Random):
+        config = self.config
+        self.line_counts: [int] = []
+        alive: [int] = []
+        for _ in range(config.file_count):
+            alive.append(self._add_file(config.start - 1, rnd.randint(50, 1500)))
+
+        alert_count = min(config.alert_count, config.commit_count - config.commit_count // 10)
+        alert_indices = set(rnd.sample(range(config.commit_count // 10, config.commit_count), alert_count))
+        timestamp = config.start
+        for commit_idx in range(config.commit_count):
+            timestamp += rnd.randint(1, 2 * config.commit_interval // 1000) * 1000
+            self.timestamps.append(timestamp)
+            entries: [FileChangeEntry] = []
+            for file_id in rnd.sample(alive, min(len(alive), rnd.randint(1, config.files_per_commit))):
+                entries.append(self._change_file(rnd, timestamp, file_id, alive))
+            if rnd.random() < config.add_probability:
+                file_id = self._add_file(timestamp, rnd.randint(20, 500))
+                alive.append(file_id)
+                entries.append(FileChangeEntry(ADD, file_id, self.file_paths[file_id][-1][1]))
+            for entry_idx, entry in enumerate(entries):
+                self.path_changes.setdefault(entry.uniform_path, []).append(timestamp)
+                if entry.origin_path is not None:
+                    self.path_changes.setdefault(entry.origin_path, []).append(timestamp)
+                self.file_changes[entry.file_id].append((timestamp, entry_idx))
+            self.changes.append(entries)
+            if commit_idx in alert_indices:
+                self.alert_commit_indices.append(commit_idx)
+                self.alerts[timestamp] = self._generate_alerts(rnd, alive)
+        del self.line_counts
+
+    def _change_file(self, rnd: random.Random, timestamp: int, file_id: int, alive: [int]) -> FileChangeEntry:
+        path = self.file_paths[file_id][-1][1]
+        kind = rnd.random()
+        if kind < self.config.delete_probability and len(alive) > 2:
+            alive.remove(file_id)
+            self.file_deleted[file_id] = timestamp
+            return FileChangeEntry(DELETE, file_id, path)
+        origin_path = None
+        if kind < self.config.delete_probability + self.config.move_probability:
+            origin_path = path
+            path = path[:-len(".java")] + "_" + str(len(self.file_paths[file_id])) + ".java"
+            self.file_paths[file_id].append((timestamp, path))
+            self.path_ids[path] = file_id
+        hunk_seed = rnd.getrandbits(32)
+        line_count = self.line_counts[file_id]
+        left_lines, right_lines = generate_hunks(random.Random(hunk_seed), line_count, self.config.max_hunks)
+        self.line_counts[file_id] = max(1, line_count + get_line_delta(left_lines, right_lines))
+        return FileChangeEntry(MOVE if origin_path else EDIT, file_id, path, origin_path, hunk_seed, line_count)
+
+    def _generate_alerts(self, rnd: random.Random, alive: [int]) -> list:
+        alerts = []
+        candidates = [file_id for file_id in alive if self.line_counts[file_id] >= 40]
+        for _ in range(rnd.randint(1, self.config.alerts_per_commit)):
+            if len(candidates) < 2:
+                break
+            locations = []
+            for file_id in rnd.sample(candidates, 2):
+                length = rnd.randint(10, min(60, self.line_counts[file_id] // 2))
+                start_line = rnd.randint(1, self.line_counts[file_id] - length)
+                locations.append(generate_location_json(self.file_paths[file_id][-1][1], start_line, start_line + length))
+            alerts.append({
+                "context": {
+                    "expectedCloneLocation": locations[0], "expectedSiblingLocation": locations[1],
+                    "oldCloneLocation": locations[0], "removedCloneId": "removed-" + str(rnd.getrandbits(32))
+                },
+                "message": "Found potential inconsistent clone change"
+            })
+        return alerts
+
+    def get_commit_json(self, timestamp: int) -> dict:
+        return generate_commit_json(timestamp, self.config.branch)
+
+    def get_commit_index(self, timestamp: int) -> int:
+        idx = bisect_left(self.timestamps, timestamp)
+        if idx == len(self.timestamps) or self.timestamps[idx] != timestamp:
+            raise KeyError("No commit at " + str(timestamp))
+        return idx
+
+    def get_path(self, file_id: int, timestamp: int) -> str:
+        paths = self.file_paths[file_id]
+        return paths[max(0, bisect_right([t for t, path in paths], timestamp) - 1)][1]
+
+    # region responses
+    def get_repository_summary(self) -> dict:
+        return {"firstCommit": self.timestamps[0], "mostRecentCommit": self.timestamps[-1]}
+
+    def get_repository_log(self, start: int, end: int, alerts_only=False) -> list:
+        first, last = bisect_left(self.timestamps, start), bisect_right(self.timestamps, end)
+        if alerts_only:
+            return [{"commit": self.get_commit_json(self.timestamps[idx])} for idx in self.alert_commit_indices
+                    if first <= idx < last]
+        return [{"commit": self.get_commit_json(t)} for t in self.timestamps[first:last]]
+
+    def get_commit_alerts(self, timestamp: int) -> list:
+        return [{"commit": self.get_commit_json(timestamp), "alerts": self.alerts.get(timestamp, [])}]
+
+    def get_affected_files(self, timestamp: int) -> list:
+        commit_idx = self.get_commit_index(timestamp)
+        affected_files = []
+        for entry in self.changes[commit_idx]:
+            file_change = {"changeType": entry.change_type, "uniformPath": entry.uniform_path,
+                           "commit": self.get_commit_json(timestamp)}
+            if entry.origin_path is not None:
+                file_change["originPath"] = entry.origin_path
+                file_change["originCommit"] = self.get_commit_json(self.timestamps[commit_idx - 1] if commit_idx else timestamp)
+            affected_files.append(file_change)
+        return affected_files
+
+    def get_delta_affected_files(self, t1: int, t2: int, uniform_path: str) -> list:
+        changes = self.path_changes.get(uniform_path, [])
+        if bisect_right(changes, t2) - bisect_left(changes, t1) == 0:
+            return []
+        return [{"uniformPath": uniform_path, "changeType": "EDIT"}]
+
+    def get_diff(self, right_path: str, left_timestamp: int, right_timestamp: int) -> list:
+        """The diff of the file between two commits. The analysis always asks for the changes of a single commit. If
+        several commits changed the file in between, the hunks of the last one are returned."""
+        file_id = self.path_ids[right_path]
+        changes = self.file_changes[file_id]
+        first, last = bisect_right(changes, (left_timestamp, sys.maxsize)), bisect_right(changes, (right_timestamp, sys.maxsize))
+        left_lines, right_lines = [], []
+        if last > first:
+            timestamp, entry_idx = changes[last - 1]
+            entry = self.changes[self.get_commit_index(timestamp)][entry_idx]
+            left_lines, right_lines = generate_hunks(random.Random(entry.hunk_seed), entry.line_count, self.config.max_hunks)
+        # whitespace only hunks are not part of the token based diff
+        rnd = random.Random(right_timestamp ^ file_id)
+        kept = [idx for idx in range(0, len(left_lines), 2) if rnd.random() >= 0.1]
+        token_left = [line for idx in kept for line in left_lines[idx:idx + 2]]
+        token_right = [line for idx in kept for line in right_lines[idx:idx + 2]]
+        return [
+            self._diff_json("line-based", left_lines, right_lines),
+            self._diff_json("line-based (ignore whitespace)", left_lines, right_lines),
+            self._diff_json("token-based", token_left, token_right)
+        ]
+
+    @staticmethod
+    def _diff_json(name: str, left_lines: [int], right_lines: [int]) -> dict:
+        return {"name": name, "leftChangeLines": left_lines, "rightChangeLines": right_lines,
+                "leftChangeRegions": [line * 40 for line in left_lines], "rightChangeRegions": [line * 40 for line in right_lines]}
+
+    def get_finding_churn(self, timestamp: int) -> dict:
+        """Findings in the changed files of the commit and in a few other existing files"""
+        commit_idx = self.get_commit_index(timestamp)
+        rnd = random.Random(str(self.config.seed) + "-" + str(timestamp))
+        paths = [entry.uniform_path for entry in self.changes[commit_idx] if entry.change_type != DELETE]
+        for file_id in rnd.sample(range(len(self.file_paths)), min(3, len(self.file_paths))):
+            if self.file_paths[file_id][0][0] < timestamp and (self.file_deleted[file_id] or sys.maxsize) > timestamp:
+                paths.append(self.get_path(file_id, timestamp))
+        lists = {"addedFindings": [], "findingsAddedInBranch": [], "findingsInChangedCode": [], "removedFindings": [],
+                 "findingsRemovedInBranch": []}
+        if paths:
+            for idx in range(rnd.randint(0, self.config.findings_per_churn)):
+                key = rnd.choices(list(lists), [0.4, 0.05, 0.3, 0.2, 0.05])[0]
+                lists[key].append(generate_clone_finding_json(
+                    rnd, "F" + str(timestamp) + "-" + str(idx), paths, timestamp,
+                    category="Code Duplication" if rnd.random() < 0.9 else "Code Anomalies"
+                ))
+        return {"commit": self.get_commit_json(timestamp), **lists}
+
+    # endregion
+
+    def respond(self, path: str, parameters: dict) -> str:
+        """the response text of a request. path is the url without the server url, e.g.
+        'api/projects/<project>/repository-summary'. Parameters may be strings, as in a query string."""
+        path = path.strip("/")
+        project_prefix = "api/projects/" + self.config.project + "/"
+        service = path[len(project_prefix):] if path.startswith(project_prefix) else path
+        if service == "service-api-info":
+            content = {"apiVersion": 8}
+        elif service == "repository-summary":
+            content = self.get_repository_summary()
+        elif service == "repository-log-range":
+            content = self.get_repository_log(int(parameters["start"]), int(parameters["end"]),
+                                              "commit-attribute" in parameters)
+        elif service == "commit-alerts":
+            content = self.get_commit_alerts(get_timestamp(parameters["commit"]))
+        elif service == "commits/affected-files":
+            content = self.get_affected_files(get_timestamp(parameters["commit"]))
+        elif service == "delta/affected-files":
+            content = self.get_delta_affected_files(int(parameters["t1"]), int(parameters["t2"]), parameters["uniform-path"])
+        elif service == "api/compare-elements":
+            left_path, left_timestamp = parse_element(parameters["left"], self.config.project)
+            right_path, right_timestamp = parse_element(parameters["right"], self.config.project)
+            content = self.get_diff(right_path, left_timestamp, right_timestamp)
+        elif service == "finding-churn/list":
+            content = self.get_finding_churn(get_timestamp(parameters["t"]))
+        else:
+            raise KeyError("Unknown service " + path)
+        return json.dumps(content)
+
+
+class SyntheticClient(TeamscaleClient):
+    """Answers the requests of the analysis from a synthetic history. An optional latency is added to every request."""
+
+    def __init__(self, history: SyntheticHistory, latency: float = 0.0, url: str = "http://synthetic"):
+        self.history = history
+        self.latency = latency
+        super().__init__(url, "synthetic", "synthetic", history.config.project, branch=history.config.branch)
+
+    def get(self, url, parameters=None):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        path = url[len(self.url):] if url.startswith(self.url) else url
+        return build_response(url, self.history.respond(path, parameters or {}))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Runs the analysis on a synthetic repository history.")
+    defaults = HistoryConfig()
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies the number of commits, files and alerts")
+    parser.add_argument("--commits", type=int, default=defaults.commit_count)
+    parser.add_argument("--files", type=int, default=defaults.file_count)
+    parser.add_argument("--alerts", type=int, default=defaults.alert_count, help="number of alert commits")
+    parser.add_argument("--max_hunks", type=int, default=defaults.max_hunks, help="maximal number of hunks of a diff")
+    parser.add_argument("--findings", type=int, default=defaults.findings_per_churn,
+                        help="maximal number of findings of a churn")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated seconds per request")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--record", help="record the responses and results for the replay benchmark")
+    parser.add_argument("--log_level", default="CRUCIAL,synthetic_history=INFO,replay_benchmark=INFO")
+    return parser.parse_args()
+
+
+def main(args) -> int:
+    # imported here, the history itself does not need the analysis
+    from src.benchmark.replay_benchmark import replay_analysis, format_run
+    from src.main.analysis.scheduling import SchedulingPolicy
+    from src.main.pretty_print import MyPrinter, LogLevel, set_module_levels
+
+    set_module_levels(args.log_level)
+    printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+    config = HistoryConfig(commit_count=args.commits, file_count=args.files, alert_count=args.alerts,
+                           max_hunks=args.max_hunks, findings_per_churn=args.findings, seed=args.seed).scale(args.scale)
+    start = time.perf_counter()
+    history = SyntheticHistory(config)
+    printer.blue("Generated " + str(config.commit_count) + " commits, " + str(len(history.file_paths)) + " files and "
+                 + str(sum(map(len, history.alerts.values()))) + " commit alerts in "
+                 + "{0:.1f}".format(time.perf_counter() - start) + " s", LogLevel.CRUCIAL)
+    client: TeamscaleClient = SyntheticClient(history, args.latency)
+    if args.record:
+        client = RecordingClient(client, args.record)
+        client.check_api_version()
+    run = replay_analysis(client, SchedulingPolicy.ORIGINAL, args.workers)
+    printer.white(format_run(run), LogLevel.CRUCIAL)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,91 @@
+"""Aggregation of the result columns for the plots, the console summary and the stats command. Only NumPy and the
+standard library are imported."""
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.main.analysis.result_metrics import ResultCategory, LIFETIME_QUANTILES, DISTRIBUTIONS, FILE_DISTRIBUTIONS, CATEGORIES
+
+
+@dataclass
+class ResultColumns:
+    """The analysis results as columns with one row per result, plus the timestamps of the successful and failed runs.
+    See COLUMNS in columnar."""
+    columns: dict[str, np.ndarray]
+    successful_runs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    failed_runs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    def __len__(self):
+        return len(self.columns["alert_timestamp"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+
+@dataclass
+class ResultAggregate:
+    """Everything the plots and the console summary show, computed once from the result columns"""
+    successful_runs: np.ndarray
+    failed_runs: np.ndarray
+    successful_result_count: int
+    category_counts: dict[ResultCategory, int]
+    # deletion metrics
+    instance_deleted_count: int
+    sibling_deleted_count: int
+    one_instance_deleted_count: int
+    both_instances_deleted_count: int
+    instance_time_alive_sum: int
+    sibling_time_alive_sum: int
+    # time alive of the deleted instances and siblings
+    lifetime_sum: int
+    lifetime_quantiles: dict[float, int]
+    distributions: dict[str, np.ndarray]
+
+    def get_run_count(self) -> int:
+        """the number of pie chart entries: every result plus every failed run"""
+        return self.successful_result_count + len(self.failed_runs)
+
+    def get_average_time_alive(self) -> int:
+        if not self.successful_result_count:
+            return 0
+        return round((self.instance_time_alive_sum + self.sibling_time_alive_sum) / (2 * self.successful_result_count))
+
+    def get_average_time_until_deletion(self) -> int:
+        deleted_count = self.instance_deleted_count + self.sibling_deleted_count
+        return round(self.lifetime_sum / deleted_count) if deleted_count else 0
+
+    def get_distributions(self, with_file_affections=True) -> dict[str, np.ndarray]:
+        return {
+            label: data for label, data in self.distributions.items() if with_file_affections or label not in FILE_DISTRIBUTIONS
+        }
+
+
+def aggregate_results(result_columns: ResultColumns) -> ResultAggregate:
+    """computes all aggregates with vectorized operations on the columns"""
+    category_counts = np.bincount(result_columns["category"], minlength=len(CATEGORIES))
+    instance_deleted = np.asarray(result_columns["instance_deleted"])
+    sibling_deleted = np.asarray(result_columns["sibling_deleted"])
+    instance_time_alive = np.asarray(result_columns["instance_time_alive"])
+    sibling_time_alive = np.asarray(result_columns["sibling_time_alive"])
+    lifetimes = np.concatenate((instance_time_alive[instance_deleted], sibling_time_alive[sibling_deleted]))
+
+    return ResultAggregate(
+        successful_runs=np.asarray(result_columns.successful_runs),
+        failed_runs=np.asarray(result_columns.failed_runs),
+        successful_result_count=len(result_columns),
+        category_counts={category: int(category_counts[idx]) for idx, category in enumerate(CATEGORIES)},
+        instance_deleted_count=int(np.count_nonzero(instance_deleted)),
+        sibling_deleted_count=int(np.count_nonzero(sibling_deleted)),
+        one_instance_deleted_count=int(np.count_nonzero(instance_deleted ^ sibling_deleted)),
+        both_instances_deleted_count=int(np.count_nonzero(instance_deleted & sibling_deleted)),
+        instance_time_alive_sum=int(np.sum(instance_time_alive)),
+        sibling_time_alive_sum=int(np.sum(sibling_time_alive)),
+        lifetime_sum=int(np.sum(lifetimes)),
+        lifetime_quantiles={
+            q: int(v) for q, v in zip(LIFETIME_QUANTILES, np.quantile(lifetimes, LIFETIME_QUANTILES) if len(lifetimes) else
+                                      [0] * len(LIFETIME_QUANTILES))
+        },
+        distributions={
+            label: np.concatenate([np.asarray(result_columns[name]) for name in names]) for label, names in DISTRIBUTIONS.items()
+        }
+    )
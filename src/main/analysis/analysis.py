@@ -2,29 +2,36 @@ import traceback
 
 from teamscale_client import TeamscaleClient
 
-from defintions import get_alert_timestamp_list_file_name
+from defintions import get_alert_timestamp_list_file_name, ALERT_ANALYSIS_STEP, get_alert_log_file_name, \
+    get_alert_log_header_file_name
 from src.main.analysis.analysis_utils import (
-    are_left_lines_affected_at_diff, correct_lines, filter_clone_finding_churn_by_file, Affectedness,
-    AnalysisResult, TextSectionDeletedError, InstanceMetrics, filter_file_changes, FileDeletedError, filter_relevant_clone_findings
+    are_left_lines_affected_at_diff, correct_lines, Affectedness, AnalysisResult, TextSectionDeletedError, InstanceMetrics,
+    filter_file_changes, FileDeletedError, CloneFindingIndex, CloneFindingIndexCache, TimeBudgetExhaustedError
 )
 from src.main.api.api import (
     get_repository_summary, get_repository_commits, get_commit_alerts, get_affected_files, get_diff, get_clone_finding_churn,
     get_delta_affected_files
 )
-from src.main.api.data import CommitAlert, Commit, FileChange, DiffType, DiffDescription, CloneFindingChurn, ChangeType, CloneFinding
-from src.main.persistence import AlertFile, read_alert_file, write_to_file
+from src.main.api.data import CommitAlert, Commit, FileChange, DiffType, DiffDescription, ChangeType, CloneFinding, \
+    CloneFindingChurn
+from src.main.persistence import AlertFile, AlertLog, read_alert_file, write_to_file
 from src.main.pretty_print import MyPrinter, LogLevel, SEPARATOR
-from src.main.utils.time_utils import timestamp_to_str, display_time
+from src.main.progress import ProgressReporter
+from src.main.utils.profiling import phase_timers, AFFECTED_FILES, COMMIT_LISTING, DIFF, LINE_CORRECTION, CHURN_FETCH, CHURN_FILTER
+from src.main.utils.time_utils import timestamp_to_str, display_time, TimeBudget
 
-printer: MyPrinter = MyPrinter(LogLevel.DEBUG)
+printer: MyPrinter = MyPrinter(LogLevel.DEBUG, __name__)
 
+# the clone finding churn of a commit is the same for every broken clone. Share the index between them.
+clone_finding_index_cache: CloneFindingIndexCache = CloneFindingIndexCache()
 
-def update_filtered_alert_commits(client: TeamscaleClient, overwrite=False) -> AlertFile:
-    """This function updates the alert commit of the project in the corresponding file.
-    It reads the current alert file and compares appends new relevant commits from the server."""
+
+def discover_alert_commits(client: TeamscaleClient, overwrite=False) -> dict:
+    """Appends the alert commits since the last discovery to the alert log of the project. Only the header of the log is
+    read. Returns the updated header."""
     printer.yellow("Updating filtered alert commits... Overwrite = " + str(overwrite), level=LogLevel.INFO)
 
-    file_name, alert_file = read_alert_file(client, overwrite)
+    alert_log, alert_file = read_alert_file(client, overwrite)
     alert_file: AlertFile
 
     # start analysis
@@ -34,10 +41,17 @@ def update_filtered_alert_commits(client: TeamscaleClient, overwrite=False) -> A
         step = analysis_start + analysis_step
         if step > alert_file.most_recent_commit:
             step = alert_file.most_recent_commit
-        alert_file.alert_commit_list.extend(get_repository_commits(client, analysis_start, step, filter_alerts=True))
         alert_file.analysed_until = step
-        write_to_file(file_name, alert_file)
+        alert_log.append(alert_file, get_repository_commits(client, analysis_start, step, filter_alerts=True))
         analysis_start = step + 1
+    return alert_log.read_header()
+
+
+def update_filtered_alert_commits(client: TeamscaleClient, overwrite=False) -> AlertFile:
+    """This function updates the alert commit of the project in the corresponding file.
+    It appends new relevant commits from the server and returns the alert file with all alert commits."""
+    discover_alert_commits(client, overwrite)
+    alert_file: AlertFile = AlertLog(get_alert_log_file_name(client.project), get_alert_log_header_file_name(client.project)).read()
 
     d = dict()
     x = list((alert.timestamp for alert in alert_file.alert_commit_list))
@@ -48,10 +62,17 @@ def update_filtered_alert_commits(client: TeamscaleClient, overwrite=False) -> A
     return alert_file
 
 
-def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: int) -> [AnalysisResult]:
+def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: int, time_budget: TimeBudget = None,
+                             resumed_results: [AnalysisResult] = None, progress: ProgressReporter = None) -> [AnalysisResult]:
     """Analyzes one given alert commit. This function scans all commits after the given timestamp for relevant changes
-    in the code base."""
+    in the code base.
+    If a time budget is given and runs out, a TimeBudgetExhaustedError with the results so far is raised. The unfinished
+    result knows how far it got by analysed_until. Passing the results of the error as resumed_results continues there."""
     printer.yellow("Analysing one alert commit...", level=LogLevel.INFO)
+    if resumed_results is None:
+        resumed_results = []
+    if time_budget is not None and time_budget.is_exhausted():
+        raise TimeBudgetExhaustedError(resumed_results)
 
     alerts: dict[Commit, [CommitAlert]] = get_commit_alerts(client, alert_commit_timestamp)
 
@@ -65,46 +86,63 @@ def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: in
 
     results: [AnalysisResult] = []
 
-    for commit_alert in alert_list:  # sometimes more than one alert is attached to a commit
+    for alert_idx, commit_alert in enumerate(alert_list):  # sometimes more than one alert is attached to a commit
         commit_alert: CommitAlert
 
-        analysis_result: AnalysisResult = AnalysisResult.from_alert(
-            client.project, *repository_summary, repository_summary[0] - 1, commit_alert=commit_alert
-        )
+        if alert_idx < len(resumed_results) and resumed_results[alert_idx].finished:
+            results.append(resumed_results[alert_idx])
+            continue
+        if time_budget is not None and time_budget.is_exhausted():
+            raise TimeBudgetExhaustedError(results)
+
+        if alert_idx < len(resumed_results):
+            analysis_result: AnalysisResult = resumed_results[alert_idx]
+            analysis_result.most_recent_commit = repository_summary[1]
+            printer.blue(lambda: "Resuming analysis from " + timestamp_to_str(analysis_result.analysed_until), level=LogLevel.INFO)
+        else:
+            analysis_result: AnalysisResult = AnalysisResult.from_alert(
+                client.project, *repository_summary, repository_summary[0] - 1, commit_alert=commit_alert
+            )
+        analysis_result.finished = False
         # region logging
         printer.separator(level=LogLevel.VERBOSE)
-        printer.blue("Timestamp : " + timestamp_to_str(alert_commit_timestamp), level=LogLevel.INFO)
-        printer.yellow("Analysing " + str(commit_alert), level=LogLevel.VERBOSE)
-        printer.white("Link to Broken Clone: " + commit_alert.get_broken_clone_link(client, alert_commit_timestamp), level=LogLevel.VERBOSE)
-        printer.white("Link to Old Clone: " + commit_alert.get_old_clone_link(client, alert_commit_timestamp), level=LogLevel.VERBOSE)
+        printer.blue(lambda: "Timestamp : " + timestamp_to_str(alert_commit_timestamp), level=LogLevel.INFO)
+        printer.yellow(lambda: "Analysing " + str(commit_alert), level=LogLevel.VERBOSE)
+        printer.white(lambda: "Link to Broken Clone: " + commit_alert.get_broken_clone_link(client, alert_commit_timestamp),
+                      level=LogLevel.VERBOSE)
+        printer.white(lambda: "Link to Old Clone: " + commit_alert.get_old_clone_link(client, alert_commit_timestamp), level=LogLevel.VERBOSE)
         printer.separator(LogLevel.VERBOSE)
         # endregion
         # start analysis
-        analysis_start: int = alert_commit_timestamp + 1
-        analysis_step: int = 7890000_000  # milliseconds. 3 months # 15555555_000 ~ 6 months
+        analysis_step: int = ALERT_ANALYSIS_STEP
 
         # get repository data in chunks - this was to be able to write temporary results to a file
         # this is maybe unnecessary yet
-        expected_file = commit_alert.context.expected_clone_location.uniform_path
-        expected_sibling = commit_alert.context.expected_sibling_location.uniform_path
-        previous_commit_timestamp = alert_commit_timestamp
-
-        while analysis_start < repository_summary[1]:
-            step = analysis_start + analysis_step
-            if step > repository_summary[1]:
-                step = repository_summary[1]
+        expected_file = analysis_result.instance_metrics.uniform_path
+        expected_sibling = analysis_result.sibling_instance_metrics.uniform_path
+        # continue after the last analysed commit if the result is resumed
+        previous_commit_timestamp = max(alert_commit_timestamp, analysis_result.analysed_until)
+
+        for analysis_start, step in get_analysis_windows(previous_commit_timestamp, repository_summary[1], analysis_step):
             if analysis_result.sibling_instance_metrics.deleted and analysis_result.instance_metrics.deleted:
                 printer.green("Both relevant sections are deleted. Skipping rest of analysis.", level=LogLevel.VERBOSE)
                 analysis_result.analysed_until = repository_summary[1]
                 break
 
-            if (not (get_delta_affected_files(client, analysis_start, step, expected_file) is None
-                     and get_delta_affected_files(client, analysis_start, step, expected_sibling) is None)):
+            with phase_timers.phase(AFFECTED_FILES):
+                touched = not (get_delta_affected_files(client, analysis_start, step, expected_file) is None
+                               and get_delta_affected_files(client, analysis_start, step, expected_sibling) is None)
+            if touched:
                 # if no changes are in this interval
-                new_commits = get_repository_commits(client, analysis_start, step)
+                with phase_timers.phase(COMMIT_LISTING):
+                    new_commits = get_repository_commits(client, analysis_start, step)
                 for commit in new_commits:
+                    if time_budget is not None and time_budget.is_exhausted():
+                        analysis_result.analysed_until = max(analysis_result.analysed_until, previous_commit_timestamp)
+                        raise TimeBudgetExhaustedError(results + [analysis_result])
                     # goal: retrieve affectedness of the relevant text passages for each commit
-                    affected_files: [FileChange] = get_affected_files(client, commit.timestamp)
+                    with phase_timers.phase(AFFECTED_FILES):
+                        affected_files: [FileChange] = get_affected_files(client, commit.timestamp)
                     project_meta = (client, commit.timestamp, previous_commit_timestamp, affected_files)
 
                     # region check file
@@ -113,6 +151,7 @@ def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: in
                         try:
                             instance_affectedness, expected_file = check_file(expected_file, *project_meta,
                                                                               analysis_result.instance_metrics)
+                            analysis_result.instance_metrics.uniform_path = expected_file
                         except (TextSectionDeletedError, FileDeletedError) as e:
                             analysis_result.instance_metrics.deleted = True
                             analysis_result.instance_metrics.time_alive = commit.timestamp - alert_commit_timestamp
@@ -127,6 +166,7 @@ def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: in
                             sibling_instance_affectedness, expected_sibling = check_file(
                                 expected_sibling, *project_meta, analysis_result.sibling_instance_metrics
                             )
+                            analysis_result.sibling_instance_metrics.uniform_path = expected_sibling
                         except (TextSectionDeletedError, FileDeletedError) as e:
                             analysis_result.sibling_instance_metrics.deleted = True
                             analysis_result.sibling_instance_metrics.time_alive = commit.timestamp - alert_commit_timestamp
@@ -141,14 +181,14 @@ def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: in
                     interpret_affectedness(analysis_result, instance_affectedness, sibling_instance_affectedness)
 
                     previous_commit_timestamp = commit.timestamp
+                    if progress is not None:
+                        progress.commit_processed(alert_commit_timestamp)
                 # end for
             # end if
             else:
                 printer.green("S K I P  :  " + display_time(analysis_step) + " : No File affected in this Interval.")
-            analysis_start = step + 1
             analysis_result.analysed_until = step
-            pass
-        # end while
+        # end for
         # region calc time alive
         time_until_today = analysis_result.most_recent_commit - alert_commit_timestamp
         if not analysis_result.instance_metrics.deleted:
@@ -156,11 +196,27 @@ def analyse_one_alert_commit(client: TeamscaleClient, alert_commit_timestamp: in
         if not analysis_result.sibling_instance_metrics.deleted:
             analysis_result.sibling_instance_metrics.time_alive = time_until_today
         # endregion
-        printer.white(SEPARATOR + "\n" + str(analysis_result), LogLevel.RELEVANT)
+        analysis_result.finished = True
+        printer.white(lambda: SEPARATOR + "\n" + str(analysis_result), LogLevel.RELEVANT)
         results.append(analysis_result)
     return results
 
 
+def get_analysis_windows(analysed_until: int, most_recent_commit: int, analysis_step: int = ALERT_ANALYSIS_STEP
+                         ) -> [tuple[int, int]]:
+    """returns the [start, end] windows in which the history after the given timestamp (usually the alert commit) is
+    inspected."""
+    windows: [tuple[int, int]] = []
+    analysis_start: int = analysed_until + 1
+    while analysis_start < most_recent_commit:
+        step = analysis_start + analysis_step
+        if step > most_recent_commit:
+            step = most_recent_commit
+        windows.append((analysis_start, step))
+        analysis_start = step + 1
+    return windows
+
+
 def check_file(file_path: str, client: TeamscaleClient, commit_timestamp: int, previous_commit_timestamp: int, affected_files: [FileChange]
                , instance_metrics: InstanceMetrics) -> (Affectedness, str):
     """Check for given file whether it is affected at a specific commit timestamp. If it is modified the diff will be analysed and looked up
@@ -176,7 +232,7 @@ def check_file(file_path: str, client: TeamscaleClient, commit_timestamp: int, p
 
         file_name = change.uniform_path.split('/')[-1]
         printer.white(
-            "{0:51}".format(file_name + " affected at commit:") + timestamp_to_str(commit_timestamp), level=LogLevel.VERBOSE
+            lambda: "{0:51}".format(file_name + " affected at commit:") + timestamp_to_str(commit_timestamp), level=LogLevel.VERBOSE
         )
 
         origin_path = file_path
@@ -190,24 +246,25 @@ def check_file(file_path: str, client: TeamscaleClient, commit_timestamp: int, p
         old_start_line = instance_metrics.corrected_start_line
         old_end_line = instance_metrics.corrected_end_line
 
-        diff_dict, link = get_diff(client, origin_path, previous_commit_timestamp, file_path, commit_timestamp)
+        with phase_timers.phase(DIFF):
+            diff_dict, link = get_diff(client, origin_path, previous_commit_timestamp, file_path, commit_timestamp)
         diff_dict: dict[DiffType, DiffDescription]
         link: str
 
-        try:
-            instance_metrics.corrected_start_line, instance_metrics.corrected_end_line = correct_lines(
-                instance_metrics.corrected_start_line, instance_metrics.corrected_end_line, diff_dict.get(DiffType.LINE_BASED)
-            )
-        except Exception as e:
-            traceback.print_exc()
-            raise type(e)("link: " + link)
-
-        if are_left_lines_affected_at_diff(
-                old_start_line, old_end_line, diff_dict.get(DiffType.TOKEN_BASED)
-        ):
+        with phase_timers.phase(LINE_CORRECTION):
+            try:
+                instance_metrics.corrected_start_line, instance_metrics.corrected_end_line = correct_lines(
+                    instance_metrics.corrected_start_line, instance_metrics.corrected_end_line, diff_dict.get(DiffType.LINE_BASED)
+                )
+            except Exception as e:
+                traceback.print_exc()
+                raise type(e)("link: " + link)
+
+            instance_affected = are_left_lines_affected_at_diff(old_start_line, old_end_line, diff_dict.get(DiffType.TOKEN_BASED))
+        if instance_affected:
             instance_metrics.instance_affected_count += 1
             printer.red(
-                file_name + " affected in relevant interval."
+                lambda: file_name + " affected in relevant interval."
                 + " interval [" + str(instance_metrics.corrected_start_line) + "-" + str(instance_metrics.corrected_end_line) + ")"
                 , LogLevel.INFO
             )
@@ -216,7 +273,7 @@ def check_file(file_path: str, client: TeamscaleClient, commit_timestamp: int, p
         else:
             instance_metrics.file_affected_count += 1
             printer.white(
-                file_name + " is not affected in the relevant interval."
+                lambda: file_name + " is not affected in the relevant interval."
                 + " interval [" + str(instance_metrics.corrected_start_line) + "-" + str(instance_metrics.corrected_end_line) + ")"
                 , LogLevel.DEBUG)
             printer.blue(link, LogLevel.DEBUG)
@@ -249,16 +306,31 @@ def inspect_clone_finding_churn(analysis_result, client, commit, expected_file,
         # if at least one instance is already deleted, a new clone can not exist
         return
 
-    clone_finding_churn: CloneFindingChurn = get_clone_finding_churn(client, commit.timestamp)
-    clone_finding_churn = filter_clone_finding_churn_by_file([expected_file, expected_sibling], clone_finding_churn)
-    relevant: [CloneFinding] = filter_relevant_clone_findings(clone_finding_churn, expected_file, expected_sibling, analysis_result)
+    clone_finding_index: CloneFindingIndex = get_clone_finding_index(client, commit.timestamp)
+    with phase_timers.phase(CHURN_FILTER):
+        relevant: [CloneFinding] = clone_finding_index.query(
+            expected_file, analysis_result.instance_metrics.get_interval(),
+            expected_sibling, analysis_result.sibling_instance_metrics.get_interval()
+        )
     if relevant:
         printer.red('Found possibly relevant clone findings: ', LogLevel.RELEVANT)
         printer.yellow(
-            ',\n'.join(
+            lambda: ',\n'.join(
                 str(finding) + "\n" + finding.get_finding_link(client=client, commit_timestamp=commit.timestamp)
                 for finding in relevant
             )
             , level=LogLevel.INFO
         )
         analysis_result.clone_findings_count += len(relevant)
+
+
+def get_clone_finding_index(client: TeamscaleClient, commit_timestamp: int) -> CloneFindingIndex:
+    """returns the clone finding index of the churn at the given commit. The index is fetched once and shared between all
+    broken clones checked against this commit."""
+    def load() -> CloneFindingChurn:
+        with phase_timers.phase(CHURN_FETCH):
+            return get_clone_finding_churn(client, commit_timestamp)
+
+    with phase_timers.phase(CHURN_FILTER):
+        # building the index is part of the filtering. The nested fetch only counts as fetch
+        return clone_finding_index_cache.get((client.project, client.branch, commit_timestamp), load)
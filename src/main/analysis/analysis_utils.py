@@ -1,12 +1,16 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from dataclasses import dataclass
 from enum import Enum
 
 import portion
 from portion import Interval
 
-from defintions import NEW_CLONE_SIMILARITY_THRESHOLD
+from defintions import NEW_CLONE_SIMILARITY_THRESHOLD, CLONE_FINDING_INDEX_CACHE_SIZE
+from src.main.analysis.result_metrics import ResultCategory, get_category
 from src.main.api.data import FileChange, DiffDescription, CloneFindingChurn, CloneFinding, CommitAlert, \
-    CommitAlertContext
+    CommitAlertContext, TextRegionLocation
 from src.main.pretty_print import SEPARATOR
 from src.main.utils.interval_utils import get_interval_length, overlaps_more_than_threshold
 from src.main.utils.time_utils import display_time, timestamp_to_str
@@ -20,6 +24,15 @@ class TextSectionDeletedError(Exception):
     pass
 
 
+class TimeBudgetExhaustedError(Exception):
+    """Raised when the time budget runs out during an analysis. Carries the results analysed so far. The last one may be
+    unfinished."""
+
+    def __init__(self, results: list):
+        super().__init__("The time budget is exhausted.")
+        self.results = results
+
+
 class Affectedness(Enum):
     NOT_AFFECTED = 1
     FILE_AFFECTED = 2
@@ -39,11 +52,16 @@ class InstanceMetrics:
     file_affected_count: int = 0
     instance_affected_count: int = 0
     deleted: bool = False
+    # the current path of the tracked file. It changes when the file is moved
+    uniform_path: str = None
     time_alive = -1
 
     def get_corrected_interval(self) -> str:
         return "[" + str(self.corrected_start_line) + "," + str(self.corrected_end_line) + ")"
 
+    def get_interval(self) -> Interval:
+        return portion.closedopen(self.corrected_start_line, self.corrected_end_line)
+
 
 @dataclass
 class AnalysisResult:
@@ -63,6 +81,8 @@ class AnalysisResult:
     one_instance_affected_count: int = 0
     both_instances_affected_count: int = 0
     clone_findings_count: int = 0
+    # False if the analysis stopped early. analysed_until then tells how far it got
+    finished: bool = True
 
     def __str__(self):
         return ("Analysis Result for " + self.project + ": first commit: " + timestamp_to_str(self.first_commit) + ", most recent commit: "
@@ -95,9 +115,16 @@ class AnalysisResult:
         ctx: CommitAlertContext = commit_alert.context
         return AnalysisResult(project, first_commit, most_recent_commit, analysed_until, commit_alert,
                               InstanceMetrics(ctx.expected_clone_location.raw_start_line,
-                                              ctx.expected_clone_location.raw_end_line),
+                                              ctx.expected_clone_location.raw_end_line,
+                                              uniform_path=ctx.expected_clone_location.uniform_path),
                               InstanceMetrics(ctx.expected_sibling_location.raw_start_line,
-                                              ctx.expected_sibling_location.raw_end_line))
+                                              ctx.expected_sibling_location.raw_end_line,
+                                              uniform_path=ctx.expected_sibling_location.uniform_path))
+
+
+def categorize_result(result: AnalysisResult) -> ResultCategory:
+    return get_category(result.instance_metrics.deleted, result.sibling_instance_metrics.deleted, result.clone_findings_count,
+                        result.one_instance_affected_count, result.both_instances_affected_count)
 
 
 def is_file_affected_at_file_changes(file_uniform_path: str, affected_files: [FileChange]) -> bool:
@@ -124,17 +151,15 @@ def filter_clone_finding_churn_by_file(file_uniform_paths: [str], clone_finding_
     list are affected"""
 
     def file_filter(x: CloneFinding) -> bool:
-        for file_path in file_uniform_paths:
-            # if one file not affected return False
-            if not (x.location.uniform_path == file_path or file_path in [e.uniform_path for e in x.sibling_locations]):
-                return False
-        return True
-
-    clone_finding_churn.added_findings = list(filter(lambda x: file_filter(x), clone_finding_churn.added_findings))
-    clone_finding_churn.findings_added_in_branch = list(filter(lambda x: file_filter(x), clone_finding_churn.findings_added_in_branch))
-    clone_finding_churn.findings_in_changed_code = list(filter(lambda x: file_filter(x), clone_finding_churn.findings_in_changed_code))
-    clone_finding_churn.removed_findings = list(filter(lambda x: file_filter(x), clone_finding_churn.removed_findings))
-    clone_finding_churn.findings_removed_in_branch = list(filter(lambda x: file_filter(x), clone_finding_churn.findings_removed_in_branch))
+        affected_paths = {x.location.uniform_path, *(e.uniform_path for e in x.sibling_locations)}
+        # if one file not affected return False
+        return all(file_path in affected_paths for file_path in file_uniform_paths)
+
+    clone_finding_churn.added_findings = list(filter(file_filter, clone_finding_churn.added_findings))
+    clone_finding_churn.findings_added_in_branch = list(filter(file_filter, clone_finding_churn.findings_added_in_branch))
+    clone_finding_churn.findings_in_changed_code = list(filter(file_filter, clone_finding_churn.findings_in_changed_code))
+    clone_finding_churn.removed_findings = list(filter(file_filter, clone_finding_churn.removed_findings))
+    clone_finding_churn.findings_removed_in_branch = list(filter(file_filter, clone_finding_churn.findings_removed_in_branch))
     return clone_finding_churn
 
 
@@ -142,30 +167,103 @@ def filter_relevant_clone_findings(
         clone_finding_churn: CloneFindingChurn, expected_file: str, expected_sibling: str, analysis_result: AnalysisResult
 ) -> [CloneFinding]:
     """Filter for clone findings which are actually newly introduced"""
-    instance_start = analysis_result.instance_metrics.corrected_start_line
-    instance_end = analysis_result.instance_metrics.corrected_end_line
-    instance_interval = portion.closedopen(instance_start, instance_end)
-    sibling_start = analysis_result.sibling_instance_metrics.corrected_start_line
-    sibling_end = analysis_result.sibling_instance_metrics.corrected_end_line
-    sibling_interval = portion.closedopen(sibling_start, sibling_end)
-
-    relevant = []
-    for clone_finding in (
-            clone_finding_churn.added_findings + clone_finding_churn.findings_added_in_branch + clone_finding_churn.findings_in_changed_code
-    ):
-        clone_finding: CloneFinding
-        locations = [clone_finding.location, *clone_finding.sibling_locations]
-        b = [False, False]
-        for loc in locations:
-            # check whether the clone matches the two files with the corresponding intervals more than threshold
-            if loc.is_overlapping_more_than_threshold(expected_file, instance_interval, NEW_CLONE_SIMILARITY_THRESHOLD):
-                b[0] = True
-            if loc.is_overlapping_more_than_threshold(expected_sibling, sibling_interval, NEW_CLONE_SIMILARITY_THRESHOLD):
-                b[1] = True
-
-        if b == [True, True] and clone_finding.death_commit is None:
-            relevant.append(clone_finding)
-    return relevant
+    return CloneFindingIndex(clone_finding_churn).query(
+        expected_file, analysis_result.instance_metrics.get_interval(),
+        expected_sibling, analysis_result.sibling_instance_metrics.get_interval()
+    )
+
+
+class CloneFindingIndex:
+    """Spatial index over the newly introduced clone findings of one clone finding churn.
+
+    For every uniform path the locations of all findings are kept sorted by their start line together with the longest
+    location length. A query only has to look at the locations starting in [lower - max_length, upper) of the given
+    interval. Findings are deduplicated by their id. The index only depends on the churn, so it can be shared between
+    all broken clones checked against the same commit."""
+
+    def __init__(self, clone_finding_churn: CloneFindingChurn):
+        self.commit = clone_finding_churn.commit
+        self.findings: [CloneFinding] = []
+        # uniform path -> sorted list of (start line, end line, finding index)
+        self.locations: dict[str, list[tuple[int, int, int]]] = {}
+        self.max_location_length: dict[str, int] = {}
+
+        finding_ids: set[str] = set()
+        for clone_finding in (
+                clone_finding_churn.added_findings + clone_finding_churn.findings_added_in_branch
+                + clone_finding_churn.findings_in_changed_code
+        ):
+            clone_finding: CloneFinding
+            if clone_finding.death_commit is not None or clone_finding.finding_id in finding_ids:
+                continue
+            finding_ids.add(clone_finding.finding_id)
+            finding_idx = len(self.findings)
+            self.findings.append(clone_finding)
+            for loc in [clone_finding.location, *clone_finding.sibling_locations]:
+                loc: TextRegionLocation
+                self.locations.setdefault(loc.uniform_path, []).append((loc.raw_start_line, loc.raw_end_line, finding_idx))
+                self.max_location_length[loc.uniform_path] = max(
+                    self.max_location_length.get(loc.uniform_path, 0), loc.raw_end_line - loc.raw_start_line
+                )
+        for path_locations in self.locations.values():
+            path_locations.sort()
+
+    def __len__(self):
+        return len(self.findings)
+
+    def find_overlapping(self, uniform_path: str, interval: Interval, threshold: float = NEW_CLONE_SIMILARITY_THRESHOLD) -> set[int]:
+        """returns the indices of all findings with a location in the given file overlapping the interval more than threshold."""
+        locations = self.locations.get(uniform_path)
+        if not locations or interval.empty:
+            return set()
+        # a location can only intersect the interval if it starts in [lower - max_length, upper)
+        first = bisect_left(locations, (interval.lower - self.max_location_length[uniform_path],))
+        last = bisect_left(locations, (interval.upper,), lo=first)
+
+        return {
+            finding_idx for start_line, end_line, finding_idx in locations[first:last]
+            if overlaps_more_than_threshold(portion.closedopen(start_line, end_line), interval, threshold)
+        }
+
+    def query(self, file_path: str, file_interval: Interval, other_file_path: str, other_interval: Interval,
+              threshold: float = NEW_CLONE_SIMILARITY_THRESHOLD) -> [CloneFinding]:
+        """returns the findings whose locations overlap both given file intervals more than threshold."""
+        matching = self.find_overlapping(file_path, file_interval, threshold)
+        if matching:
+            matching &= self.find_overlapping(other_file_path, other_interval, threshold)
+        return [self.findings[finding_idx] for finding_idx in sorted(matching)]
+
+
+class CloneFindingIndexCache:
+    """Thread safe LRU cache of clone finding indices keyed by project, branch and commit timestamp."""
+
+    def __init__(self, capacity: int = CLONE_FINDING_INDEX_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, CloneFindingIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, loader) -> CloneFindingIndex:
+        """returns the cached index for the key. On a miss the churn is loaded with the given loader and indexed."""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        clone_finding_index = CloneFindingIndex(loader())
+        with self._lock:
+            self._entries[key] = clone_finding_index
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return clone_finding_index
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
 
 
 def is_file_affected_at_clone_finding_churn(file_uniform_path: str, clone_finding_churn: CloneFindingChurn) -> bool:
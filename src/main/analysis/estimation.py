@@ -0,0 +1,134 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+from teamscale_client import TeamscaleClient
+
+from defintions import get_estimate_file_name
+from src.main.analysis.analysis import update_filtered_alert_commits, get_analysis_windows
+from src.main.api.api import get_commit_alerts, get_delta_affected_files, get_repository_commits, get_repository_summary
+from src.main.api.api_utils import api_statistics
+from src.main.api.data import Commit, CommitAlert
+from src.main.persistence import AlertFile, write_to_file
+from src.main import serialization
+from src.main.pretty_print import MyPrinter, LogLevel
+from src.main.utils.time_utils import timestamp_to_str, display_time
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+
+@dataclass
+class AlertCostEstimate:
+    """The predicted amount of requests the analysis of one alert commit needs.
+
+    Windows are the 3 month chunks of history after the alert commit. Only windows in which one of the tracked files
+    changes are inspected commit by commit. Moves of the tracked files are not followed, so the numbers are estimates."""
+
+    alert_commit_timestamp: int
+    commit_alert_count: int = 0
+    # windows of all commit alerts of this commit
+    window_count: int = 0
+    touched_window_count: int = 0
+    # commits inspected in touched windows. Each one needs an affected files request
+    commit_count: int = 0
+    # at least one diff per touched file and window
+    diff_count: int = 0
+    # the clone finding churn is fetched once per commit and shared between the commit alerts
+    churn_count: int = 0
+
+    def get_probe_count(self) -> int:
+        """delta/affected-files requests: the analysis probes both files in every window"""
+        return 2 * self.window_count
+
+    def get_request_count(self) -> int:
+        """commit alerts and repository summary + probes + commit logs of touched windows + affected files + diffs + churns"""
+        return 2 + self.get_probe_count() + self.touched_window_count + self.commit_count + self.diff_count + self.churn_count
+
+    def get_expected_seconds(self, latency: float) -> float:
+        return self.get_request_count() * latency
+
+
+serialization.register_dataclass(AlertCostEstimate)
+
+
+def count_commits_in_window(commit_timestamps: [int], start: int, end: int) -> int:
+    """returns the number of commits in [start, end]. The timestamps have to be sorted."""
+    return bisect_right(commit_timestamps, end) - bisect_left(commit_timestamps, start)
+
+
+def get_commit_alert_list(client: TeamscaleClient, alert_commit_timestamp: int) -> [CommitAlert]:
+    alerts: dict[Commit, [CommitAlert]] = get_commit_alerts(client, alert_commit_timestamp)
+    for commit, alert_list in alerts.items():
+        if commit.timestamp == alert_commit_timestamp:
+            return alert_list
+    return []
+
+
+def estimate_alert_commit_cost(client: TeamscaleClient, alert_commit_timestamp: int, commit_timestamps: [int],
+                               most_recent_commit: int) -> AlertCostEstimate:
+    """Estimates the requests needed to analyse the given alert commit. Only the commit alerts and the cheap
+    delta/affected-files probes are requested, the commit counts are taken from the sorted commit timestamps."""
+    estimate = AlertCostEstimate(alert_commit_timestamp)
+    windows: [tuple[int, int]] = get_analysis_windows(alert_commit_timestamp, most_recent_commit)
+    churn_windows: set[tuple[int, int]] = set()
+
+    for commit_alert in get_commit_alert_list(client, alert_commit_timestamp):
+        commit_alert: CommitAlert
+        estimate.commit_alert_count += 1
+        tracked_files = (commit_alert.context.expected_clone_location.uniform_path,
+                         commit_alert.context.expected_sibling_location.uniform_path)
+        for start, end in windows:
+            estimate.window_count += 1
+            touched_files = [f for f in tracked_files if get_delta_affected_files(client, start, end, f) is not None]
+            if touched_files:
+                commit_count = count_commits_in_window(commit_timestamps, start, end)
+                estimate.touched_window_count += 1
+                estimate.commit_count += commit_count
+                estimate.diff_count += len(touched_files)
+                churn_windows.add((start, end))
+
+    estimate.churn_count = sum(count_commits_in_window(commit_timestamps, start, end) for start, end in churn_windows)
+    return estimate
+
+
+def run_estimation(client: TeamscaleClient, top: int = 10) -> [AlertCostEstimate]:
+    """Predicts the cost of a full analysis without running it. Prints the total and the most expensive alert commits and
+    saves all estimates to the project directory."""
+    alert_file: AlertFile = update_filtered_alert_commits(client, overwrite=False)
+    first_commit, most_recent_commit = get_repository_summary(client)
+    commit_timestamps: [int] = sorted(c.timestamp for c in get_repository_commits(client, first_commit, most_recent_commit))
+
+    printer.separator(LogLevel.INFO)
+    printer.blue("Estimating cost of " + str(len(alert_file.alert_commit_list)) + " alert commits", LogLevel.INFO)
+    api_statistics.reset()
+    estimates: [AlertCostEstimate] = []
+    for alert_commit in alert_file.alert_commit_list:
+        alert_commit: Commit
+        estimates.append(estimate_alert_commit_cost(client, alert_commit.timestamp, commit_timestamps, most_recent_commit))
+    latency: float = api_statistics.get_mean_latency()
+
+    print_estimation(estimates, latency, top)
+    write_to_file(get_estimate_file_name(client.project), {"latency": latency, "estimates": estimates})
+    return estimates
+
+
+def print_estimation(estimates: [AlertCostEstimate], latency: float, top: int = 10):
+    request_count = sum(e.get_request_count() for e in estimates)
+    printer.separator(LogLevel.RELEVANT)
+    printer.blue(
+        "Alert commit count:\t\t" + str(len(estimates))
+        + "\nCommit count:\t\t\t" + str(sum(e.commit_count for e in estimates))
+        + "\nDiff count:\t\t\t" + str(sum(e.diff_count for e in estimates))
+        + "\nChurn count:\t\t\t" + str(sum(e.churn_count for e in estimates))
+        + "\nRequest count:\t\t\t" + str(request_count)
+        + "\nMeasured latency:\t\t" + str(round(latency * 1000)) + " ms"
+        + "\nExpected wall time:\t\t" + display_time(int(request_count * latency * 1000))
+        , LogLevel.RELEVANT
+    )
+    printer.separator(LogLevel.RELEVANT)
+    printer.yellow("Most expensive alert commits:", LogLevel.RELEVANT)
+    for estimate in sorted(estimates, key=lambda e: e.get_request_count(), reverse=True)[:top]:
+        printer.white(
+            timestamp_to_str(estimate.alert_commit_timestamp) + " : " + str(estimate.get_request_count()) + " requests, "
+            + str(estimate.commit_count) + " commits ~ " + display_time(int(estimate.get_expected_seconds(latency) * 1000))
+            , LogLevel.RELEVANT
+        )
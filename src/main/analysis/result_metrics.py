@@ -0,0 +1,56 @@
+"""Categories and metrics of analysis results. Only the standard library is imported, so commands that summarize stored
+results start without the analysis and plotting dependencies."""
+from enum import Enum
+
+LIFETIME_QUANTILES = (0.25, 0.5, 0.75, 0.9)
+
+# label -> columns of the distribution. Instance and sibling columns are pooled
+DISTRIBUTIONS = {
+    'Sum Instance Affected': ("instance_affected_count", "sibling_affected_count"),
+    'One Instance Affected': ("one_instance_affected_count",),
+    'Both Instances Affected': ("both_instances_affected_count",),
+    'Sum File Affected': ("instance_file_affected_count", "sibling_file_affected_count"),
+    'One File Affected': ("one_file_affected_count",),
+    'Both Files Affected': ("both_files_affected_count",),
+    'New Clone Findings': ("clone_findings_count",),
+}
+FILE_DISTRIBUTIONS = ('Sum File Affected', 'One File Affected', 'Both Files Affected')
+
+
+class ResultCategory(Enum):
+    """Interpretation of an analysis result. The categories are checked in the order of their importance:
+    0. Deletion of both passages        -> Both relevant text passages were deleted in further development
+    1. Deletion of relevant passage     -> A relevant text passage was deleted in further development
+    2. New clone finding                -> The broken clone seems to appear as normal clone afterwards
+    3. one instance affected            -> The broken clone was modified at one point in time only at one text passage
+                                            => possibly even more inconsistency introduced
+    4. Both instances affected          -> The relevant text passages are at least modified once together
+                                            => possibly consistent maintenance
+    5. Not modified at all              -> after the introduction of the broken clone the relevant text passages were not
+                                            modified at all"""
+    BOTH_INSTANCES_DELETED = 'Both Instances Deleted'
+    ONE_INSTANCE_DELETED = 'One Instance Deleted'
+    NEW_CLONE = 'New Clone'
+    ONE_INSTANCE_AFFECTED = 'One Instance Affected'
+    BOTH_INSTANCES_AFFECTED = 'Both Instances Affected'
+    NOT_MODIFIED = 'Not Modified at All'
+
+
+# ResultCategory <-> int8 code of the category column
+CATEGORIES: [ResultCategory] = list(ResultCategory)
+
+
+def get_category(instance_deleted: bool, sibling_deleted: bool, clone_findings_count: int, one_instance_affected_count: int,
+                 both_instances_affected_count: int) -> ResultCategory:
+    if instance_deleted and sibling_deleted:
+        return ResultCategory.BOTH_INSTANCES_DELETED
+    elif instance_deleted or sibling_deleted:
+        return ResultCategory.ONE_INSTANCE_DELETED
+    elif clone_findings_count != 0:
+        return ResultCategory.NEW_CLONE
+    elif one_instance_affected_count != 0:
+        return ResultCategory.ONE_INSTANCE_AFFECTED
+    elif both_instances_affected_count != 0:
+        return ResultCategory.BOTH_INSTANCES_AFFECTED
+    else:
+        return ResultCategory.NOT_MODIFIED
@@ -0,0 +1,221 @@
+import math
+import random
+import traceback
+from dataclasses import dataclass
+from statistics import NormalDist
+
+from teamscale_client import TeamscaleClient
+
+from defintions import get_sample_file_name
+from src.main.analysis.analysis import update_filtered_alert_commits, analyse_one_alert_commit
+from src.main.analysis.analysis_utils import AnalysisResult, ResultCategory, categorize_result
+from src.main.api.data import Commit
+from src.main.persistence import AlertFile, write_to_file
+from src.main import serialization
+from src.main.pretty_print import MyPrinter, LogLevel
+from src.main.utils.time_utils import display_time
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+# alert commits analysed per stratum (or all of a smaller stratum) before the sample may stop growing
+MIN_STRATUM_SAMPLE = 2
+
+
+@dataclass
+class SampleEstimate:
+    """A value estimated from a sample with its confidence interval"""
+    name: str
+    value: float
+    lower: float
+    upper: float
+
+    def get_half_width(self) -> float:
+        return (self.upper - self.lower) / 2
+
+
+serialization.register_dataclass(SampleEstimate)
+
+
+class StratifiedSampler:
+    """Draws reproducible samples of alert commits stratified by time.
+
+    The alert commits are sorted by timestamp and split into strata of (almost) equal size. Every stratum is shuffled
+    once with the seed. A sample takes the first alert commits of every stratum in proportion to its size, so a larger
+    sample always contains the smaller ones and can be grown progressively."""
+
+    def __init__(self, alert_commit_list: [Commit], strata_count: int = 10, seed: int = 0):
+        alert_commits = sorted(alert_commit_list, key=lambda c: c.timestamp)
+        strata_count = max(1, min(strata_count, len(alert_commits)))
+        rng = random.Random(seed)
+        self.strata: [[Commit]] = []
+        for i in range(strata_count):
+            stratum = alert_commits[i * len(alert_commits) // strata_count:(i + 1) * len(alert_commits) // strata_count]
+            rng.shuffle(stratum)
+            self.strata.append(stratum)
+        self.population_size = len(alert_commits)
+
+    def get_allocation(self, sample_size: int) -> [int]:
+        """proportional allocation of the sample size to the strata by largest remainder. Every stratum gets at least one
+        alert commit as long as the sample size allows it."""
+        sample_size = min(sample_size, self.population_size)
+        if sample_size <= 0:
+            return [0] * len(self.strata)
+        quotas = [sample_size * len(stratum) / self.population_size for stratum in self.strata]
+        allocation = [min(len(stratum), max(1, math.floor(q))) for stratum, q in zip(self.strata, quotas)]
+        by_remainder = sorted(range(len(self.strata)), key=lambda i: quotas[i] - math.floor(quotas[i]), reverse=True)
+        while sum(allocation) > sample_size:
+            largest = max(range(len(allocation)), key=lambda i: allocation[i])
+            allocation[largest] -= 1
+        while sum(allocation) < sample_size:
+            for i in by_remainder:
+                if sum(allocation) < sample_size and allocation[i] < len(self.strata[i]):
+                    allocation[i] += 1
+        return allocation
+
+    def sample(self, sample_size: int) -> [[Commit]]:
+        """returns the sampled alert commits per stratum"""
+        return [stratum[:n] for stratum, n in zip(self.strata, self.get_allocation(sample_size))]
+
+
+def get_z_value(confidence: float) -> float:
+    return NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+
+def estimate_stratified_mean(values_per_stratum: [[float]], stratum_sizes: [int], sampled_counts: [int],
+                             confidence: float = 0.95, name: str = "", bounds: tuple = (-math.inf, math.inf)
+                             ) -> SampleEstimate:
+    """Estimates a population mean from per result values of a stratified sample.
+
+    The strata are weighted by their alert commit count. The variance of every stratum mean is s^2 / n with the finite
+    population correction of the sampled share of alert commits. Results of one alert commit are treated as independent."""
+    population_size = sum(size for size, values in zip(stratum_sizes, values_per_stratum) if values)
+    if population_size == 0:
+        return SampleEstimate(name, math.nan, math.nan, math.nan)
+    mean = 0.0
+    variance = 0.0
+    for values, stratum_size, sampled_count in zip(values_per_stratum, stratum_sizes, sampled_counts):
+        if not values:
+            continue
+        weight = stratum_size / population_size
+        stratum_mean = sum(values) / len(values)
+        stratum_variance = sum((v - stratum_mean) ** 2 for v in values) / (len(values) - 1) if len(values) > 1 else 0.0
+        finite_population_correction = 1 - sampled_count / stratum_size
+        mean += weight * stratum_mean
+        variance += weight ** 2 * finite_population_correction * stratum_variance / len(values)
+    half_width = get_z_value(confidence) * math.sqrt(variance)
+    return SampleEstimate(name, mean, max(bounds[0], mean - half_width), min(bounds[1], mean + half_width))
+
+
+def estimate_stratified_share(values_per_stratum: [[float]], stratum_sizes: [int], sampled_counts: [int],
+                              confidence: float = 0.95, name: str = "") -> SampleEstimate:
+    """Estimates the population share of results with value 1.0 with a Wilson score interval.
+
+    The normal interval of estimate_stratified_mean has zero width for a share that was never (or always) observed, and
+    for strata with a single result. The Wilson interval stays wide for small samples. It uses the effective sample size
+    of the stratified estimate, or the number of results if the variance is degenerate. A full sample is exact."""
+    estimate = estimate_stratified_mean(values_per_stratum, stratum_sizes, sampled_counts, confidence, name, (0.0, 1.0))
+    if math.isnan(estimate.value) or all(sampled_count >= stratum_size for values, stratum_size, sampled_count
+                                         in zip(values_per_stratum, stratum_sizes, sampled_counts) if values):
+        return estimate
+    z = get_z_value(confidence)
+    share = estimate.value
+    variance = (estimate.get_half_width() / z) ** 2
+    if 0 < share < 1 and variance > 0:
+        sample_size = share * (1 - share) / variance
+    else:
+        sample_size = sum(len(values) for values in values_per_stratum)
+    lower, upper = get_wilson_interval(share, sample_size, z)
+    return SampleEstimate(name, share, lower, upper)
+
+
+def get_wilson_interval(share: float, sample_size: float, z: float) -> (float, float):
+    denominator = 1 + z ** 2 / sample_size
+    center = (share + z ** 2 / (2 * sample_size)) / denominator
+    half_width = z * math.sqrt(share * (1 - share) / sample_size + z ** 2 / (4 * sample_size ** 2)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def estimate_from_sample(results_per_stratum: [[AnalysisResult]], stratum_sizes: [int], sampled_counts: [int],
+                         confidence: float = 0.95) -> ([SampleEstimate], SampleEstimate):
+    """returns the estimated share of every result category and the estimated average lifetime in milliseconds"""
+    category_estimates: [SampleEstimate] = []
+    for category in ResultCategory:
+        values_per_stratum = [[1.0 if categorize_result(r) is category else 0.0 for r in results] for results in results_per_stratum]
+        category_estimates.append(
+            estimate_stratified_share(values_per_stratum, stratum_sizes, sampled_counts, confidence, category.value)
+        )
+    lifetimes_per_stratum = [
+        [(r.instance_metrics.time_alive + r.sibling_instance_metrics.time_alive) / 2 for r in results]
+        for results in results_per_stratum
+    ]
+    lifetime_estimate = estimate_stratified_mean(lifetimes_per_stratum, stratum_sizes, sampled_counts, confidence,
+                                                 'Average time alive', (0.0, math.inf))
+    return category_estimates, lifetime_estimate
+
+
+def run_sampled_analysis(client: TeamscaleClient, seed: int = 0, initial_sample_size: int = 50, max_half_width: float = 0.05,
+                         growth_factor: float = 2, strata_count: int = 10, confidence: float = 0.95
+                         ) -> ([SampleEstimate], SampleEstimate):
+    """Analyses a stratified random sample of the alert commits and estimates the category shares and the average
+    lifetime with confidence intervals. The sample is grown by the growth factor until every category share is known to
+    +- max_half_width, with at least MIN_STRATUM_SAMPLE alert commits analysed per stratum, or all alert commits are
+    analysed."""
+    alert_file: AlertFile = update_filtered_alert_commits(client, overwrite=False)
+    sampler = StratifiedSampler(alert_file.alert_commit_list, strata_count, seed)
+    analysed: dict[int, [AnalysisResult]] = {}
+    failed: [int] = []
+
+    sample_size = initial_sample_size
+    while True:
+        sample: [[Commit]] = sampler.sample(sample_size)
+        for alert_commit in (c for stratum in sample for c in stratum):
+            if alert_commit.timestamp in analysed or alert_commit.timestamp in failed:
+                continue
+            printer.separator(LogLevel.INFO)
+            try:
+                analysed[alert_commit.timestamp] = analyse_one_alert_commit(client, alert_commit.timestamp)
+            except Exception:
+                traceback.print_exc()
+                printer.red("ERROR")
+                failed.append(alert_commit.timestamp)
+
+        results_per_stratum = [[r for c in stratum if c.timestamp in analysed for r in analysed[c.timestamp]] for stratum in sample]
+        sampled_counts = [len([c for c in stratum if c.timestamp in analysed]) for stratum in sample]
+        category_estimates, lifetime_estimate = estimate_from_sample(
+            results_per_stratum, [len(stratum) for stratum in sampler.strata], sampled_counts, confidence
+        )
+        print_sample_estimates(sum(len(stratum) for stratum in sample), sampler.population_size, category_estimates,
+                               lifetime_estimate, confidence)
+
+        sample_size = sum(len(stratum) for stratum in sample)
+        narrow_enough = all(e.get_half_width() <= max_half_width for e in category_estimates)
+        strata_covered = all(count >= min(MIN_STRATUM_SAMPLE, len(stratum)) for count, stratum in zip(sampled_counts, sampler.strata))
+        if (narrow_enough and strata_covered) or sample_size >= sampler.population_size:
+            break
+        sample_size = max(sample_size + 1, math.ceil(sample_size * growth_factor))
+
+    write_to_file(get_sample_file_name(client.project), {
+        "seed": seed, "confidence": confidence, "successful runs": list(analysed.items()), "failed runs": failed,
+        "category estimates": category_estimates, "lifetime estimate": lifetime_estimate
+    })
+    return category_estimates, lifetime_estimate
+
+
+def print_sample_estimates(sample_size: int, population_size: int, category_estimates: [SampleEstimate],
+                           lifetime_estimate: SampleEstimate, confidence: float):
+    printer.separator(LogLevel.RELEVANT)
+    printer.blue(
+        "Sample of " + str(sample_size) + " / " + str(population_size) + " alert commits. "
+        + str(round(confidence * 100)) + "% confidence intervals:"
+        , LogLevel.RELEVANT
+    )
+    for e in category_estimates:
+        printer.white(
+            "{0:26}".format(e.name + ":") + f"{e.value:6.1%}  [{e.lower:6.1%}, {e.upper:6.1%}]", LogLevel.RELEVANT
+        )
+    if not math.isnan(lifetime_estimate.value):
+        printer.white(
+            "{0:26}".format(lifetime_estimate.name + ":") + display_time(round(lifetime_estimate.value))
+            + "  [" + display_time(round(lifetime_estimate.lower)) + ", " + display_time(round(lifetime_estimate.upper)) + "]"
+            , LogLevel.RELEVANT
+        )
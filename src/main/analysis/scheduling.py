@@ -0,0 +1,92 @@
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+from src.main.analysis.analysis import get_analysis_windows
+from src.main.analysis.estimation import AlertCostEstimate
+
+
+class SchedulingPolicy(Enum):
+    """The order in which alert commits are analysed. Results are always reported in the original order."""
+    ORIGINAL = "original"
+    # most expensive alerts first: minimizes the makespan with parallel workers
+    LONGEST_FIRST = "longest-first"
+    # cheapest alerts first: most results early on, e.g. for a time budget
+    SHORTEST_FIRST = "shortest-first"
+
+    def __str__(self):
+        return self.value
+
+
+@dataclass
+class CostFactors:
+    """The mean factors of the dry-run estimates. Alert commits without an estimate, e.g. ones discovered after the last
+    estimate, are costed with them, so that all costs are on the same scale."""
+    commit_alert_count: float = 1
+    change_frequency: float = 1
+
+    @staticmethod
+    def from_estimates(estimates: [AlertCostEstimate]) -> "CostFactors":
+        estimates = [e for e in estimates if e.window_count > 0]
+        if not estimates:
+            return CostFactors()
+        return CostFactors(sum(e.commit_alert_count for e in estimates) / len(estimates),
+                           sum(e.touched_window_count / e.window_count for e in estimates) / len(estimates))
+
+
+def get_alert_commit_cost(alert_commit_timestamp: int, commit_timestamps: [int], estimate: AlertCostEstimate = None,
+                          factors: CostFactors = None) -> float:
+    """Estimates the relative cost of analysing an alert commit.
+
+    The history length since the alert, that is the number of commits after it, is weighted by how often the tracked
+    files change (the share of touched windows) for every commit alert, and the probes are added. The counts come from
+    the dry-run estimate of the alert commit. Without one, the mean factors of the other estimates are used."""
+    history_length = len(commit_timestamps) - bisect_right(commit_timestamps, alert_commit_timestamp)
+    if estimate is not None and estimate.window_count > 0:
+        return estimate.commit_alert_count * history_length * estimate.touched_window_count / estimate.window_count \
+               + estimate.get_probe_count()
+    factors = factors or CostFactors()
+    # both files of every commit alert are probed in every window
+    window_count = len(get_analysis_windows(alert_commit_timestamp, commit_timestamps[-1])) if commit_timestamps else 0
+    return factors.commit_alert_count * (history_length * factors.change_frequency + 2 * window_count)
+
+
+def schedule_alert_commits(costs: [float], policy: SchedulingPolicy) -> [int]:
+    """returns the indices of the alert commits in the order they should be analysed. Ties keep the original order."""
+    order = list(range(len(costs)))
+    if policy is SchedulingPolicy.LONGEST_FIRST:
+        order.sort(key=lambda idx: -costs[idx])
+    elif policy is SchedulingPolicy.SHORTEST_FIRST:
+        order.sort(key=lambda idx: costs[idx])
+    return order
+
+
+def run_scheduled(tasks: [Callable], order: [int], workers: int = 1, on_outcome: Callable[[int, object], None] = None) -> list:
+    """Runs the tasks in the given order on a number of worker threads. Returns the outcomes in the original order of the
+    tasks. The outcome of a task is its return value or the exception it raised.
+    If on_outcome is given, it is called with the task index and the outcome as soon as a task is finished (on the worker
+    thread) and the outcome is not kept."""
+
+    def run(idx: int):
+        try:
+            outcome = tasks[idx]()
+        except Exception as e:
+            outcome = e
+        if on_outcome is None:
+            return outcome
+        on_outcome(idx, outcome)
+
+    outcomes = [None] * len(tasks)
+    if workers <= 1:
+        for idx in order:
+            outcomes[idx] = run(idx)
+        return outcomes
+
+    # the executor starts queued tasks first in first out, so submitting in order keeps the schedule
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {idx: executor.submit(run, idx) for idx in order}
+    for idx, future in futures.items():
+        outcomes[idx] = future.result()
+    return outcomes
@@ -4,12 +4,12 @@ import requests
 from teamscale_client import TeamscaleClient
 
 from defintions import JAVA_INT_MAX
-from src.main.api.api_utils import get_project_api_service_url, get_global_service_url
+from src.main.api.api_utils import get_project_api_service_url, get_global_service_url, api_get
 from src.main.api.data import Commit, CommitAlert, FileChange, DiffDescription, DiffType, CloneFindingChurn, TokenElementChurnInfo
 from src.main.pretty_print import MyPrinter, LogLevel
 from src.main.utils.time_utils import timestamp_to_str, add_branch
 
-printer: MyPrinter = MyPrinter(LogLevel.VERBOSE)
+printer: MyPrinter = MyPrinter(LogLevel.VERBOSE, __name__)
 
 
 def get_repository_commits(client: TeamscaleClient, start_commit_timestamp: int, end_commit_timestamp,
@@ -42,7 +42,7 @@ def get_repository_commits(client: TeamscaleClient, start_commit_timestamp: int,
     if filter_alerts:
         parameters.update({"commit-attribute": "HAS_ALERTS"})
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     commit_list = [Commit.from_json(entry['commit']) for entry in parsed]
@@ -63,7 +63,7 @@ def get_commit_alerts(client: TeamscaleClient, commit_timestamp: int) -> dict[Co
     printer.yellow("Getting commit alerts for timestamp " + str(commit_timestamp) + " at URL: " + str(url),
                    level=LogLevel.DEBUG)
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     commit_alert_list_dict: dict[Commit, [CommitAlert]] = dict()
@@ -96,7 +96,7 @@ def get_affected_files(client: TeamscaleClient, commit_timestamp: int) -> [FileC
         level=LogLevel.DEBUG
     )
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     affected_files: [FileChange] = [FileChange.from_json(j) for j in parsed]
@@ -124,7 +124,7 @@ def get_diff(client: TeamscaleClient, left_file: str, left_commit_timestamp: int
                   level=LogLevel.DEBUG)
     link = client.url + "/compare.html#/" + left + "#&#" + right
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     diff_dict = {}
@@ -142,7 +142,7 @@ def get_repository_summary(client: TeamscaleClient) -> tuple[int, int]:
     url = get_project_api_service_url(client, "repository-summary")
     parameters = {"only-first-and-last": True}
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
     printer.white(
         "First commit: " + timestamp_to_str(parsed['firstCommit']) + ", Most recent commit: " + timestamp_to_str(parsed['mostRecentCommit'])
@@ -160,7 +160,7 @@ def get_clone_finding_churn(client: TeamscaleClient, commit_timestamp: int) -> C
         "t": commit_timestamp
     }
 
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     clone_finding_churn: CloneFindingChurn = CloneFindingChurn.from_json(parsed)
@@ -176,7 +176,7 @@ def get_delta_affected_files(client: TeamscaleClient, t1: int, t2: int, uniform_
         "uniform-path": uniform_path,
         "max-milliseconds": max_millis
     }
-    response: requests.Response = client.get(url, parameters)
+    response: requests.Response = api_get(client, url, parameters)
     parsed = json.loads(response.text)
 
     if len(parsed) > 1:
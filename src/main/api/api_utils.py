@@ -1,6 +1,77 @@
+import threading
+import time
+
+import requests
 from teamscale_client import TeamscaleClient
 
 
+class ApiStatistics:
+    """Counts the requests sent to the teamscale server and the time spent waiting for them. Per endpoint."""
+
+    def __init__(self):
+        self.request_counts: dict[str, int] = {}
+        self.request_seconds: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, seconds: float):
+        with self._lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+            self.request_seconds[endpoint] = self.request_seconds.get(endpoint, 0.0) + seconds
+
+    def get_request_count(self) -> int:
+        return sum(self.request_counts.values())
+
+    def get_request_seconds(self) -> float:
+        return sum(self.request_seconds.values())
+
+    def get_mean_latency(self) -> float:
+        """returns the mean latency of all recorded requests in seconds. 0 if nothing was recorded."""
+        request_count = self.get_request_count()
+        return self.get_request_seconds() / request_count if request_count else 0.0
+
+    def reset(self):
+        with self._lock:
+            self.request_counts.clear()
+            self.request_seconds.clear()
+
+
+api_statistics: ApiStatistics = ApiStatistics()
+
+
+class LazyTeamscaleClient(TeamscaleClient):
+    """A Teamscale client that does not contact the server when it is created. The api version is checked when
+    check_api_version is called, e.g. before an analysis. Commands that only read local files send no request."""
+
+    def __init__(self, url, username, access_token, project, sslverify=True, timeout=30.0, branch=None):
+        self._created = False
+        super().__init__(url, username, access_token, project, sslverify, timeout, branch)
+        self._created = True
+
+    def check_api_version(self):
+        if self._created:
+            super().check_api_version()
+
+
+def get_endpoint_name(client: TeamscaleClient, url: str) -> str:
+    """Returns the service part of a service url. For example 'commits/affected-files'."""
+    endpoint = url[len(client.url):] if url.startswith(client.url) else url
+    project_prefix = "/api/projects/" + str(client.project) + "/"
+    if endpoint.startswith(project_prefix):
+        endpoint = endpoint[len(project_prefix):]
+    elif endpoint.startswith("/api/"):
+        endpoint = endpoint[len("/api/"):]
+    return endpoint.strip("/")
+
+
+def api_get(client: TeamscaleClient, url: str, parameters: dict) -> requests.Response:
+    """Sends a GET request with the client and records it in the api statistics."""
+    start = time.perf_counter()
+    try:
+        return client.get(url, parameters)
+    finally:
+        api_statistics.record(get_endpoint_name(client, url), time.perf_counter() - start)
+
+
 def get_project_api_service_url(client: TeamscaleClient, service_name: str):
     """Returns the full url pointing to a project api service.
 
@@ -0,0 +1,109 @@
+import gzip
+import json
+import threading
+import time
+
+import requests
+from teamscale_client import TeamscaleClient
+
+RECORDING_SCHEMA_VERSION = 1
+
+
+class MissingResponseError(LookupError):
+    """The recording has no response for a request. The analysis sent a request the recorded run did not send."""
+    pass
+
+
+def get_request_key(client_url: str, url: str, parameters: dict = None) -> str:
+    """identifies a request independent of the server url and the order of the parameters"""
+    path = url[len(client_url):] if url.startswith(client_url) else url
+    return path.strip("/") + "?" + json.dumps(parameters or {}, sort_keys=True, separators=(",", ":"))
+
+
+def get_expected_results_file_name(recording_file_name: str) -> str:
+    """the results of the recorded run. A replay has to reproduce them exactly"""
+    return recording_file_name + ".results.json"
+
+
+def open_recording(file_name: str, mode: str):
+    """recordings ending in .gz are compressed"""
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name, mode + "t", encoding="utf-8")
+    return open(file_name, mode, encoding="utf-8")
+
+
+def read_recording(file_name: str) -> (dict, dict[str, str]):
+    """returns the header and the response texts by request key"""
+    responses: dict[str, str] = {}
+    with open_recording(file_name, "r") as file:
+        header = json.loads(file.readline())
+        if header.get("schema") != RECORDING_SCHEMA_VERSION:
+            raise ValueError("Unsupported recording schema in " + file_name + ": " + str(header.get("schema")))
+        for line in file:
+            entry = json.loads(line)
+            responses[entry["key"]] = entry["text"]
+    return header, responses
+
+
+def build_response(url: str, text: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = text.encode("utf-8")
+    return response
+
+
+class RecordingClient(TeamscaleClient):
+    """Sends the requests with the given client and appends every response to a recording, one JSON line per request.
+    Record a fresh, complete analysis: alert commits finished in an earlier run send no requests."""
+
+    def __init__(self, client: TeamscaleClient, file_name: str):
+        # the settings of the client are taken over without a request
+        self.__dict__.update(client.__dict__)
+        self.client = client
+        self.file_name = file_name
+        self._lock = threading.Lock()
+        self._file = open_recording(file_name, "w")
+        self._file.write(json.dumps({
+            "schema": RECORDING_SCHEMA_VERSION, "url": client.url, "project": client.project, "branch": client.branch
+        }) + "\n")
+
+    def get(self, url, parameters=None):
+        response = self.client.get(url, parameters)
+        line = json.dumps({"key": get_request_key(self.url, url, parameters), "text": response.text})
+        with self._lock:
+            self._file.write(line + "\n")
+        return response
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayClient(TeamscaleClient):
+    """Answers requests from a recording instead of a Teamscale server. An optional latency is added to every request
+    to simulate the network. Unknown requests raise a MissingResponseError."""
+
+    def __init__(self, file_name: str, latency: float = 0.0):
+        self.header, self.responses = read_recording(file_name)
+        self.latency = latency
+        super().__init__(self.header["url"], "replay", "replay", self.header["project"], branch=self.header["branch"])
+
+    @classmethod
+    def from_responses(cls, url: str, project: str, branch: str, responses: dict[str, str], latency: float = 0.0):
+        """a replay client for responses that are built in memory, e.g. of a synthetic history"""
+        client = cls.__new__(cls)
+        client.header = {"schema": RECORDING_SCHEMA_VERSION, "url": url, "project": project, "branch": branch}
+        client.responses = responses
+        client.latency = latency
+        TeamscaleClient.__init__(client, url, "replay", "replay", project, branch=branch)
+        return client
+
+    def get(self, url, parameters=None):
+        key = get_request_key(self.url, url, parameters)
+        if key not in self.responses:
+            raise MissingResponseError("No recorded response for " + key)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return build_response(url, self.responses[key])
@@ -0,0 +1,119 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from defintions import get_result_columns_dir, get_result_log_file_name, get_result_file_name
+from src.main.aggregation import ResultColumns
+from src.main.analysis.analysis_utils import AnalysisResult, categorize_result
+from src.main.analysis.result_metrics import CATEGORIES
+from src.main.persistence import ResultLog, read_from_file
+from src.main.pretty_print import MyPrinter, LogLevel
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+COLUMNS_VERSION = 1
+
+# column name -> (dtype, value of a result)
+COLUMNS = {
+    "alert_timestamp": (np.int64, None),
+    "category": (np.int8, lambda r: CATEGORIES.index(categorize_result(r))),
+    "one_file_affected_count": (np.int32, lambda r: r.one_file_affected_count),
+    "both_files_affected_count": (np.int32, lambda r: r.both_files_affected_count),
+    "one_instance_affected_count": (np.int32, lambda r: r.one_instance_affected_count),
+    "both_instances_affected_count": (np.int32, lambda r: r.both_instances_affected_count),
+    "clone_findings_count": (np.int32, lambda r: r.clone_findings_count),
+    "instance_file_affected_count": (np.int32, lambda r: r.instance_metrics.file_affected_count),
+    "instance_affected_count": (np.int32, lambda r: r.instance_metrics.instance_affected_count),
+    "instance_deleted": (np.bool_, lambda r: r.instance_metrics.deleted),
+    "instance_time_alive": (np.int64, lambda r: r.instance_metrics.time_alive),
+    "sibling_file_affected_count": (np.int32, lambda r: r.sibling_instance_metrics.file_affected_count),
+    "sibling_affected_count": (np.int32, lambda r: r.sibling_instance_metrics.instance_affected_count),
+    "sibling_deleted": (np.bool_, lambda r: r.sibling_instance_metrics.deleted),
+    "sibling_time_alive": (np.int64, lambda r: r.sibling_instance_metrics.time_alive),
+}
+
+
+def results_to_columns(successful_runs, failed_runs=()) -> ResultColumns:
+    """converts (alert commit timestamp, [AnalysisResult]) runs to columns in a single pass"""
+    values: dict[str, list] = {name: [] for name in COLUMNS}
+    run_timestamps: [int] = []
+    for alert_commit_timestamp, results in successful_runs:
+        run_timestamps.append(alert_commit_timestamp)
+        for result in results:
+            result: AnalysisResult
+            values["alert_timestamp"].append(alert_commit_timestamp)
+            for name, (dtype, get_value) in COLUMNS.items():
+                if get_value is not None:
+                    values[name].append(get_value(result))
+    return ResultColumns(
+        {name: np.asarray(values[name], dtype=dtype) for name, (dtype, get_value) in COLUMNS.items()},
+        np.asarray(run_timestamps, dtype=np.int64), np.asarray(list(failed_runs), dtype=np.int64)
+    )
+
+
+def write_columns(directory: str, result_columns: ResultColumns, source: dict = None):
+    """Writes every column as .npy file, which can be memory mapped, and a Parquet file if pyarrow is available.
+    source describes the file the columns were created from, to detect outdated columns."""
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for name, column in result_columns.columns.items():
+        np.save(os.path.join(directory, name + ".npy"), column)
+    np.save(os.path.join(directory, "successful_runs.npy"), result_columns.successful_runs)
+    np.save(os.path.join(directory, "failed_runs.npy"), result_columns.failed_runs)
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table(result_columns.columns), os.path.join(directory, "results.parquet"))
+    except ImportError:
+        pass
+    # written last: the columns are only valid if the meta data exists
+    with open(os.path.join(directory, "meta.json"), "w") as file:
+        json.dump({"version": COLUMNS_VERSION, "rows": len(result_columns), "source": source,
+                   "categories": [c.value for c in CATEGORIES]}, file)
+
+
+def read_columns(directory: str, mmap=True) -> ResultColumns:
+    mmap_mode = 'r' if mmap else None
+    return ResultColumns(
+        {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode=mmap_mode) for name in COLUMNS},
+        np.load(os.path.join(directory, "successful_runs.npy"), mmap_mode=mmap_mode),
+        np.load(os.path.join(directory, "failed_runs.npy"), mmap_mode=mmap_mode)
+    )
+
+
+def get_source_description(file_name: str) -> dict:
+    stat = os.stat(file_name)
+    return {"file": os.path.basename(file_name), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def is_up_to_date(directory: str, source: dict) -> bool:
+    meta_file = os.path.join(directory, "meta.json")
+    if not os.path.isfile(meta_file):
+        return False
+    with open(meta_file, "r") as file:
+        meta = json.load(file)
+    return (meta.get("version") == COLUMNS_VERSION and meta.get("source") == source
+            and meta.get("categories") == [c.value for c in CATEGORIES])
+
+
+def load_result_columns(project: str) -> ResultColumns:
+    """Returns the result columns of the project. They are memory mapped from the sidecar next to the results if it is up
+    to date. Otherwise, they are created from the result log (or a results.json of older versions) and written."""
+    source_file = get_result_log_file_name(project)
+    if not os.path.isfile(source_file):
+        source_file = get_result_file_name(project)
+    source = get_source_description(source_file)
+    directory = get_result_columns_dir(project)
+    if is_up_to_date(directory, source):
+        return read_columns(directory)
+
+    printer.blue("Creating result columns from " + source_file, LogLevel.INFO)
+    if source_file == get_result_log_file_name(project):
+        result_log: ResultLog = ResultLog(source_file)
+        result_columns = results_to_columns(result_log.successful_runs(), result_log.failed_runs())
+    else:
+        result_dict: dict = read_from_file(source_file)
+        result_columns = results_to_columns(result_dict.get("successful runs"), result_dict.get("failed runs"))
+    write_columns(directory, result_columns, source)
+    return result_columns
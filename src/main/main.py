@@ -1,23 +1,39 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
 import time
 import traceback
-from functools import reduce
+from functools import partial
 from pathlib import Path
 
-import matplotlib
-import matplotlib.pyplot as plt
 from teamscale_client import TeamscaleClient
 
-from defintions import get_result_file_name, get_pgf_dir
-from src.main.analysis.analysis import update_filtered_alert_commits, analyse_one_alert_commit
-from src.main.analysis.analysis_utils import AnalysisResult
-from src.main.api.api import get_affected_files
+from defintions import get_pgf_dir, get_estimate_file_name, get_result_log_file_name, get_store_file_name, \
+    get_profile_file_name, get_memory_timeline_file_name, get_alert_log_file_name, get_alert_log_header_file_name, \
+    get_project_dir, get_result_columns_dir, get_result_log_header_file_name
+from src.main.analysis.analysis import update_filtered_alert_commits, analyse_one_alert_commit, clone_finding_index_cache, \
+    discover_alert_commits
+from src.main.analysis.analysis_utils import AnalysisResult, TimeBudgetExhaustedError
+from src.main.analysis.estimation import run_estimation, AlertCostEstimate
+from src.main.analysis.sampling import run_sampled_analysis
+from src.main.analysis.scheduling import SchedulingPolicy, get_alert_commit_cost, schedule_alert_commits, run_scheduled, \
+    CostFactors
+from src.main.api.api import get_repository_commits
 from src.main.api.data import Commit
-from src.main.persistence import parse_args, AlertFile, write_to_file, read_from_file
-from src.main.plotter import plot_instance_metrics, plot_pie, plot_bar
-from src.main.pretty_print import MyPrinter, LogLevel
-from src.main.utils.time_utils import display_time
+from src.main.api.replay import RecordingClient, get_expected_results_file_name
+from src.main.persistence import parse_args, AlertFile, read_from_file, ResultLogWriter, ResultLog, migrate_project_files, \
+    read_result_records, read_result_kinds, AlertLog, read_result_log_header
+from src.main.pretty_print import MyPrinter, LogLevel, set_log_writer, LogWriter
+from src.main.progress import ProgressReporter
+from src.main.store import ResultStore
+from src.main.utils.memory_tracing import memory_tracer, format_memory_record, format_top_sites
+from src.main.utils.profiling import phase_timers, PERSISTENCE, format_phase_breakdown
+from src.main.utils.time_utils import display_time, TimeBudget, timestamp_to_str
 
-printer: MyPrinter = MyPrinter(LogLevel.INFO)
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
 
 
 def show_projects(client: TeamscaleClient) -> None:
@@ -33,87 +49,378 @@ def show_projects(client: TeamscaleClient) -> None:
     printer.separator()
 
 
-def plot_results(project: str, successful_runs, failed_runs, pgf=False):
-    printer.blue("Successful runs: ", LogLevel.RELEVANT)
-    printer.white(", ".join(str(entry[0]) for entry in successful_runs), LogLevel.RELEVANT)
-    printer.blue("Failed runs: ", LogLevel.RELEVANT)
-    printer.red(", ".join(str(commit_timestamp) for commit_timestamp in failed_runs), LogLevel.RELEVANT)
+def plot_results(project: str, pgf=False):
+    """plots the results. The columns are read from the result columns next to the results, see load_result_columns."""
+    # plotting is imported when it is needed. It takes most of the start time
+    import matplotlib
+    import matplotlib.pyplot as plt
+    from src.main.aggregation import ResultAggregate, aggregate_results
+    from src.main.columnar import load_result_columns
+    from src.main.plotter import plot_instance_metrics, plot_pie, plot_bar, PGF_RC_PARAMS
 
-    successful_result_count = reduce(lambda a, b: a + b, (len(entry[1]) for entry in successful_runs))
-    printer.separator(LogLevel.RELEVANT)
-    printer.blue(
-        "Successful run count:\t\t" + str(len(successful_runs))
-        + "\nSuccessful result count:\t" + str(successful_result_count)
-        + "\nFailed result count:\t\t" + str(len(failed_runs))
-        , LogLevel.RELEVANT
-    )
+    aggregate: ResultAggregate = aggregate_results(load_result_columns(project))
+    print_summary(aggregate)
 
     if pgf:
         Path(get_pgf_dir(project)).mkdir(parents=True, exist_ok=True)
         matplotlib.use("pgf")
-        matplotlib.rcParams.update({
-            "pgf.texsystem": "pdflatex",
-            'font.family': 'serif',
-            'text.usetex': True,
-            'pgf.rcfonts': False,
-        })
-    plot_pie(project, successful_runs, failed_runs, successful_result_count, pgf=pgf)
-    plot_bar(project, successful_runs, successful_result_count, pgf=pgf)
-    plot_instance_metrics(project, successful_runs, failed_runs, boxplot=True, with_file_affections=True, pgf=pgf)
-    plot_instance_metrics(project, successful_runs, failed_runs, with_file_affections=True, pgf=pgf)
+        matplotlib.rcParams.update(PGF_RC_PARAMS)
+    plot_pie(project, aggregate, pgf=pgf)
+    plot_bar(project, aggregate, pgf=pgf)
+    plot_instance_metrics(project, aggregate, boxplot=True, with_file_affections=True, pgf=pgf)
+    plot_instance_metrics(project, aggregate, with_file_affections=True, pgf=pgf)
 
     plt.show()
 
 
-def run_analysis(client: TeamscaleClient):
+def print_summary(aggregate: "ResultAggregate"):
+    printer.blue("Successful runs: ", LogLevel.RELEVANT)
+    printer.white(", ".join(str(commit_timestamp) for commit_timestamp in aggregate.successful_runs), LogLevel.RELEVANT)
+    printer.blue("Failed runs: ", LogLevel.RELEVANT)
+    printer.red(", ".join(str(commit_timestamp) for commit_timestamp in aggregate.failed_runs), LogLevel.RELEVANT)
+
+    printer.separator(LogLevel.RELEVANT)
+    printer.blue(
+        "Successful run count:\t\t" + str(len(aggregate.successful_runs))
+        + "\nSuccessful result count:\t" + str(aggregate.successful_result_count)
+        + "\nFailed result count:\t\t" + str(len(aggregate.failed_runs))
+        , LogLevel.RELEVANT
+    )
+    for category, count in aggregate.category_counts.items():
+        printer.white("{0:26}".format(category.value + ":") + str(count), LogLevel.RELEVANT)
+    printer.white(
+        "Lifetime of deleted instances: " + ", ".join(
+            str(round(q * 100)) + "% " + display_time(v) for q, v in aggregate.lifetime_quantiles.items()
+        ), LogLevel.RELEVANT
+    )
+
+
+def run_analysis(client: TeamscaleClient, policy: SchedulingPolicy = SchedulingPolicy.ORIGINAL, workers: int = 1,
+                 time_budget: TimeBudget = None, store: ResultStore = None, plot=True, fresh=False):
+    """Analyses the alert commits. Results are appended to the result log, so a crash loses at most the alert commits
+    that were running. The next run skips the alert commits an interrupted run finished and continues the results of
+    completed runs from where they were analysed until, unless fresh is set."""
     client.check_api_version()
     alert_file: AlertFile = update_filtered_alert_commits(client, overwrite=False)
+    if store is not None:
+        store.add_alert_commits(client.project, alert_file.alert_commit_list)
 
     printer.separator(LogLevel.INFO)
     printer.blue("Alert commit count: " + str(len(alert_file.alert_commit_list)), LogLevel.INFO)
+    order: [int] = get_alert_commit_order(client, alert_file, policy)
+    finished_timestamps, resumed_runs = (set(), {}) if fresh else read_previous_analysis(client.project)
+    if store is not None and finished_timestamps:
+        # the interrupted run may not have used the store
+        previous_log: ResultLog = ResultLog(get_result_log_file_name(client.project))
+        for alert_commit_timestamp, results in previous_log.iter_runs(ResultLogWriter.SUCCESSFUL, finished_timestamps):
+            store.add_results(client.project, alert_commit_timestamp, results)
     start = int(time.time())
 
-    successful_analysis_count = 0
-    successful_runs = []
-    failed_runs = []
-    for alert_commit in alert_file.alert_commit_list:
+    alert_commits: [Commit] = alert_file.alert_commit_list
+    progress: ProgressReporter = ProgressReporter(len(alert_commits), len(finished_timestamps), cache=clone_finding_index_cache)
+
+    def analyse(alert_commit: Commit):
         printer.separator(LogLevel.INFO)
-        alert_commit: Commit
+        progress.start_alert_commit(alert_commit.timestamp)
+        phase_timers.start_alert_commit(alert_commit.timestamp)
+        memory_trace = memory_tracer.trace(alert_commit.timestamp)
         try:
-            results: [AnalysisResult] = analyse_one_alert_commit(client, alert_commit.timestamp)
-            successful_analysis_count += 1
-            successful_runs.append((alert_commit.timestamp, results))
-        except Exception:
-            traceback.print_exc()
-            printer.red("ERROR")
-            failed_runs.append(alert_commit.timestamp)
+            with memory_trace:
+                return analyse_one_alert_commit(client, alert_commit.timestamp, time_budget,
+                                                resumed_runs.get(alert_commit.timestamp), progress)
+        finally:
+            if memory_trace.record is not None:
+                printer.blue(lambda: format_memory_record(memory_trace.record), LogLevel.INFO)
+            if phase_timers.enabled:
+                phases = phase_timers.finish_alert_commit()
+                printer.blue(lambda: "Phases of alert commit " + str(alert_commit.timestamp) + ":\n"
+                             + format_phase_breakdown(phases), LogLevel.INFO)
+
+    tasks = [partial(analyse, alert_commit) for alert_commit in alert_commits]
+    order = [idx for idx in order if alert_commits[idx].timestamp not in finished_timestamps]
+
+    # results are written as soon as an alert commit is finished. Continue the log of previous analyses
+    with ResultLogWriter(get_result_log_file_name(client.project), append=not fresh,
+                         header_file_name=get_result_log_header_file_name(client.project)) as result_log:
+        def write_outcome(idx: int, outcome):
+            progress.finish_alert_commit(
+                alert_commits[idx].timestamp, isinstance(outcome, Exception) and not isinstance(outcome, TimeBudgetExhaustedError)
+            )
+            with phase_timers.phase(PERSISTENCE):
+                write_result(idx, outcome)
+
+        def write_result(idx: int, outcome):
+            if isinstance(outcome, TimeBudgetExhaustedError):
+                result_log.append_unfinished(alert_commits[idx].timestamp, outcome.results)
+                if store is not None:
+                    store.add_results(client.project, alert_commits[idx].timestamp, outcome.results)
+            elif isinstance(outcome, Exception):
+                traceback.print_exception(outcome)
+                printer.red("ERROR")
+                result_log.append_failed(alert_commits[idx].timestamp)
+            else:
+                result_log.append_successful(alert_commits[idx].timestamp, outcome)
+                if store is not None:
+                    store.add_results(client.project, alert_commits[idx].timestamp, outcome)
+
+        run_scheduled(tasks, order, workers, write_outcome)
+        if not result_log.counts[ResultLogWriter.UNFINISHED]:
+            result_log.mark_complete()
+    progress.close()
     printer.blue("Analysis took: " + display_time(int((time.time() - start) * 1000)), LogLevel.INFO)
-    printer.blue("Alert commit count: " + str(len(alert_file.alert_commit_list)), LogLevel.INFO)
-    printer.blue("Successful analysis count: " + str(successful_analysis_count))
+    printer.blue("Alert commit count: " + str(len(alert_commits)), LogLevel.INFO)
+    printer.blue("Successful analysis count: " + str(len(finished_timestamps) + result_log.counts[ResultLogWriter.SUCCESSFUL]))
 
-    result_dict = {"successful runs": successful_runs, "failed runs": failed_runs}
-    write_to_file(get_result_file_name(client.project), result_dict)
-    plot_results(client.project, successful_runs, failed_runs)
+    if result_log.counts[ResultLogWriter.UNFINISHED]:
+        printer.yellow(
+            "Time budget exhausted. " + str(result_log.counts[ResultLogWriter.UNFINISHED])
+            + " alert commits are unfinished. Run again to continue."
+            , LogLevel.CRUCIAL
+        )
+        return
+    if plot:
+        plot_results(client.project)
     return
 
 
-def main(client: TeamscaleClient) -> None:
+def run_profiled_analysis(client: TeamscaleClient, policy: SchedulingPolicy, workers: int, time_budget: TimeBudget,
+                          store: ResultStore, plot=True, fresh=False):
+    """Runs the analysis under cProfile and with phase timers. The pstats dump can be viewed with snakeviz or turned into a
+    flamegraph with flameprof. cProfile only sees the main thread, the phase timers cover all workers."""
+    phase_timers.enabled = True
+    phase_timers.reset()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profiler.runcall(run_analysis, client, policy, workers, time_budget, store, plot, fresh)
+    finally:
+        wall_seconds = time.perf_counter() - start
+        phase_timers.enabled = False
+        profiler.dump_stats(get_profile_file_name(client.project))
+        printer.separator(LogLevel.RELEVANT)
+        printer.blue("Phases of the run (summed over workers):\n"
+                     + format_phase_breakdown({name: seconds for name, (seconds, count) in phase_timers.totals.items()},
+                                              wall_seconds), LogLevel.RELEVANT)
+        printer.blue(lambda: "Profile written to " + get_profile_file_name(client.project) + "\n"
+                     + get_top_functions(profiler), LogLevel.RELEVANT)
+
+
+def get_top_functions(profiler: cProfile.Profile, count: int = 20) -> str:
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(count)
+    return stream.getvalue().strip()
+
+
+def save_expected_results(project: str, recording_file_name: str):
+    """stores the results of a recorded run next to the recording"""
+    with open(get_expected_results_file_name(recording_file_name), "w") as file:
+        json.dump({str(ts): record for ts, record in read_result_records(get_result_log_file_name(project)).items()}, file)
+    printer.blue("Recorded responses and results in " + recording_file_name, LogLevel.RELEVANT)
+
+
+def read_previous_analysis(project: str) -> (set[int], dict[int, [AnalysisResult]]):
+    """Returns the timestamps of the alert commits that an interrupted previous run finished and the results to continue
+    by alert commit timestamp. A run is interrupted if it crashed or its time budget ran out. Unfinished results are
+    resumed, the results of completed runs are continued from their analysed_until, so the history after it is seen.
+    Failed alert commits are analysed again."""
+    if not os.path.isfile(get_result_log_file_name(project)):
+        return set(), {}
+    header: dict = read_result_log_header(get_result_log_header_file_name(project))
+    # records at or after the start of an interrupted run belong to it
+    run_start: int = header["run_start"] if header is not None and not header["complete"] else None
+    result_log: ResultLog = ResultLog(get_result_log_file_name(project))
+    finished_timestamps = set() if run_start is None else {
+        timestamp for timestamp in result_log.get_timestamps(ResultLogWriter.SUCCESSFUL) if result_log.index[timestamp][1] >= run_start
+    }
+    resumed_runs = dict(result_log.unfinished_runs())
+    if finished_timestamps or resumed_runs:
+        printer.yellow("Continuing interrupted analysis. " + str(len(finished_timestamps)) + " alert commits are finished, "
+                       + str(len(resumed_runs)) + " are unfinished. Use --fresh to start over.", LogLevel.INFO)
+    continued_timestamps = set(result_log.get_timestamps(ResultLogWriter.SUCCESSFUL)) - finished_timestamps
+    for timestamp, results in result_log.iter_runs(ResultLogWriter.SUCCESSFUL, continued_timestamps):
+        for result in results:
+            result.finished = False
+        resumed_runs[timestamp] = results
+    return finished_timestamps, resumed_runs
+
+
+def get_alert_commit_order(client: TeamscaleClient, alert_file: AlertFile, policy: SchedulingPolicy) -> [int]:
+    """returns the order in which the alert commits are analysed. Costs are weighted by a previous dry-run estimate if
+    one exists."""
+    if policy is SchedulingPolicy.ORIGINAL:
+        return list(range(len(alert_file.alert_commit_list)))
+
+    commit_timestamps: [int] = sorted(
+        c.timestamp for c in get_repository_commits(client, alert_file.first_commit, alert_file.most_recent_commit)
+    )
+    estimates: dict[int, AlertCostEstimate] = {}
+    if os.path.isfile(get_estimate_file_name(client.project)):
+        estimates = {e.alert_commit_timestamp: e for e in read_from_file(get_estimate_file_name(client.project))["estimates"]}
+    factors: CostFactors = CostFactors.from_estimates(list(estimates.values()))
+    costs: [float] = [
+        get_alert_commit_cost(alert_commit.timestamp, commit_timestamps, estimates.get(alert_commit.timestamp), factors)
+        for alert_commit in alert_file.alert_commit_list
+    ]
+    printer.blue("Scheduling alert commits " + str(policy) + ". Estimates available for " + str(len(estimates)), LogLevel.INFO)
+    return schedule_alert_commits(costs, policy)
+
+
+def main(client: TeamscaleClient, args) -> None:
+    COMMANDS[args.command](client, args)
+
+
+def run_discover_command(client: TeamscaleClient, args):
     client.check_api_version()
+    migrate_project_files(client.project)
+    if args.sqlite:
+        alert_file: AlertFile = update_filtered_alert_commits(client, overwrite=args.overwrite)
+        store: ResultStore = ResultStore(get_store_file_name(client.project))
+        try:
+            store.add_alert_commits(client.project, alert_file.alert_commit_list)
+        finally:
+            store.close()
+        count = len(alert_file.alert_commit_list)
+    else:
+        # only the header of the alert log is read
+        count = discover_alert_commits(client, overwrite=args.overwrite)["count"]
+    printer.blue("Alert commit count: " + str(count), LogLevel.CRUCIAL)
 
-    def read_and_plot(pgf=False):
-        result_dict: dict = read_from_file(get_result_file_name(client.project))
-        successful_runs = result_dict.get("successful runs")
-        failed_runs = result_dict.get("failed runs")
-        plot_results(client.project, successful_runs, failed_runs, pgf=pgf)
 
-    run_analysis(client)
-    return
-    read_and_plot(pgf=True)
-    analyse_one_alert_commit(client, 1518197307000)
-    update_filtered_alert_commits(client, overwrite=True)
-    get_affected_files(client, 1612210799000)
+def run_analyse_command(client: TeamscaleClient, args):
+    migrate_project_files(client.project)
+    if args.estimate:
+        client.check_api_version()
+        run_estimation(client)
+        return
+    if args.sample:
+        client.check_api_version()
+        run_sampled_analysis(client, args.sample_seed, args.sample_size, args.max_half_width)
+        return
+    if args.record:
+        client = RecordingClient(client, args.record)
+    time_budget: TimeBudget = TimeBudget(args.time_budget) if args.time_budget else None
+    store: ResultStore = ResultStore(get_store_file_name(client.project)) if args.sqlite else None
+    if args.trace_memory:
+        memory_tracer.start(get_memory_timeline_file_name(client.project))
+    finished = False
+    try:
+        run_analysis_with_options(client, args, time_budget, store)
+        finished = True
+    finally:
+        if store is not None:
+            store.close()
+        if memory_tracer.enabled:
+            printer.blue("Allocation sites that grew the most during the run:\n" + format_top_sites(memory_tracer.stop())
+                         + "\nMemory timeline written to " + get_memory_timeline_file_name(client.project), LogLevel.RELEVANT)
+        if args.record:
+            # a complete gzip stream in any case, but expected results only of a complete analysis
+            client.close()
+            if finished:
+                save_expected_results(client.project, args.record)
+
+
+def run_plot_command(client: TeamscaleClient, args):
+    migrate_project_files(client.project)
+    if args.render is None:
+        plot_results(client.project)
+        return
+    from src.main.aggregation import aggregate_results
+    from src.main.columnar import load_result_columns
+    from src.main.render import render_results
+    # figures of unchanged results are not rendered again
+    render_results(client.project, aggregate_results(load_result_columns(client.project)), args.render or ["png"],
+                   args.render_workers)
+
+
+def get_status(project: str) -> dict:
+    """the state of the stored alert commits and results of the project. Only reads the alert log header and the start
+    of every result record, and writes nothing"""
+    status = {"project": project, "alert_commits": None, "first_commit": None, "analysed_until": None,
+              "most_recent_commit": None, "results": {kind: 0 for kind in (ResultLogWriter.SUCCESSFUL, ResultLogWriter.FAILED,
+                                                                            ResultLogWriter.UNFINISHED)}}
+    header: dict = AlertLog(get_alert_log_file_name(project), get_alert_log_header_file_name(project)).read_header()
+    if header is not None:
+        status.update({"alert_commits": header["count"], "first_commit": header["first_commit"],
+                       "analysed_until": header["analysed_until"], "most_recent_commit": header["most_recent_commit"]})
+    if os.path.isfile(get_result_log_file_name(project)):
+        for kind in read_result_kinds(get_result_log_file_name(project)).values():
+            status["results"][kind] += 1
+    return status
+
+
+def run_stats_command(client: TeamscaleClient, args):
+    from src.main.stats import print_stats
+
+    migrate_project_files(client.project)
+    print_stats(client.project, args)
+
+
+def print_status(client: TeamscaleClient, args):
+    status: dict = get_status(client.project)
+    if status["alert_commits"] is None:
+        printer.yellow("No alert commits discovered for " + client.project + ". Run discover or analyse", LogLevel.CRUCIAL)
+        return
+    results: dict[str, int] = status["results"]
+    printer.white(
+        "{0:26}".format("Alert commits:") + str(status["alert_commits"])
+        + "\n" + "{0:26}".format("Discovered until:") + timestamp_to_str(status["analysed_until"])
+        + "\n" + "{0:26}".format("Most recent commit:") + timestamp_to_str(status["most_recent_commit"])
+        + "\n" + "{0:26}".format("Successful:") + str(results[ResultLogWriter.SUCCESSFUL])
+        + "\n" + "{0:26}".format("Failed:") + str(results[ResultLogWriter.FAILED])
+        + "\n" + "{0:26}".format("Unfinished:") + str(results[ResultLogWriter.UNFINISHED])
+        + "\n" + "{0:26}".format("Not analysed:") + str(max(0, status["alert_commits"] - sum(results.values())))
+        , LogLevel.CRUCIAL
+    )
+
+
+def get_cache_files(project: str) -> [str]:
+    """the files derived from the results. They are rebuilt when needed"""
+    from src.main.render import RENDER_CACHE_FILE_NAME
+
+    file_names: [str] = []
+    if os.path.isdir(get_result_columns_dir(project)):
+        file_names += [os.path.join(get_result_columns_dir(project), f) for f in sorted(os.listdir(get_result_columns_dir(project)))]
+    if os.path.isfile(get_pgf_dir(project) + RENDER_CACHE_FILE_NAME):
+        file_names.append(get_pgf_dir(project) + RENDER_CACHE_FILE_NAME)
+    return file_names
+
+
+def run_cache_command(client: TeamscaleClient, args):
+    file_names: [str] = get_cache_files(client.project)
+    for file_name in file_names:
+        printer.white("{0:>12}  ".format(os.path.getsize(file_name)) + os.path.relpath(file_name, get_project_dir(client.project)),
+                      LogLevel.CRUCIAL)
+    printer.blue(str(len(file_names)) + " files, " + str(sum(map(os.path.getsize, file_names))) + " bytes", LogLevel.CRUCIAL)
+    if args.clear:
+        for file_name in file_names:
+            os.remove(file_name)
+        printer.blue("Deleted " + str(len(file_names)) + " files", LogLevel.CRUCIAL)
+
+
+COMMANDS = {
+    "discover": run_discover_command, "analyse": run_analyse_command, "plot": run_plot_command, "stats": run_stats_command,
+    "status": print_status, "cache": run_cache_command
+}
+
+
+def run_analysis_with_options(client: TeamscaleClient, args, time_budget: TimeBudget, store: ResultStore):
+    # a recording covers all alert commits
+    fresh = args.fresh or bool(args.record)
+    if args.profile:
+        run_profiled_analysis(client, SchedulingPolicy(args.schedule), args.workers, time_budget, store, args.plot, fresh)
+        return
+    run_analysis(client, SchedulingPolicy(args.schedule), args.workers, time_budget, store, args.plot, fresh)
+
+
+def run_command_line(argv: [str] = None):
+    # parse_args applies the log levels
+    teamscale_client, arguments = parse_args(argv)
+    json_output = getattr(arguments, "json", False)
+    if arguments.log_file or json_output:
+        # with JSON output, stdout only holds the JSON and the log goes to stderr
+        set_log_writer(LogWriter(sys.stderr if json_output else None, arguments.log_file))
+    main(teamscale_client, arguments)
 
 
 if __name__ == "__main__":
-    teamscale_client = parse_args()
-    main(teamscale_client)
+    run_command_line()
@@ -1,21 +1,30 @@
 import argparse
 import os
+import re
+import sys
+import threading
+import time
 from configparser import ConfigParser
+import json
 from json import JSONDecodeError
 from pathlib import Path
-from typing import TextIO
 
 import jsonpickle
 from teamscale_client import TeamscaleClient
 from teamscale_client.teamscale_client_config import TeamscaleClientConfig
 from teamscale_client.utils import auto_str
 
-from defintions import get_alert_file_name, get_project_dir
+from defintions import get_alert_file_name, get_project_dir, FILE_COMPRESSION, get_alert_timestamp_list_file_name, \
+    get_result_file_name, get_estimate_file_name, get_sample_file_name, get_result_log_file_name, \
+    get_alert_log_file_name, get_alert_log_header_file_name
+from src.main import serialization
 from src.main.api.api import get_repository_summary
+from src.main.api.api_utils import LazyTeamscaleClient
 from src.main.api.data import Commit
-from src.main.pretty_print import LogLevel, MyPrinter
+from src.main.pretty_print import LogLevel, MyPrinter, set_module_levels
+from src.main.utils.time_utils import parse_date
 
-printer: MyPrinter = MyPrinter(LogLevel.INFO)
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
 
 
 def from_config_file(config_file):
@@ -41,7 +50,23 @@ def from_config_file(config_file):
     return config
 
 
-def parse_args() -> TeamscaleClient:
+COMMANDS = ("discover", "analyse", "plot", "stats", "status", "cache")
+# commands that only read local files. They do not print the connection
+LOCAL_COMMANDS = ("stats", "status", "cache")
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser):
+    """the options of the stats command"""
+    parser.add_argument("--since", type=parse_date, help="only alert commits at or after this date, YYYY-MM-DD or milliseconds")
+    parser.add_argument("--until", type=parse_date, help="only alert commits before this date, YYYY-MM-DD or milliseconds")
+    parser.add_argument("--path", help="only results with an instance whose path matches this glob pattern, e.g. "
+                                       "'src/main/*'. Failed runs have no paths and are left out")
+    parser.add_argument("--json", action="store_true", help="print the statistics as JSON")
+
+
+def parse_args(argv: [str] = None) -> (TeamscaleClient, argparse.Namespace):
+    """Parses the command line. Without a command, analyse is run as in older versions. The client does not contact the
+    server until its api version is checked, so commands that only read local files start without a request."""
     # region default
     teamscale_url = "http://localhost:8080"
     username = "admin"
@@ -50,17 +75,92 @@ def parse_args() -> TeamscaleClient:
     project_branch = 'main'
     # endregion
 
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--teamscale_client_config",
+    # the connection and logging options are accepted by every command
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--teamscale_client_config",
                         help="provide a teamscale client config file. "
                              "https://github.com/cqse/teamscale-client-python/blob/master/examples/.teamscale-client.config")
-    parser.add_argument("--teamscale_url", help="provide a teamscale URL other than default: " + teamscale_url)
-    parser.add_argument("--username", help="provide a username other than default: " + username)
-    parser.add_argument("--access_token", help="provide a access_token other than default: " + access_token)
-    parser.add_argument("--project_id", help="provide a project_id other than default: " + project_id)
-    parser.add_argument("--project_branch", help="provide a project_branch other than default: " + project_branch)
-
-    args = parser.parse_args()
+    common.add_argument("--teamscale_url", help="provide a teamscale URL other than default: " + teamscale_url)
+    common.add_argument("--username", help="provide a username other than default: " + username)
+    common.add_argument("--access_token", help="provide a access_token other than default: " + access_token)
+    common.add_argument("--project_id", help="provide a project_id other than default: " + project_id)
+    common.add_argument("--project_branch", help="provide a project_branch other than default: " + project_branch)
+    common.add_argument("--log_level",
+                        help="log levels per module, e.g. 'analysis=INFO,api=DEBUG'. A level without module applies to all")
+    common.add_argument("--log_file", help="additionally write the log to this file. It is rotated at 50 MB")
+
+    parser = argparse.ArgumentParser(description="Tracks broken clones on a Teamscale instance. Without a command, "
+                                                 "analyse is run.")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    parser_discover = commands.add_parser("discover", parents=[common], help="fetch the new alert commits from the server")
+    parser_discover.add_argument("--overwrite", action="store_true", help="discard the known alert commits and fetch all")
+    parser_discover.add_argument("--sqlite", action="store_true",
+                                 help="additionally write the alert commits to the indexed SQLite store")
+
+    parser_analyse = commands.add_parser("analyse", parents=[common], help="discover and analyse the alert commits")
+    parser_analyse.add_argument("--estimate", action="store_true",
+                                help="estimate the requests and wall time of a full analysis instead of running it")
+    parser_analyse.add_argument("--schedule", default="original", choices=["original", "longest-first", "shortest-first"],
+                                help="order in which the alert commits are analysed. Costs use the estimate of a previous "
+                                     "--estimate run")
+    parser_analyse.add_argument("--workers", type=int, default=1, help="number of alert commits analysed in parallel")
+    parser_analyse.add_argument("--time_budget", "--time-budget", type=float,
+                                help="stop the analysis cleanly after this many seconds. The next run continues where it "
+                                     "stopped")
+    parser_analyse.add_argument("--sqlite", action="store_true",
+                                help="additionally write alert commits and results to an indexed SQLite store in the project "
+                                     "directory")
+    parser_analyse.add_argument("--sample", action="store_true",
+                                help="analyse a stratified random sample of the alert commits and estimate the result "
+                                     "categories with confidence intervals. The sample grows until the intervals are narrow "
+                                     "enough")
+    parser_analyse.add_argument("--sample_size", type=int, default=50, help="initial number of sampled alert commits")
+    parser_analyse.add_argument("--sample_seed", type=int, default=0, help="seed of the sample")
+    parser_analyse.add_argument("--max_half_width", type=float, default=0.05,
+                                help="the sample grows until every category share is known to +- this value")
+    parser_analyse.add_argument("--profile", action="store_true",
+                                help="profile the analysis with cProfile and time its phases. The pstats dump is written to "
+                                     "the project directory, e.g. for snakeviz or flameprof")
+    parser_analyse.add_argument("--record",
+                                help="record all responses of the server and the results to this file (.gz to compress) for "
+                                     "the replay benchmark. Implies --fresh, so all alert commits are "
+                                     "requested")
+    parser_analyse.add_argument("--trace_memory", action="store_true",
+                                help="trace the memory of every alert commit with tracemalloc and write a timeline to the "
+                                     "project directory. Slows the analysis down. Needs --workers 1")
+    parser_analyse.add_argument("--fresh", action="store_true",
+                                help="discard the stored results and analyse all alert commits again. By default, stored "
+                                     "results are continued and alert commits finished by an interrupted run are skipped")
+    parser_analyse.add_argument("--plot", action="store_true", help="show the figures when the analysis is complete")
+
+    parser_plot = commands.add_parser("plot", parents=[common], help="show the figures of the stored results")
+    parser_plot.add_argument("--render", nargs="*", choices=["png", "svg", "pgf"],
+                             help="render the figures to files in the pgf directory instead of showing them. "
+                                  "Default format: png")
+    parser_plot.add_argument("--render_workers", type=int, help="number of processes rendering figures. Default: one per "
+                                                                "figure")
+
+    parser_stats = commands.add_parser("stats", parents=[common], help="print the counts, deletion metrics and distributions "
+                                                                       "of the figures. Sends no request")
+    add_filter_arguments(parser_stats)
+
+    commands.add_parser("status", parents=[common], help="print the state of the stored alert commits and results. "
+                                                         "Sends no request")
+
+    parser_cache = commands.add_parser("cache", parents=[common], help="show the derived files of the project, e.g. the "
+                                                                      "result columns. Sends no request")
+    parser_cache.add_argument("--clear", action="store_true", help="delete them. They are rebuilt when needed")
+
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS + ("-h", "--help"):
+        # without a command, analyse and plot as before the commands existed
+        argv = ["analyse", "--plot"] + argv
+    args = parser.parse_args(argv)
+    if args.command == "analyse" and args.trace_memory and args.workers > 1:
+        # the peak of tracemalloc is process wide and cannot be told apart per alert commit
+        parser_analyse.error("--trace_memory needs --workers 1")
 
     if args.teamscale_client_config:
         config: TeamscaleClientConfig = from_config_file(args.teamscale_client_config)
@@ -80,15 +180,18 @@ def parse_args() -> TeamscaleClient:
     if args.project_branch:
         project_branch = args.project_branch
 
-    printer.separator(level=LogLevel.CRUCIAL)
-    printer.yellow("Parsed Arguments:", level=LogLevel.CRUCIAL)
-    printer.white("%s\n%s\n%s\n%s\n%s" % (
-        "Teamscale URL : " + str(teamscale_url), "Username : " + str(username), "Access Token : " + str(access_token),
-        "Project ID : " + str(project_id), "Project Branch : " + str(project_branch)
-    ), level=LogLevel.CRUCIAL)
-    printer.separator(level=LogLevel.CRUCIAL)
+    if args.log_level:
+        set_module_levels(args.log_level)
+    if args.command not in LOCAL_COMMANDS:
+        printer.separator(level=LogLevel.CRUCIAL)
+        printer.yellow("Parsed Arguments:", level=LogLevel.CRUCIAL)
+        printer.white("%s\n%s\n%s\n%s\n%s" % (
+            "Teamscale URL : " + str(teamscale_url), "Username : " + str(username), "Access Token : " + str(access_token),
+            "Project ID : " + str(project_id), "Project Branch : " + str(project_branch)
+        ), level=LogLevel.CRUCIAL)
+        printer.separator(level=LogLevel.CRUCIAL)
 
-    return TeamscaleClient(teamscale_url, username, access_token, project_id, branch=project_branch)
+    return LazyTeamscaleClient(teamscale_url, username, access_token, project_id, branch=project_branch), args
 
 
 def create_project_dir(project: str):
@@ -96,46 +199,309 @@ def create_project_dir(project: str):
     Path(get_project_dir(project)).mkdir(parents=True, exist_ok=True)
 
 
-def read_alert_file(client: TeamscaleClient, overwrite=False):
-    file_name: str = get_alert_file_name(client.project)
+def read_alert_file(client: TeamscaleClient, overwrite=False) -> ("AlertLog", "AlertFile"):
+    """Returns the alert log of the project and its meta data for the discovery of new alert commits. The alert commits
+    are not read, use AlertLog.read for them."""
     # create structure if non-existent
     create_project_dir(project=client.project)
     summary: tuple[int, int] = get_repository_summary(client)
+    alert_log: AlertLog = AlertLog(get_alert_log_file_name(client.project), get_alert_log_header_file_name(client.project))
 
     if overwrite:
-        os.remove(file_name)
+        alert_log.remove()
+
+    alert_file: AlertFile = alert_log.read_meta()
+    if alert_file is None and os.path.isfile(get_alert_file_name(client.project)):
+        # alert file of an older version
+        try:
+            alert_file = alert_log.create(read_from_file(get_alert_file_name(client.project)))
+        except ValueError:
+            alert_file = None
+    if alert_file is None:
+        # if the log does not exist or the header is broken -> fetch all data from repo
+        alert_file = alert_log.create(AlertFile.from_summary(client.project, summary))
+    # update most recent commit date
+    alert_file.most_recent_commit = summary[1]
+    return alert_log, alert_file
 
-    alert_file: AlertFile
+
+def read_from_file(file_name: str):
+    """reads a file written by write_to_file. Files of older versions, written with jsonpickle, are still readable."""
+    with open(file_name, "rb") as file:
+        data: bytes = file.read()
+    if not serialization.is_versioned(data):
+        return jsonpickle.decode(data)
+    return serialization.loads(data)
+
+
+def write_to_file(file_name: str, content, compression: str = FILE_COMPRESSION):
+    with open(file_name, "wb") as file:
+        file.write(serialization.dumps(content, compression))
+
+
+def migrate_file(file_name: str) -> bool:
+    """rewrites a jsonpickle file of an older version in the current format. Returns False if there was nothing to do."""
+    if not os.path.isfile(file_name):
+        return False
+    with open(file_name, "rb") as file:
+        if serialization.is_versioned(file.read(64)):
+            return False
+    printer.blue("Migrating " + file_name, LogLevel.INFO)
+    write_to_file(file_name, read_from_file(file_name))
+    return True
+
+
+def migrate_project_files(project: str):
+    """one time migration of the files of a project that were written with jsonpickle"""
+    for file_name in (get_alert_timestamp_list_file_name(project), get_result_file_name(project),
+                      get_estimate_file_name(project), get_sample_file_name(project)):
+        migrate_file(file_name)
+    if os.path.isfile(get_result_log_file_name(project)):
+        migrate_result_log(get_result_log_file_name(project))
+
+
+class ResultLogWriter:
+    """Appends the results of every analysed alert commit as one JSON line to the result log as soon as it is finished.
+
+    Every record is flushed to the operating system right away. fsync is batched: it runs after fsync_every records or
+    fsync_seconds seconds, and on close. Records of a crashed run stay readable except for a truncated last line.
+    Safe to use from several threads."""
+
+    SUCCESSFUL = "successful"
+    FAILED = "failed"
+    UNFINISHED = "unfinished"
+
+    def __init__(self, file_name: str, append=False, fsync_every: int = 20, fsync_seconds: float = 5.0,
+                 header_file_name: str = None):
+        self.file_name = file_name
+        self.header_file_name = header_file_name
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.counts: dict[str, int] = {self.SUCCESSFUL: 0, self.FAILED: 0, self.UNFINISHED: 0}
+        if append and os.path.isfile(file_name):
+            truncate_incomplete_line(file_name)
+        self._file = open(file_name, "a" if append else "w")
+        if header_file_name is not None:
+            # a run that continues an interrupted one keeps its start
+            header = read_result_log_header(header_file_name) if append else None
+            run_start = header["run_start"] if header is not None and not header["complete"] else self._file.tell()
+            write_result_log_header(header_file_name, run_start, complete=False)
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def append(self, kind: str, alert_commit_timestamp: int, results: list = None):
+        line = encode_record(kind, alert_commit_timestamp, results)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.counts[kind] += 1
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+                self._sync()
+
+    def append_successful(self, alert_commit_timestamp: int, results: list):
+        self.append(self.SUCCESSFUL, alert_commit_timestamp, results)
+
+    def append_failed(self, alert_commit_timestamp: int):
+        self.append(self.FAILED, alert_commit_timestamp)
+
+    def append_unfinished(self, alert_commit_timestamp: int, results: list):
+        self.append(self.UNFINISHED, alert_commit_timestamp, results)
+
+    def mark_complete(self):
+        """Marks the run as complete in the header. Until then, the run counts as interrupted and the next run skips the
+        alert commits it finished"""
+        with self._lock:
+            self._sync()
+            if self.header_file_name is not None:
+                write_result_log_header(self.header_file_name, self._file.tell(), complete=True)
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+
+def read_result_log_header(header_file_name: str) -> dict:
+    """Returns the header of a result log: whether the last run completed and the offset in the log at which the records
+    of an interrupted run start. Returns None if there is no valid header, e.g. for a log of an older version."""
     try:
-        open(file_name, 'x')  # throws FileExistsError if File existent
-        # the file was not existent before. Reading is useless
-        # create a new object to work on
-        alert_file = AlertFile.from_summary(client.project, summary)
-
-    except FileExistsError:
-        # the file already exists
-        # read the current data from the file, process and update it
-        with open(file_name, 'r') as file:
-            file: TextIO
+        with open(header_file_name, "r") as file:
+            header = json.load(file)
+    except (FileNotFoundError, JSONDecodeError):
+        return None
+    if header.get("schema") != serialization.SCHEMA_VERSION:
+        return None
+    return header
+
+
+def write_result_log_header(header_file_name: str, run_start: int, complete: bool):
+    header = {"schema": serialization.SCHEMA_VERSION, "run_start": run_start, "complete": complete}
+    write_atomically(header_file_name, json.dumps(header).encode())
+
+
+def encode_record(kind: str, alert_commit_timestamp: int, results: list = None) -> str:
+    return json.dumps({
+        "schema": serialization.SCHEMA_VERSION, "kind": kind, "timestamp": alert_commit_timestamp,
+        "results": None if results is None else [serialization.encode_analysis_result(r) for r in results]
+    }, separators=(",", ":"))
+
+
+def decode_record(line: str) -> dict:
+    """decodes one line of the result log. Lines of older versions were written with jsonpickle."""
+    record: dict = json.loads(line)
+    if "schema" not in record:
+        return jsonpickle.decode(line)
+    if record["schema"] != serialization.SCHEMA_VERSION:
+        raise serialization.SchemaError("Unsupported schema version " + str(record["schema"]))
+    if record["results"] is not None:
+        record["results"] = [serialization.decode_analysis_result(r) for r in record["results"]]
+    return record
+
+
+def migrate_result_log(file_name: str):
+    """Rewrites a result log of an older version, whose lines were written with jsonpickle, in the current format. Logs
+    are migrated as a whole, so the start of the first line tells whether it is needed. The rewrite streams line by line."""
+    with open(file_name, "r") as file:
+        start = file.read(len('{"schema"'))
+    if not start or start == '{"schema"':
+        return
+    printer.blue("Migrating " + file_name, LogLevel.INFO)
+    with open(file_name, "r") as source, open(file_name + ".tmp", "w") as file:
+        for line in source:
+            try:
+                record = decode_record(line)
+            except JSONDecodeError:
+                continue
+            file.write(encode_record(record["kind"], record["timestamp"], record["results"]) + "\n")
+    os.replace(file_name + ".tmp", file_name)
+
+
+def truncate_incomplete_line(file_name: str):
+    """cuts off the last line of a file if it does not end with a newline, e.g. after a crash while writing it"""
+    with open(file_name, "rb+") as file:
+        content_end = file.seek(0, os.SEEK_END)
+        position = content_end
+        while position > 0:
+            chunk_start = max(0, position - 4096)
+            file.seek(chunk_start)
+            chunk = file.read(position - chunk_start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = chunk_start + newline + 1
+                break
+            position = chunk_start
+        if position != content_end:
+            file.truncate(position)
+
+
+class ResultLog:
+    """Streaming reader of a result log written by the ResultLogWriter.
+
+    A first pass only matches the start of every line and remembers the offset and kind of the latest record of every
+    alert commit, so a later record (e.g. the successful run after an unfinished one) replaces the earlier ones. Records
+    are decoded lazily, one at a time, in the order of the alert commit timestamps. A truncated last line of a crashed run
+    is ignored."""
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        # alert commit timestamp -> (kind, offset of the line)
+        self.index: dict[int, tuple[str, int]] = {
+            timestamp: (kind, offset) for timestamp, kind, offset in scan_record_starts(file_name)
+        }
+
+    def get_timestamps(self, kind: str) -> [int]:
+        return sorted(timestamp for timestamp, (k, offset) in self.index.items() if k == kind)
+
+    def iter_runs(self, kind: str, timestamps: set[int] = None):
+        """yields (alert commit timestamp, [AnalysisResult]) of all records of the given kind, or only of the given alert
+        commits"""
+        with open(self.file_name, "r") as file:
+            for timestamp in self.get_timestamps(kind):
+                if timestamps is not None and timestamp not in timestamps:
+                    continue
+                file.seek(self.index[timestamp][1])
+                yield timestamp, decode_record(file.readline())["results"]
+
+    def successful_runs(self) -> "ResultLogRuns":
+        return ResultLogRuns(self, ResultLogWriter.SUCCESSFUL)
+
+    def unfinished_runs(self) -> "ResultLogRuns":
+        return ResultLogRuns(self, ResultLogWriter.UNFINISHED)
+
+    def failed_runs(self) -> [int]:
+        return self.get_timestamps(ResultLogWriter.FAILED)
+
+
+def read_result_records(file_name: str) -> dict[int, dict]:
+    """returns the latest undecoded record of every alert commit in a result log, e.g. to compare two runs"""
+    records: dict[int, dict] = {}
+    with open(file_name, "r") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except JSONDecodeError:
+                continue
+            records[record["timestamp"]] = record
+    return records
+
+
+RECORD_START = re.compile(rb'{"schema":\d+,"kind":"(\w+)","timestamp":(-?\d+),')
+
+
+def scan_record_starts(file_name: str):
+    """Yields (alert commit timestamp, kind, offset of the line) of every record in a result log. Only the start of
+    every line is matched, the results are not decoded. Lines of older versions are decoded completely, a truncated last
+    line of a crashed run is skipped."""
+    with open(file_name, "rb") as file:
+        offset = 0
+        for line in file:
+            line_offset, offset = offset, offset + len(line)
+            if not line.endswith(b"\n"):
+                printer.red("Skipping incomplete record in " + file_name, LogLevel.INFO)
+                continue
+            match = RECORD_START.match(line)
+            if match is not None:
+                yield int(match.group(2)), match.group(1).decode(), line_offset
+                continue
             try:
-                alert_file = jsonpickle.decode(file.read())
-                # update most recent commit date
-                alert_file.most_recent_commit = summary[1]
+                record = json.loads(line)
             except JSONDecodeError:
-                # if error occurs while decoding -> fetch all data from repo
-                alert_file = AlertFile.from_summary(client.project, summary)
-    return file_name, alert_file
+                printer.red("Skipping incomplete record in " + file_name, LogLevel.INFO)
+                continue
+            yield record["timestamp"], record["kind"], line_offset
 
 
-def read_from_file(file_name: str):
-    with open(file_name, "r") as file:
-        file: TextIO
-        return jsonpickle.decode(file.read())
+def read_result_kinds(file_name: str) -> dict[int, str]:
+    """returns the kind of the latest record of every alert commit in a result log, without decoding the results"""
+    return {timestamp: kind for timestamp, kind, offset in scan_record_starts(file_name)}
 
 
-def write_to_file(file_name: str, content):
-    with open(file_name, "w") as file:
-        file.write(jsonpickle.encode(content))
+class ResultLogRuns:
+    """Re-iterable view on the runs of one kind in a result log. Every iteration streams from the file again."""
+
+    def __init__(self, result_log: ResultLog, kind: str):
+        self.result_log = result_log
+        self.kind = kind
+
+    def __iter__(self):
+        return self.result_log.iter_runs(self.kind)
+
+    def __len__(self):
+        return len(self.result_log.get_timestamps(self.kind))
 
 
 @auto_str
@@ -169,3 +535,114 @@ class AlertFile:
         return AlertFile(json['project'], json['first_commit'], json['most_recent_commit'],
                          json["analysed_until"],
                          json["alert_list"])
+
+
+serialization.register_type(
+    AlertFile,
+    lambda a: {
+        "project": a.project, "first_commit": a.first_commit, "most_recent_commit": a.most_recent_commit,
+        "analysed_until": a.analysed_until, "alert_commit_list": [serialization.encode_commit(c) for c in a.alert_commit_list]
+    },
+    lambda d: AlertFile(d["project"], d["first_commit"], d["most_recent_commit"], d["analysed_until"],
+                        [serialization.decode_commit(c) for c in d["alert_commit_list"]])
+)
+
+
+class AlertLog:
+    """Append-only log of the discovered alert commits.
+
+    The log has one line per alert commit. A small header holds the meta data of the AlertFile, e.g. analysed_until,
+    and the size of the log up to which the records are complete. Appending writes the new records first and then
+    replaces the header atomically, so discovery costs are linear in the number of alert commits. Records after the size
+    in the header are left from an interrupted append and are cut off when reading."""
+
+    def __init__(self, file_name: str, header_file_name: str):
+        self.file_name = file_name
+        self.header_file_name = header_file_name
+
+    def read_header(self) -> dict:
+        """returns None if there is no valid header"""
+        try:
+            with open(self.header_file_name, "r") as file:
+                header = json.load(file)
+        except (FileNotFoundError, JSONDecodeError):
+            return None
+        if header.get("schema") != serialization.SCHEMA_VERSION or not os.path.isfile(self.file_name):
+            return None
+        return header
+
+    def write_header(self, alert_file: AlertFile, size: int, count: int):
+        header = {
+            "schema": serialization.SCHEMA_VERSION, "project": alert_file.project, "first_commit": alert_file.first_commit,
+            "most_recent_commit": alert_file.most_recent_commit, "analysed_until": alert_file.analysed_until,
+            "size": size, "count": count
+        }
+        write_atomically(self.header_file_name, json.dumps(header).encode())
+
+    def read_meta(self) -> AlertFile:
+        """Reads the alert file from the header only, without the alert commits, e.g. to append newly discovered ones.
+        Records of an interrupted append are cut off. Returns None if the log does not exist"""
+        header = self.read_header()
+        if header is None:
+            return None
+        if os.path.getsize(self.file_name) > header["size"]:
+            printer.yellow("Cutting off incomplete alert commits of an interrupted run", LogLevel.INFO)
+            with open(self.file_name, "rb+") as file:
+                file.truncate(header["size"])
+        return AlertFile(header["project"], header["first_commit"], header["most_recent_commit"], header["analysed_until"], [])
+
+    def read(self) -> AlertFile:
+        """reads the alert file from the header and the complete records. Returns None if the log does not exist"""
+        alert_file = self.read_meta()
+        if alert_file is None:
+            return None
+        with open(self.file_name, "r") as file:
+            alert_file.alert_commit_list = [serialization.decode_commit(json.loads(line)) for line in file]
+        if len({c.timestamp for c in alert_file.alert_commit_list}) != len(alert_file.alert_commit_list):
+            self.compact(alert_file)
+        return alert_file
+
+    def append(self, alert_file: AlertFile, alert_commits: [Commit]):
+        """adds the alert commits to the alert file and the log. The header is updated with the current analysed_until.
+        The alert file may hold only the meta data, the count in the header covers the whole log."""
+        header = self.read_header()
+        count = (header["count"] if header is not None else 0) + len(alert_commits)
+        with open(self.file_name, "a") as file:
+            file.writelines(encode_commit_line(c) for c in alert_commits)
+            file.flush()
+            os.fsync(file.fileno())
+            size = file.tell()
+        alert_file.alert_commit_list.extend(alert_commits)
+        self.write_header(alert_file, size, count)
+
+    def create(self, alert_file: AlertFile) -> AlertFile:
+        """writes a new log with the alert commits of the alert file"""
+        write_atomically(self.file_name, "".join(encode_commit_line(c) for c in alert_file.alert_commit_list).encode())
+        self.write_header(alert_file, os.path.getsize(self.file_name), len(alert_file.alert_commit_list))
+        return alert_file
+
+    def compact(self, alert_file: AlertFile):
+        """rewrites the log without duplicate alert commits, e.g. after the same window was discovered twice"""
+        unique: dict[int, Commit] = {}
+        for c in alert_file.alert_commit_list:
+            unique.setdefault(c.timestamp, c)
+        printer.blue("Compacting alert log: " + str(len(alert_file.alert_commit_list) - len(unique)) + " duplicates", LogLevel.INFO)
+        alert_file.alert_commit_list = sorted(unique.values(), key=lambda c: c.timestamp)
+        self.create(alert_file)
+
+    def remove(self):
+        for file_name in (self.header_file_name, self.file_name):
+            if os.path.isfile(file_name):
+                os.remove(file_name)
+
+
+def encode_commit_line(commit: Commit) -> str:
+    return json.dumps(serialization.encode_commit(commit), separators=(",", ":")) + "\n"
+
+
+def write_atomically(file_name: str, data: bytes):
+    with open(file_name + ".tmp", "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(file_name + ".tmp", file_name)
@@ -1,5 +1,4 @@
 import math
-from functools import reduce
 
 import matplotlib.colors as m_colors
 import numpy as np
@@ -7,11 +6,27 @@ import seaborn as sns
 from matplotlib import pyplot as plt
 
 from defintions import get_window_title, get_pgf_dir, LATEX_TEXT_WIDTH
-from src.main.analysis.analysis_utils import AnalysisResult
+from src.main.analysis.analysis_utils import ResultCategory
+from src.main.aggregation import ResultAggregate
 # https://jwalton.info/Matplotlib-latex-PGF/
 # \showthe\textwidth
 from src.main.utils.time_utils import display_time
 
+PGF_RC_PARAMS = {
+    "pgf.texsystem": "pdflatex",
+    'font.family': 'serif',
+    'text.usetex': True,
+    'pgf.rcfonts': False,
+}
+
+# distributions with more values are drawn from precomputed statistics instead of one marker per value
+AGGREGATE_THRESHOLD = 5_000
+# strip points drawn per distribution in the aggregated mode. The sample is seeded, so figures are reproducible
+STRIP_SAMPLE_SIZE = 500
+STRIP_SAMPLE_SEED = 0
+# maximal number of bins of the densities in the aggregated mode
+DENSITY_BINS = 50
+
 
 def set_size(width_pt, fraction=1, subplots=(1, 1)):
     """Set figure dimensions to sit nicely in our document.
@@ -45,40 +60,23 @@ def set_size(width_pt, fraction=1, subplots=(1, 1)):
     return fig_width_in, fig_height_in
 
 
-def plot_pie(project: str, successful_runs, failed_runs, successful_result_count, pgf=False, analysis_error=False):
-    not_modified_count = 0
-    one_instance_affected_count = 0
-    both_instances_affected_count = 0
-    instance_deletion_count = 0
-    both_instances_deleted_count = 0
-    clone_finding_count = 0
-    # Interpretation of the result and categorization of the findings
+def set_window_title(fig, project: str):
+    # figures of non-interactive backends have no window
+    if fig.canvas.manager is not None:
+        fig.canvas.manager.set_window_title(get_window_title(project))
+
+
+def plot_pie(project: str, aggregate: ResultAggregate, pgf=False, analysis_error=False):
+    # Interpretation of the result and categorization of the findings. See ResultCategory
     # Importance:  -1. Error while analysing            -> Fix code or special handling
-    #               0. Deletion of both passages        -> Both relevant text passages were deleted in further development
-    #               1. Deletion of relevant passage     -> A relevant text passage was deleted in further development
-    #               2. New clone finding                -> The broken clone seems to appear as normal clone afterwards
-    #               3. one instance affected            -> The broken clone was modified at one point in time only at one text passage
-    #                                                       => possibly even more inconsistency introduced
-    #               4. Both instances affected          -> The relevant text passages are at least modified once together
-    #                                                       => possibly consistent maintenance
-    #               5. Not modified at all              -> after the introduction of the broken clone the relevant text passages were not
-    #                                                       modified at all
-    for entry in successful_runs:  # TODO clone finding count?
-        analysis_results: [AnalysisResult] = entry[1]
-        for result in analysis_results:
-            result: AnalysisResult
-            if result.instance_metrics.deleted and result.sibling_instance_metrics.deleted:
-                both_instances_deleted_count += 1
-            elif result.instance_metrics.deleted or result.sibling_instance_metrics.deleted:
-                instance_deletion_count += 1
-            elif result.clone_findings_count != 0:
-                clone_finding_count += 1
-            elif result.one_instance_affected_count != 0:
-                one_instance_affected_count += 1
-            elif result.both_instances_affected_count != 0:
-                both_instances_affected_count += 1
-            else:
-                not_modified_count += 1
+    counts = aggregate.category_counts
+    not_modified_count = counts[ResultCategory.NOT_MODIFIED]
+    one_instance_affected_count = counts[ResultCategory.ONE_INSTANCE_AFFECTED]
+    both_instances_affected_count = counts[ResultCategory.BOTH_INSTANCES_AFFECTED]
+    instance_deletion_count = counts[ResultCategory.ONE_INSTANCE_DELETED]
+    both_instances_deleted_count = counts[ResultCategory.BOTH_INSTANCES_DELETED]
+    clone_finding_count = counts[ResultCategory.NEW_CLONE]
+    failed_runs = aggregate.failed_runs
 
     labels: tuple
     if analysis_error:
@@ -91,7 +89,7 @@ def plot_pie(project: str, successful_runs, failed_runs, successful_result_count
             'Not Modified at All', 'New Clone', 'One Instance Affected', 'Both Instances Affected', 'One Instance Deleted'
             , 'Both Instances Deleted'
         )
-    run_count = len(failed_runs) + successful_result_count
+    run_count = aggregate.get_run_count()
     if analysis_error:
         sizes = [
             not_modified_count / run_count, clone_finding_count / run_count, one_instance_affected_count / run_count
@@ -106,7 +104,7 @@ def plot_pie(project: str, successful_runs, failed_runs, successful_result_count
         ]
     idx = sizes.index(max(sizes))
     # all weights sum up to 1.0
-    assert math.isclose(reduce(lambda a, b: a + b, sizes), 1.0, abs_tol=0.01)
+    assert math.isclose(sum(sizes), 1.0, abs_tol=0.01)
 
     tab_colors = m_colors.TABLEAU_COLORS
     color_set = (
@@ -120,49 +118,81 @@ def plot_pie(project: str, successful_runs, failed_runs, successful_result_count
     ax1.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
     my_circle = plt.Circle((0, 0), 0.7, color='white')
     ax1.add_artist(my_circle)
-    fig1.canvas.set_window_title(get_window_title(project))
+    set_window_title(fig1, project)
     plt.legend(loc=(0.7, 0.75))
     fig1.tight_layout()
     if pgf:
         plt.savefig(get_pgf_dir(project) + project + '_pie.pgf')
-
-
-def plot_instance_metrics(project, successful_runs, failed_runs, boxplot=False, with_file_affections=True, pgf=False):
+    return fig1
+
+
+def get_box_stats(data: np.ndarray, label: str) -> dict:
+    """the statistics bxp draws a box from, computed like boxplot does: the whiskers reach the furthest values within 1.5
+    times the interquartile range. Fliers are not drawn and left out."""
+    if len(data) == 0:
+        return {"label": label, "med": np.nan, "q1": np.nan, "q3": np.nan, "whislo": np.nan, "whishi": np.nan, "fliers": []}
+    q1, med, q3 = np.percentile(data, [25, 50, 75])
+    iqr = q3 - q1
+    inside = data[(data >= q1 - 1.5 * iqr) & (data <= q3 + 1.5 * iqr)]
+    return {"label": label, "med": med, "q1": q1, "q3": q3, "whislo": min(np.min(inside), q1), "whishi": max(np.max(inside), q3),
+            "fliers": []}
+
+
+def get_binned_density(data: np.ndarray, bins: int = DENSITY_BINS) -> (np.ndarray, np.ndarray):
+    """returns the bin edges and the histogram of the data, scaled to a maximum of 1. The values are counts, so a bin is
+    never narrower than one value."""
+    if len(data) == 0:
+        return np.array([0.0, 1.0]), np.zeros(1)
+    low, high = int(np.min(data)), int(np.max(data))
+    counts, edges = np.histogram(data, bins=min(bins, high - low + 1), range=(low - 0.5, high + 0.5))
+    return edges, counts / max(1, np.max(counts))
+
+
+def sample_strip_points(data: np.ndarray, size: int, rng: np.random.Generator) -> np.ndarray:
+    """at most size values of the data, drawn without replacement"""
+    if len(data) <= size:
+        return np.asarray(data)
+    return rng.choice(data, size, replace=False)
+
+
+def plot_aggregated_box(axs, distributions: dict[str, np.ndarray], props: dict, colormap: str):
+    """box and strip plot at a fixed cost: the boxes are drawn from precomputed statistics and the strip from a seeded
+    sample of every distribution"""
+    axs.bxp([get_box_stats(np.asarray(data), label) for label, data in distributions.items()],
+            positions=range(len(distributions)), vert=False, showfliers=False, patch_artist=True, **props)
+    rng = np.random.default_rng(STRIP_SAMPLE_SEED)
+    for y, (data, color) in enumerate(zip(distributions.values(), sns.color_palette(colormap, len(distributions)))):
+        sample = sample_strip_points(data, STRIP_SAMPLE_SIZE, rng)
+        axs.scatter(sample, y + rng.uniform(-0.08, 0.08, len(sample)), marker="D", s=4, color=color, linewidths=0)
+
+
+def plot_aggregated_violin(axs, distributions: dict[str, np.ndarray]):
+    """violins at a fixed cost: the density is a histogram with at most DENSITY_BINS bins instead of a KDE"""
+    extrema: [tuple] = []
+    for y, data in enumerate(distributions.values(), start=1):
+        if len(data) == 0:
+            continue
+        edges, density = get_binned_density(data)
+        half_width = np.append(density, density[-1]) * 0.25
+        axs.fill_between(edges, y - half_width, y + half_width, step="post", facecolor="C0", alpha=0.3, linewidth=0)
+        extrema.append((y, np.min(data), np.median(data), np.max(data)))
+    if extrema:
+        y, low, median, high = np.array(extrema).T
+        axs.hlines(y, low, high, colors="C0")
+        axs.vlines(np.concatenate((low, median, high)), np.tile(y - 0.125, 3), np.tile(y + 0.125, 3), colors="C0")
+
+
+def plot_instance_metrics(project, aggregate: ResultAggregate, boxplot=False, with_file_affections=True, pgf=False,
+                          aggregated: bool = None):
+    """Box and strip plot or violin plot of the distributions. The aggregated mode draws precomputed statistics, binned
+    densities and a sample of the strip points, so it takes the same time for any number of results. By default, it is
+    used if a distribution has more than AGGREGATE_THRESHOLD values."""
     fig, axs = plt.subplots(figsize=set_size(LATEX_TEXT_WIDTH))
 
-    one_file_affected_count_list = []
-    both_files_affected_count_list = []
-    one_instance_affected_count_list = []
-    both_instances_affected_count_list = []
-    # instance metrics
-    file_affected_count_list = []
-    sum_affected_count_list = []
-
-    clone_findings_count_list = []
-
-    for run in successful_runs:
-        alert_commit_timestamp, results = run
-        for r in results:
-            one_file_affected_count_list.append(r.one_file_affected_count)
-            both_files_affected_count_list.append(r.both_files_affected_count)
-            one_instance_affected_count_list.append(r.one_instance_affected_count)
-            both_instances_affected_count_list.append(r.both_instances_affected_count)
-            file_affected_count_list.append(r.instance_metrics.file_affected_count)
-            file_affected_count_list.append(r.sibling_instance_metrics.file_affected_count)
-            sum_affected_count_list.append(r.instance_metrics.instance_affected_count)
-            sum_affected_count_list.append(r.sibling_instance_metrics.instance_affected_count)
-            clone_findings_count_list.append(r.clone_findings_count)
-
-    if with_file_affections:
-        all_data = [
-            sum_affected_count_list, one_instance_affected_count_list, both_instances_affected_count_list
-            , file_affected_count_list, one_file_affected_count_list, both_files_affected_count_list, clone_findings_count_list
-        ]
-    else:
-        all_data = [
-            sum_affected_count_list, one_instance_affected_count_list, both_instances_affected_count_list
-            , clone_findings_count_list
-        ]
+    distributions: dict[str, np.ndarray] = aggregate.get_distributions(with_file_affections)
+    all_data = list(distributions.values())
+    if aggregated is None:
+        aggregated = max(len(data) for data in all_data) > AGGREGATE_THRESHOLD
 
     # plot violin plot
     if boxplot:
@@ -175,70 +205,52 @@ def plot_instance_metrics(project, successful_runs, failed_runs, boxplot=False,
         flierprops = dict(markerfacecolor='0.75', markersize=2,
                           linestyle='none')
         colormap = 'plasma'
-        axs = sns.boxplot(data=all_data, dodge=True, palette=colormap, orient='h', showfliers=False, flierprops=flierprops, **PROPS)
-        axs = sns.stripplot(data=all_data, jitter=True, marker="D", size=2, orient="h", palette=colormap, edgecolor='black', alpha=1)
+        if aggregated:
+            plot_aggregated_box(axs, distributions, PROPS, colormap)
+        else:
+            axs = sns.boxplot(data=all_data, dodge=True, palette=colormap, orient='h', showfliers=False, flierprops=flierprops,
+                              **PROPS)
+            axs = sns.stripplot(data=all_data, jitter=True, marker="D", size=2, orient="h", palette=colormap, edgecolor='black',
+                                alpha=1)
 
         # axs.boxplot(all_data, showmeans=False, vert=False)
+    elif aggregated:
+        plot_aggregated_violin(axs, distributions)
     else:
         axs.violinplot(all_data, showmeans=False, showmedians=True, vert=False)
     axs.set_title('Instance Metrics')
 
     # adding vertical grid lines
     axs.xaxis.grid(True)
-    total = []
-    for i in all_data:
-        total += i
+    total_max = int(max(np.max(data, initial=0) for data in all_data))
     if with_file_affections:
-        axs.set_xticks([x for x in range(0, max(total) + 1, 9)])
+        axs.set_xticks([x for x in range(0, total_max + 1, 9)])
     else:
-        axs.set_xticks([x for x in range(0, max(total) + 1, 3)])
+        axs.set_xticks([x for x in range(0, total_max + 1, 3)])
     # add y-tick labels
 
-    plt.setp(
-        axs, yticks=[y if boxplot else y + 1 for y in range(len(all_data))]
-        , yticklabels=[
-            'Sum Instance Affected', 'One Instance Affected', 'Both Instances Affected', 'Sum File Affected', 'One File Affected'
-            , 'Both Files Affected', 'New Clone Findings'
-        ] if with_file_affections else [
-            'Sum Instance Affected', 'One Instance Affected', 'Both Instances Affected', 'New Clone Findings'
-        ]
-    )
+    plt.setp(axs, yticks=[y if boxplot else y + 1 for y in range(len(all_data))], yticklabels=list(distributions.keys()))
     axs.invert_yaxis()
-    fig.canvas.set_window_title(get_window_title(project))
+    set_window_title(fig, project)
     fig.tight_layout()
     if pgf:
         if boxplot:
             plt.savefig(get_pgf_dir(project) + project + '_box.pgf')
         else:
             plt.savefig(get_pgf_dir(project) + project + '_violin.pgf')
+    return fig
 
 
-def plot_bar(project, successful_runs, successful_result_count, pgf=False):
+def plot_bar(project, aggregate: ResultAggregate, pgf=False):
     # maybe save as percentage diagram
-    instance_deleted_count = 0
-    sibling_deleted_count = 0
-    one_instance_deleted_count = 0
-    both_instances_deleted_count = 0
-    instance_time_alive = 0
-    sibling_time_alive = 0
-
-    life_time_sum = 0
-    for run in successful_runs:
-        alert_commit_timestamp, results = run
-        for r in results:
-            r: AnalysisResult
-            instance_time_alive += r.instance_metrics.time_alive
-            sibling_time_alive += r.sibling_instance_metrics.time_alive
-            if r.instance_metrics.deleted:
-                instance_deleted_count += 1
-                life_time_sum += r.instance_metrics.time_alive
-            if r.sibling_instance_metrics.deleted:
-                sibling_deleted_count += 1
-                life_time_sum += r.sibling_instance_metrics.time_alive
-            if r.instance_metrics.deleted and r.sibling_instance_metrics.deleted:
-                both_instances_deleted_count += 1
-            elif r.instance_metrics.deleted or r.sibling_instance_metrics.deleted:
-                one_instance_deleted_count += 1
+    successful_result_count = aggregate.successful_result_count
+    instance_deleted_count = aggregate.instance_deleted_count
+    sibling_deleted_count = aggregate.sibling_deleted_count
+    both_instances_deleted_count = aggregate.both_instances_deleted_count
+    one_instance_deleted_count = aggregate.one_instance_deleted_count
+    instance_time_alive = aggregate.instance_time_alive_sum
+    sibling_time_alive = aggregate.sibling_time_alive_sum
+
     labels = ['Instance Deleted', 'Sibling Deleted', 'One Instance Deleted', 'Both Instances Deleted']
     true_count = [instance_deleted_count, sibling_deleted_count, one_instance_deleted_count, both_instances_deleted_count]
     false_count = [
@@ -261,8 +273,8 @@ def plot_bar(project, successful_runs, successful_result_count, pgf=False):
     ax.set_yticklabels(labels)
     ax.invert_yaxis()
     ax.legend()
-    avg_time_alive = round((instance_time_alive + sibling_time_alive) / (2 * successful_result_count))
-    avg_time_until_deletion = round(life_time_sum / (instance_deleted_count + sibling_deleted_count))
+    avg_time_alive = aggregate.get_average_time_alive()
+    avg_time_until_deletion = aggregate.get_average_time_until_deletion()
     ax.set_title('Deletion Metrics')
     #    ax.bar_label(rects1, padding=3)
     #   ax.bar_label(rects2, padding=3)
@@ -270,7 +282,7 @@ def plot_bar(project, successful_runs, successful_result_count, pgf=False):
     ax.text(x=0, y=4.5, s='Average instance lifetime = ' + display_time(round(instance_time_alive / successful_result_count)))
     ax.text(x=0, y=4.9, s='Average sibling lifetime = ' + display_time(round(sibling_time_alive / successful_result_count)))
     ax.text(x=0, y=5.3, s='If deleted, avg time until deletion = ' + display_time(round(avg_time_until_deletion)))
-    fig.canvas.set_window_title(get_window_title(project))
+    set_window_title(fig, project)
 
     for p in ax.patches:
         width = p.get_width()
@@ -282,3 +294,4 @@ def plot_bar(project, successful_runs, successful_result_count, pgf=False):
 
     if pgf:
         plt.savefig(get_pgf_dir(project) + project + '_bar.pgf')
+    return fig
@@ -1,10 +1,20 @@
+import atexit
 import enum
+import os
+import queue
+import re
+import sys
+import threading
+import time
 from datetime import datetime
+from typing import Callable, TextIO, Union
 
 from colorama import Fore, Style
 
 separator_width = 32
 
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
 SEPARATOR = Fore.LIGHTBLACK_EX + Style.DIM + separator_width * "∇Δ" + Style.RESET_ALL
 
 
@@ -21,6 +31,21 @@ class LogLevel(enum.Enum):
         return self.value <= other.value
 
 
+# a message or a function building it. Functions are only called if the level is enabled
+Message = Union[str, Callable[[], str]]
+
+# module name (or its last components, e.g. 'analysis.analysis' or 'api') -> log level. Overrides the printer's default
+module_levels: dict[str, LogLevel] = {}
+
+
+def set_module_levels(spec: str):
+    """Sets the log levels of modules from a comma separated list like 'analysis=INFO,api=DEBUG'.
+    A level without module name, e.g. 'INFO', applies to every module."""
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        name, _, level = entry.rpartition("=")
+        module_levels[name] = LogLevel[level.upper()]
+
+
 def stuff_text(text: str):
     return text.replace("\n", "\n" + get_empty_prefix())
 
@@ -29,8 +54,16 @@ def get_empty_prefix():
     return len(get_prefix()) * " "
 
 
+_prefix_cache: tuple[int, str] = (-1, "")
+
+
 def get_prefix():
-    return get_current_time()
+    """the current time. Formatted at most once per second"""
+    global _prefix_cache
+    second = int(time.time())
+    if _prefix_cache[0] != second:
+        _prefix_cache = (second, get_current_time())
+    return _prefix_cache[1]
 
 
 def get_current_time():
@@ -39,32 +72,137 @@ def get_current_time():
     return dt_string
 
 
+class LogWriter:
+    """Writes log messages on a background thread. A message is written with a single write call, so messages of
+    parallel workers do not interleave. Optionally, messages are also written to a file without colors, which is rotated
+    when it exceeds max_bytes. Processes should use their own file."""
+
+    def __init__(self, stream: TextIO = None, file_name: str = None, max_bytes: int = 50_000_000, backup_count: int = 3):
+        self.stream = stream
+        self.file_name = file_name
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(file_name, "a", encoding="utf-8") if file_name is not None else None
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str):
+        if self._thread.is_alive():
+            self._queue.put(message)
+        else:
+            # closed, or in a forked process without the writer thread
+            self._write([message])
+
+    def _run(self):
+        stopped = False
+        while not stopped:
+            # write everything that is queued at once
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            messages = [item for item in items if isinstance(item, str)]
+            if messages:
+                self._write(messages)
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is None:
+                    stopped = True
+
+    def _write(self, messages: [str]):
+        text = "".join(message + "\n" for message in messages)
+        stream = sys.stdout if self.stream is None else self.stream
+        stream.write(text)
+        stream.flush()
+        if self._file is not None:
+            self._file.write(ANSI_ESCAPE.sub("", text))
+            self._file.flush()
+            if self._file.tell() > self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(self.file_name + "." + str(i)):
+                os.replace(self.file_name + "." + str(i), self.file_name + "." + str(i + 1))
+        if self.backup_count > 0:
+            os.replace(self.file_name, self.file_name + ".1")
+        else:
+            os.remove(self.file_name)
+        self._file = open(self.file_name, "a", encoding="utf-8")
+
+    def close(self):
+        """writes the queued messages and stops the writer. Later messages are written directly"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def flush(self):
+        """waits until the queued messages are written"""
+        if self._thread.is_alive():
+            done = threading.Event()
+            self._queue.put(done)
+            done.wait()
+
+
+log_writer: LogWriter = LogWriter()
+
+
+def set_log_writer(writer: LogWriter):
+    """replaces the writer of all printers, e.g. to additionally log to a file"""
+    global log_writer
+    old_writer = log_writer
+    log_writer = writer
+    old_writer.close()
+
+
+atexit.register(lambda: log_writer.close())
+
+
 class MyPrinter:
     LOG_LEVEL = LogLevel.NONE
 
-    def __init__(self, level: LogLevel):
+    def __init__(self, level: LogLevel, name: str = None):
         self.LOG_LEVEL = level
+        # the module name to look up its configured level
+        self.name = name
+
+    def get_level(self) -> LogLevel:
+        if self.name is not None:
+            for configured_name, level in module_levels.items():
+                if configured_name and (self.name == configured_name or self.name.endswith("." + configured_name)):
+                    return level
+        return module_levels.get("", self.LOG_LEVEL)
+
+    def is_enabled(self, level: LogLevel) -> bool:
+        return level.compare(self.get_level())
 
     def separator(self, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + SEPARATOR)
+        if self.is_enabled(level):
+            log_writer.write(get_prefix() + SEPARATOR)
+
+    def _print(self, style: str, text: Message, level: LogLevel):
+        if not self.is_enabled(level):
+            return
+        if callable(text):
+            text = text()
+        log_writer.write(get_prefix() + style + stuff_text(text) + Style.RESET_ALL)
 
-    def yellow(self, text: str, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + Fore.YELLOW + Style.DIM + stuff_text(text) + Style.RESET_ALL)
+    def yellow(self, text: Message, level: LogLevel = LogLevel.NONE):
+        self._print(Fore.YELLOW + Style.DIM, text, level)
 
-    def white(self, text: str, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + Style.RESET_ALL + stuff_text(text))
+    def white(self, text: Message, level: LogLevel = LogLevel.NONE):
+        self._print(Style.RESET_ALL, text, level)
 
-    def blue(self, text: str, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + Fore.LIGHTBLUE_EX + Style.DIM + stuff_text(text) + Style.RESET_ALL)
+    def blue(self, text: Message, level: LogLevel = LogLevel.NONE):
+        self._print(Fore.LIGHTBLUE_EX + Style.DIM, text, level)
 
-    def red(self, text: str, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + Fore.LIGHTRED_EX + Style.DIM + stuff_text(text) + Style.RESET_ALL)
+    def red(self, text: Message, level: LogLevel = LogLevel.NONE):
+        self._print(Fore.LIGHTRED_EX + Style.DIM, text, level)
 
-    def green(self, text: str, level: LogLevel = LogLevel.NONE):
-        if level.compare(self.LOG_LEVEL):
-            print(get_prefix() + Fore.GREEN + Style.DIM + stuff_text(text) + Style.RESET_ALL)
+    def green(self, text: Message, level: LogLevel = LogLevel.NONE):
+        self._print(Fore.GREEN + Style.DIM, text, level)
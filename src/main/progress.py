@@ -0,0 +1,108 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from typing import TextIO
+
+from src.main.api.api_utils import api_statistics, ApiStatistics
+from src.main.utils.time_utils import display_time
+
+
+class ProgressReporter:
+    """Reports the progress of an analysis: alert commits done out of the total, commits processed per running alert
+    commit, requests per second, the hit rate of the clone finding index cache and an ETA.
+
+    The ETA uses the moving average of the time between the last finished alert commits, so it adapts to parallel workers.
+    On a TTY the progress is a single status line that is rewritten in place, otherwise a JSON record is written
+    periodically. Updates only count; output is rate limited by the interval, so the overhead is negligible."""
+
+    def __init__(self, total: int, done: int = 0, stream: TextIO = None, interval: float = None, window: int = 20,
+                 statistics: ApiStatistics = api_statistics, cache=None):
+        self.total = total
+        self.done = done
+        self.failed = 0
+        self.stream = sys.stderr if stream is None else stream
+        self.tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.interval = (0.5 if self.tty else 60.0) if interval is None else interval
+        self.statistics = statistics
+        self.cache = cache
+        # alert commit timestamp -> commits processed. Only the running alert commits
+        self.running: dict[int, int] = {}
+        self.commit_count = 0
+        self.start = time.monotonic()
+        self.start_request_count = statistics.get_request_count()
+        self.finish_times: deque[float] = deque([self.start], maxlen=window + 1)
+        self._last_report = float("-inf")
+        self._lock = threading.Lock()
+
+    def start_alert_commit(self, alert_commit_timestamp: int):
+        with self._lock:
+            self.running[alert_commit_timestamp] = 0
+        self.report()
+
+    def commit_processed(self, alert_commit_timestamp: int):
+        with self._lock:
+            self.running[alert_commit_timestamp] = self.running.get(alert_commit_timestamp, 0) + 1
+            self.commit_count += 1
+        self.report()
+
+    def finish_alert_commit(self, alert_commit_timestamp: int, failed=False):
+        with self._lock:
+            self.running.pop(alert_commit_timestamp, None)
+            self.done += 1
+            self.failed += failed
+            self.finish_times.append(time.monotonic())
+        self.report()
+
+    def get_eta(self) -> float:
+        """the expected remaining seconds. None until the first alert commit is finished"""
+        if len(self.finish_times) < 2:
+            return None
+        seconds_per_alert_commit = (self.finish_times[-1] - self.finish_times[0]) / (len(self.finish_times) - 1)
+        return seconds_per_alert_commit * (self.total - self.done)
+
+    def get_record(self) -> dict:
+        elapsed = time.monotonic() - self.start
+        requests = self.statistics.get_request_count() - self.start_request_count
+        record = {
+            "done": self.done, "total": self.total, "failed": self.failed, "commits": self.commit_count,
+            "running": dict(self.running), "elapsed_seconds": round(elapsed, 1),
+            "requests_per_second": round(requests / elapsed, 2) if elapsed > 0 else 0.0,
+            "cache_hit_rate": None, "eta_seconds": None
+        }
+        if self.cache is not None and self.cache.hits + self.cache.misses:
+            record["cache_hit_rate"] = round(self.cache.hits / (self.cache.hits + self.cache.misses), 3)
+        eta = self.get_eta()
+        if eta is not None:
+            record["eta_seconds"] = round(eta, 1)
+        return record
+
+    def format_status_line(self, record: dict) -> str:
+        line = "{done}/{total} alert commits ({percent:.0%}), {failed} failed, {commits} commits, {rps} req/s".format(
+            percent=record["done"] / record["total"] if record["total"] else 1.0, rps=record["requests_per_second"], **record
+        )
+        if record["cache_hit_rate"] is not None:
+            line += ", cache hits " + "{0:.0%}".format(record["cache_hit_rate"])
+        if record["eta_seconds"] is not None:
+            line += ", ETA " + (display_time(int(record["eta_seconds"] * 1000)) or "< 1 second")
+        return line
+
+    def report(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        with self._lock:
+            self._last_report = now
+            record = self.get_record()
+            if self.tty:
+                self.stream.write("\r\033[K" + self.format_status_line(record))
+            else:
+                self.stream.write(json.dumps({"progress": record}) + "\n")
+            self.stream.flush()
+
+    def close(self):
+        self.report(force=True)
+        if self.tty:
+            self.stream.write("\n")
+            self.stream.flush()
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+
+from defintions import get_pgf_dir
+from src.main.aggregation import ResultAggregate
+from src.main.pretty_print import MyPrinter, LogLevel
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+FIGURES = ("pie", "bar", "box", "violin")
+# keyword arguments of the plot function of each figure. Part of the fingerprint
+FIGURE_PARAMS = {
+    "pie": {},
+    "bar": {},
+    "box": {"boxplot": True, "with_file_affections": True},
+    "violin": {"boxplot": False, "with_file_affections": True},
+}
+# fingerprints of the rendered files, in the pgf directory
+RENDER_CACHE_FILE_NAME = "render_cache.json"
+
+
+def get_figure_file_name(directory: str, project: str, figure: str, file_format: str) -> str:
+    return directory + project + '_' + figure + '.' + file_format
+
+
+def get_figure_params(figure: str, aggregate: ResultAggregate) -> dict:
+    if figure == "pie":
+        return {"analysis_error": len(aggregate.failed_runs) > 0}
+    return FIGURE_PARAMS[figure]
+
+
+def get_figure_data(figure: str, aggregate: ResultAggregate) -> list:
+    """the part of the aggregate a figure shows"""
+    if figure == "pie":
+        return [[c.value for c in aggregate.category_counts], list(aggregate.category_counts.values()), len(aggregate.failed_runs)]
+    if figure == "bar":
+        return [
+            aggregate.successful_result_count, aggregate.instance_deleted_count, aggregate.sibling_deleted_count,
+            aggregate.one_instance_deleted_count, aggregate.both_instances_deleted_count, aggregate.instance_time_alive_sum,
+            aggregate.sibling_time_alive_sum, aggregate.lifetime_sum
+        ]
+    return list(aggregate.get_distributions(FIGURE_PARAMS[figure]["with_file_affections"]).items())
+
+
+@cache
+def get_code_version() -> str:
+    """hash of the sources that draw the figures"""
+    from src.main import plotter
+    sha = hashlib.sha256()
+    for module_file in (plotter.__file__, __file__):
+        with open(module_file, "rb") as file:
+            sha.update(file.read())
+    return sha.hexdigest()
+
+
+def get_fingerprint(project: str, figure: str, aggregate: ResultAggregate, rc_params: dict) -> str:
+    """Fingerprint of everything a rendered figure depends on: the data, the plot parameters, the rcParams and the code
+    that draws it."""
+    import matplotlib
+    sha = hashlib.sha256()
+    sha.update(json.dumps([project, figure, get_figure_params(figure, aggregate), matplotlib.__version__, get_code_version()],
+                          sort_keys=True).encode())
+    # the backend does not change the output of savefig
+    effective_rc_params = {key: value for key, value in matplotlib.rcParams.items() if not key.startswith("backend")}
+    effective_rc_params.update(rc_params)
+    sha.update(repr(sorted(effective_rc_params.items())).encode())
+    for value in get_figure_data(figure, aggregate):
+        if isinstance(value, tuple):
+            label, array = value
+            array = np.ascontiguousarray(array)
+            sha.update(json.dumps([label, str(array.dtype), array.shape]).encode())
+            sha.update(array.tobytes())
+        else:
+            sha.update(json.dumps(value).encode())
+    return sha.hexdigest()
+
+
+def read_render_cache(directory: str) -> dict[str, str]:
+    try:
+        with open(directory + RENDER_CACHE_FILE_NAME, "r") as file:
+            return json.load(file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def write_render_cache(directory: str, render_cache: dict[str, str]):
+    with open(directory + RENDER_CACHE_FILE_NAME + ".tmp", "w") as file:
+        json.dump(render_cache, file, indent=1, sort_keys=True)
+    os.replace(directory + RENDER_CACHE_FILE_NAME + ".tmp", directory + RENDER_CACHE_FILE_NAME)
+
+
+def render_figure(directory: str, project: str, figure: str, aggregate: ResultAggregate, file_formats: [str]) -> [str]:
+    """Draws one figure on the non-interactive Agg backend and saves it in the given formats. Runs in a worker process.
+    PGF output uses the LaTeX settings of the thesis, so it is rendered separately from PNG and SVG."""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib import pyplot as plt
+    from src.main.plotter import plot_pie, plot_bar, plot_instance_metrics, PGF_RC_PARAMS
+
+    rc_params = PGF_RC_PARAMS if "pgf" in file_formats else {}
+    params = get_figure_params(figure, aggregate)
+    with matplotlib.rc_context(rc_params):
+        if figure == "pie":
+            fig = plot_pie(project, aggregate, **params)
+        elif figure == "bar":
+            fig = plot_bar(project, aggregate, **params)
+        else:
+            fig = plot_instance_metrics(project, aggregate, **params)
+        file_names = []
+        for file_format in file_formats:
+            file_names.append(get_figure_file_name(directory, project, figure, file_format))
+            fig.savefig(file_names[-1], format=file_format)
+    plt.close(fig)
+    return file_names
+
+
+def render_results(project: str, aggregate: ResultAggregate, file_formats: [str] = ("png",), workers: int = None,
+                   use_cache=True) -> [str]:
+    """Renders all figures to files in the pgf directory of the project without showing them. Every figure is drawn in
+    its own worker process, so the LaTeX runs of PGF output happen in parallel.
+    A figure is skipped if its files exist and were rendered with the same fingerprint. Returns the rendered file names."""
+    from src.main.plotter import PGF_RC_PARAMS
+
+    directory: str = get_pgf_dir(project)
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    format_groups = [[f] for f in file_formats if f == "pgf"] + [[f for f in file_formats if f != "pgf"]]
+    render_cache: dict[str, str] = read_render_cache(directory) if use_cache else {}
+    tasks = []
+    skipped_count = 0
+    for group in format_groups:
+        if not group:
+            continue
+        for figure in FIGURES:
+            fingerprint = get_fingerprint(project, figure, aggregate, PGF_RC_PARAMS if "pgf" in group else {})
+            file_names = [get_figure_file_name(directory, project, figure, f) for f in group]
+            if all(render_cache.get(os.path.basename(f)) == fingerprint and os.path.isfile(f) for f in file_names):
+                skipped_count += len(file_names)
+                continue
+            tasks.append((figure, group, fingerprint))
+    if workers is None:
+        workers = min(len(tasks), os.cpu_count() or 1)
+
+    if workers <= 1:
+        rendered = [render_figure(directory, project, figure, aggregate, group) for figure, group, fingerprint in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(render_figure, directory, project, figure, aggregate, group) for figure, group, fingerprint in tasks
+            ]
+            rendered = [future.result() for future in futures]
+
+    file_names = []
+    for (figure, group, fingerprint), names in zip(tasks, rendered):
+        for file_name in names:
+            render_cache[os.path.basename(file_name)] = fingerprint
+            file_names.append(file_name)
+    write_render_cache(directory, render_cache)
+    printer.blue("Rendered " + str(len(file_names)) + " files to " + directory + ". Up to date: " + str(skipped_count), LogLevel.INFO)
+    return file_names
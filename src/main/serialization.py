@@ -0,0 +1,192 @@
+import gzip
+import json
+from dataclasses import fields
+from typing import Callable
+
+from defintions import SCHEMA_VERSION
+from src.main.analysis.analysis_utils import AnalysisResult, InstanceMetrics
+from src.main.api.data import Commit, CommitAlert, CommitAlertContext, TextRegionLocation
+
+# older versions of SCHEMA_VERSION are migrated in decode_content
+TYPE_KEY = "$type"
+
+GZIP = "gzip"
+ZSTD = "zstd"
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# type -> (name, encode), name -> decode
+encoders: dict[type, tuple[str, Callable[[object], dict]]] = {}
+decoders: dict[str, Callable[[dict], object]] = {}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def register_type(cls: type, encode: Callable[[object], dict], decode: Callable[[dict], object], name: str = None):
+    """makes instances of cls serializable. encode returns the fields as dict, decode creates the instance from it."""
+    name = cls.__name__ if name is None else name
+    encoders[cls] = (name, encode)
+    decoders[name] = decode
+
+
+def register_dataclass(cls: type):
+    """registers a dataclass whose fields are plain values"""
+    names = [f.name for f in fields(cls)]
+    register_type(cls, lambda o: {name: getattr(o, name) for name in names}, lambda d: cls(**{name: d[name] for name in names}))
+
+
+def encode(value):
+    """converts a value to plain JSON data. Registered objects are tagged with their type name, tuples become lists."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): encode(v) for k, v in value.items()}
+    try:
+        name, encode_type = encoders[type(value)]
+    except KeyError:
+        raise SchemaError("No schema for " + type(value).__name__)
+    d = encode_type(value)
+    d[TYPE_KEY] = name
+    return d
+
+
+def decode(value):
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    if isinstance(value, dict):
+        name = value.get(TYPE_KEY)
+        if name is None:
+            return {k: decode(v) for k, v in value.items()}
+        try:
+            return decoders[name](value)
+        except KeyError:
+            raise SchemaError("No schema for " + name)
+    return value
+
+
+# region schema of the data classes. Nested values of known type are not tagged
+
+def encode_commit(c: Commit) -> dict:
+    return {"branch": c.branch, "timestamp": c.timestamp, "commit_type": c.commit_type, "parent_commits": c.parent_commits}
+
+
+def decode_commit(d: dict) -> Commit:
+    return Commit(d["branch"], d["timestamp"], d["commit_type"], d["parent_commits"])
+
+
+def encode_location(loc: TextRegionLocation) -> dict:
+    return {
+        "location": loc.location, "raw_end_line": loc.raw_end_line, "raw_end_offset": loc.raw_end_offset,
+        "raw_start_line": loc.raw_start_line, "raw_start_offset": loc.raw_start_offset, "location_type": loc.location_type,
+        "uniform_path": loc.uniform_path
+    }
+
+
+def decode_location(d: dict) -> TextRegionLocation:
+    return TextRegionLocation(d["location"], d["raw_end_line"], d["raw_end_offset"], d["raw_start_line"], d["raw_start_offset"],
+                              d["location_type"], d["uniform_path"])
+
+
+def encode_commit_alert(a: CommitAlert) -> dict:
+    ctx: CommitAlertContext = a.context
+    return {
+        "message": a.message, "expected_clone_location": encode_location(ctx.expected_clone_location),
+        "expected_sibling_location": encode_location(ctx.expected_sibling_location),
+        "old_clone_location": encode_location(ctx.old_clone_location), "removed_clone_id": ctx.removed_clone_id
+    }
+
+
+def decode_commit_alert(d: dict) -> CommitAlert:
+    return CommitAlert(CommitAlertContext(
+        decode_location(d["expected_clone_location"]), decode_location(d["expected_sibling_location"]),
+        decode_location(d["old_clone_location"]), d["removed_clone_id"]
+    ), d["message"])
+
+
+def encode_instance_metrics(m: InstanceMetrics) -> dict:
+    return {
+        "corrected_start_line": m.corrected_start_line, "corrected_end_line": m.corrected_end_line,
+        "file_affected_count": m.file_affected_count, "instance_affected_count": m.instance_affected_count,
+        "deleted": m.deleted, "uniform_path": m.uniform_path, "time_alive": m.time_alive
+    }
+
+
+def decode_instance_metrics(d: dict) -> InstanceMetrics:
+    m = InstanceMetrics(d["corrected_start_line"], d["corrected_end_line"], d["file_affected_count"], d["instance_affected_count"],
+                        d["deleted"], d["uniform_path"])
+    m.time_alive = d["time_alive"]
+    return m
+
+
+def encode_analysis_result(r: AnalysisResult) -> dict:
+    return {
+        "project": r.project, "first_commit": r.first_commit, "most_recent_commit": r.most_recent_commit,
+        "analysed_until": r.analysed_until, "commit_alert": encode_commit_alert(r.commit_alert),
+        "instance_metrics": encode_instance_metrics(r.instance_metrics),
+        "sibling_instance_metrics": encode_instance_metrics(r.sibling_instance_metrics),
+        "one_file_affected_count": r.one_file_affected_count, "both_files_affected_count": r.both_files_affected_count,
+        "one_instance_affected_count": r.one_instance_affected_count,
+        "both_instances_affected_count": r.both_instances_affected_count, "clone_findings_count": r.clone_findings_count,
+        "finished": r.finished
+    }
+
+
+def decode_analysis_result(d: dict) -> AnalysisResult:
+    return AnalysisResult(
+        d["project"], d["first_commit"], d["most_recent_commit"], d["analysed_until"], decode_commit_alert(d["commit_alert"]),
+        decode_instance_metrics(d["instance_metrics"]), decode_instance_metrics(d["sibling_instance_metrics"]),
+        d["one_file_affected_count"], d["both_files_affected_count"], d["one_instance_affected_count"],
+        d["both_instances_affected_count"], d["clone_findings_count"], d["finished"]
+    )
+
+
+register_type(Commit, encode_commit, decode_commit)
+register_type(TextRegionLocation, encode_location, decode_location)
+register_type(CommitAlert, encode_commit_alert, decode_commit_alert)
+register_type(InstanceMetrics, encode_instance_metrics, decode_instance_metrics)
+register_type(AnalysisResult, encode_analysis_result, decode_analysis_result)
+
+
+# endregion
+
+def dumps(content, compression: str = None) -> bytes:
+    """encodes content as versioned JSON document, optionally compressed with gzip or zstd"""
+    data = json.dumps({"schema": SCHEMA_VERSION, "content": encode(content)}, separators=(",", ":")).encode()
+    if compression is None:
+        return data
+    if compression == GZIP:
+        return gzip.compress(data, compresslevel=6)
+    if compression == ZSTD:
+        import zstandard
+        return zstandard.ZstdCompressor().compress(data)
+    raise ValueError("Unknown compression " + compression)
+
+
+def decompress(data: bytes) -> bytes:
+    """detects the compression by the magic bytes"""
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=2 ** 31)
+    return data
+
+
+def is_versioned(data: bytes) -> bool:
+    """False for files written by older versions with jsonpickle"""
+    return data.startswith(GZIP_MAGIC) or data.startswith(ZSTD_MAGIC) or data.lstrip().startswith(b'{"schema"')
+
+
+def loads(data: bytes):
+    document = json.loads(decompress(data))
+    return decode_content(document["schema"], document["content"])
+
+
+def decode_content(schema: int, content):
+    if schema != SCHEMA_VERSION:
+        raise SchemaError("Unsupported schema version " + str(schema))
+    return decode(content)
@@ -0,0 +1,213 @@
+"""Statistics of the stored results: the category counts of the pie chart, the deletion metrics of the bar chart and the
+counter distributions. They are computed by aggregate_results like the figures. Reads the result log without decoding
+the results to objects, so it takes milliseconds and needs neither the plotting libraries nor a server.
+
+Call ```python -m src.main.stats --help``` from the repository root, or ```python main.py stats```."""
+import argparse
+import fnmatch
+import json
+import os
+import sys
+
+import numpy as np
+
+from defintions import get_result_log_file_name, SCHEMA_VERSION
+from src.main.aggregation import ResultColumns, ResultAggregate, aggregate_results
+from src.main.analysis.result_metrics import get_category, CATEGORIES
+from src.main import pretty_print
+from src.main.pretty_print import MyPrinter, LogLevel
+from src.main.utils.time_utils import display_time
+
+printer: MyPrinter = MyPrinter(LogLevel.INFO, __name__)
+
+SUCCESSFUL = "successful"
+FAILED = "failed"
+UNFINISHED = "unfinished"
+ANALYSIS_ERROR = "Analysis Error"
+
+# value of a column for an encoded result, see COLUMNS in columnar
+COLUMNS = {
+    "category": lambda r: CATEGORIES.index(get_category(
+        r["instance_metrics"]["deleted"], r["sibling_instance_metrics"]["deleted"], r["clone_findings_count"],
+        r["one_instance_affected_count"], r["both_instances_affected_count"])),
+    "one_file_affected_count": lambda r: r["one_file_affected_count"],
+    "both_files_affected_count": lambda r: r["both_files_affected_count"],
+    "one_instance_affected_count": lambda r: r["one_instance_affected_count"],
+    "both_instances_affected_count": lambda r: r["both_instances_affected_count"],
+    "clone_findings_count": lambda r: r["clone_findings_count"],
+    "instance_file_affected_count": lambda r: r["instance_metrics"]["file_affected_count"],
+    "instance_affected_count": lambda r: r["instance_metrics"]["instance_affected_count"],
+    "instance_deleted": lambda r: r["instance_metrics"]["deleted"],
+    "instance_time_alive": lambda r: r["instance_metrics"]["time_alive"],
+    "sibling_file_affected_count": lambda r: r["sibling_instance_metrics"]["file_affected_count"],
+    "sibling_affected_count": lambda r: r["sibling_instance_metrics"]["instance_affected_count"],
+    "sibling_deleted": lambda r: r["sibling_instance_metrics"]["deleted"],
+    "sibling_time_alive": lambda r: r["sibling_instance_metrics"]["time_alive"],
+}
+
+
+class ResultFilter:
+    """selects alert commits by their timestamp and results by the paths of their instances"""
+
+    def __init__(self, since: int = None, until: int = None, path_pattern: str = None):
+        self.since = since
+        self.until = until
+        self.path_pattern = path_pattern
+
+    def accepts_run(self, alert_commit_timestamp: int) -> bool:
+        return (self.since is None or alert_commit_timestamp >= self.since) and (self.until is None or alert_commit_timestamp < self.until)
+
+    def accepts_result(self, result: dict) -> bool:
+        """a result matches if the path of one of its instances matches, at the alert commit or after a move"""
+        if self.path_pattern is None:
+            return True
+        context = result["commit_alert"]
+        paths = (context["expected_clone_location"]["uniform_path"], context["expected_sibling_location"]["uniform_path"],
+                 result["instance_metrics"]["uniform_path"], result["sibling_instance_metrics"]["uniform_path"])
+        return any(path is not None and fnmatch.fnmatch(path, self.path_pattern) for path in paths)
+
+
+def read_runs(file_name: str) -> dict[int, dict]:
+    """returns the latest encoded record of every alert commit in the result log"""
+    records: dict[int, dict] = {}
+    with open(file_name, "r") as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # the last line of a crashed run
+                continue
+            if "schema" not in record:
+                raise ValueError(file_name + " was written by an older version. Run the stats command of main.py once to migrate it")
+            if record["schema"] != SCHEMA_VERSION:
+                raise ValueError(file_name + " has the unsupported schema version " + str(record["schema"]))
+            records[record["timestamp"]] = record
+    return records
+
+
+def describe(values: np.ndarray) -> dict:
+    if not len(values):
+        return {"count": 0, "mean": None, "min": None, "q1": None, "median": None, "q3": None, "p90": None, "max": None}
+    q1, median, q3, p90 = (float(v) for v in np.quantile(values, (0.25, 0.5, 0.75, 0.9)))
+    return {"count": len(values), "mean": float(np.mean(values)), "min": int(np.min(values)), "q1": q1, "median": median,
+            "q3": q3, "p90": p90, "max": int(np.max(values))}
+
+
+def filter_columns(records: dict[int, dict], result_filter: ResultFilter) -> (ResultColumns, dict[str, int]):
+    """Returns the columns of the matching results of successful runs and the number of matching runs by kind. A path
+    filter only keeps results, so failed runs are left out then."""
+    runs = {SUCCESSFUL: 0, FAILED: 0, UNFINISHED: 0}
+    values: dict[str, list] = {name: [] for name in ("alert_timestamp", *COLUMNS)}
+    successful_runs, failed_runs = [], []
+    for timestamp, record in sorted(records.items()):
+        if not result_filter.accepts_run(timestamp):
+            continue
+        if record["kind"] == FAILED:
+            if result_filter.path_pattern is None:
+                runs[FAILED] += 1
+                failed_runs.append(timestamp)
+            continue
+        results = [r for r in record["results"] or [] if result_filter.accepts_result(r)]
+        if not results:
+            continue
+        runs[record["kind"]] += 1
+        if record["kind"] != SUCCESSFUL:
+            continue
+        successful_runs.append(timestamp)
+        for result in results:
+            values["alert_timestamp"].append(timestamp)
+            for name, get_value in COLUMNS.items():
+                values[name].append(get_value(result))
+    columns = {name: np.asarray(column, dtype=np.bool_ if name.endswith("_deleted") else np.int64)
+               for name, column in values.items()}
+    return ResultColumns(columns, np.asarray(successful_runs, dtype=np.int64), np.asarray(failed_runs, dtype=np.int64)), runs
+
+
+def compute_stats(records: dict[int, dict], result_filter: ResultFilter = None) -> dict:
+    """computes the statistics of the successful runs with aggregate_results. Failed runs count as analysis errors."""
+    result_columns, runs = filter_columns(records, result_filter or ResultFilter())
+    aggregate: ResultAggregate = aggregate_results(result_columns)
+    result_count = aggregate.successful_result_count
+    return {
+        "runs": runs,
+        "result_count": result_count,
+        "categories": {**{c.value: count for c, count in aggregate.category_counts.items()}, ANALYSIS_ERROR: runs[FAILED]},
+        "deletion": {
+            "instance_deleted": aggregate.instance_deleted_count, "sibling_deleted": aggregate.sibling_deleted_count,
+            "one_instance_deleted": aggregate.one_instance_deleted_count,
+            "both_instances_deleted": aggregate.both_instances_deleted_count,
+            "average_time_alive": aggregate.get_average_time_alive(),
+            "average_instance_lifetime": round(aggregate.instance_time_alive_sum / result_count) if result_count else 0,
+            "average_sibling_lifetime": round(aggregate.sibling_time_alive_sum / result_count) if result_count else 0,
+            "average_time_until_deletion": aggregate.get_average_time_until_deletion(),
+            "lifetime_quantiles": {str(q): v for q, v in aggregate.lifetime_quantiles.items()},
+        },
+        "distributions": {label: describe(values) for label, values in aggregate.distributions.items()},
+    }
+
+
+def format_share(count: int, total: int) -> str:
+    return "{0:>8}  {1:6.1%}".format(count, count / total if total else 0)
+
+
+def format_duration(milliseconds: int) -> str:
+    return display_time(milliseconds) or "-"
+
+
+def format_stats(stats: dict) -> str:
+    lines = ["Runs: " + ", ".join(kind + " " + str(count) for kind, count in stats["runs"].items()),
+             "Results: " + str(stats["result_count"]), ""]
+    # shares as in the pie chart: every result plus every failed run
+    run_count = stats["result_count"] + stats["runs"][FAILED]
+    lines += ["{0:26}".format(category + ":") + format_share(count, run_count) for category, count in stats["categories"].items()]
+    deletion = stats["deletion"]
+    lines += [""] + ["{0:26}".format(label + ":") + format_share(deletion[key], stats["result_count"]) for label, key in (
+        ("Instance Deleted", "instance_deleted"), ("Sibling Deleted", "sibling_deleted"),
+        ("One Instance Deleted", "one_instance_deleted"), ("Both Instances Deleted", "both_instances_deleted"))]
+    lines += [
+        "Average time alive = " + format_duration(deletion["average_time_alive"]),
+        "Average instance lifetime = " + format_duration(deletion["average_instance_lifetime"]),
+        "Average sibling lifetime = " + format_duration(deletion["average_sibling_lifetime"]),
+        "If deleted, avg time until deletion = " + format_duration(deletion["average_time_until_deletion"]),
+        "Lifetime of deleted instances: " + ", ".join(
+            str(round(float(q) * 100)) + "% " + format_duration(v) for q, v in deletion["lifetime_quantiles"].items()), "",
+        "{0:26}{1:>8}{2:>8}{3:>8}{4:>8}{5:>8}{6:>8}{7:>8}".format("", "count", "mean", "min", "median", "q3", "p90", "max")
+    ]
+    for label, d in stats["distributions"].items():
+        values = [d[key] for key in ("mean", "min", "median", "q3", "p90", "max")]
+        lines.append("{0:26}{1:>8}".format(label + ":", d["count"]) + "".join(
+            "{0:>8}".format("-" if v is None else "{0:.2f}".format(v).rstrip("0").rstrip(".")) for v in values))
+    return "\n".join(lines)
+
+
+def print_stats(project: str, args):
+    file_name = get_result_log_file_name(project)
+    if not os.path.isfile(file_name):
+        printer.yellow("No results for " + project + ". Run analyse first", LogLevel.CRUCIAL)
+        return
+    stats = compute_stats(read_runs(file_name), ResultFilter(args.since, args.until, args.path))
+    if args.json:
+        # the log must not end up in the middle of the JSON
+        pretty_print.log_writer.flush()
+        sys.stdout.write(json.dumps({"project": project, **stats}, indent=1) + "\n")
+        sys.stdout.flush()
+    else:
+        printer.white(format_stats(stats), LogLevel.CRUCIAL)
+
+
+def parse_args():
+    # the options are those of the stats command of main.py
+    from src.main.persistence import add_filter_arguments
+
+    parser = argparse.ArgumentParser(description="Prints statistics of the stored results of a project.")
+    parser.add_argument("--project_id", default="jabref")
+    add_filter_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    if arguments.json:
+        pretty_print.set_log_writer(pretty_print.LogWriter(sys.stderr))
+    print_stats(arguments.project_id, arguments)
+    sys.exit(0)
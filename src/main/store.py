@@ -0,0 +1,185 @@
+import sqlite3
+import threading
+
+from src.main.analysis.analysis_utils import AnalysisResult, InstanceMetrics, categorize_result
+from src.main.api.data import Commit, CommitAlert
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_commits (
+    project TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    branch TEXT,
+    commit_type TEXT,
+    PRIMARY KEY (project, timestamp)
+);
+CREATE TABLE IF NOT EXISTS commit_alerts (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    alert_timestamp INTEGER NOT NULL,
+    alert_index INTEGER NOT NULL,
+    message TEXT,
+    removed_clone_id TEXT,
+    clone_path TEXT NOT NULL,
+    clone_start_line INTEGER,
+    clone_end_line INTEGER,
+    sibling_path TEXT NOT NULL,
+    sibling_start_line INTEGER,
+    sibling_end_line INTEGER,
+    UNIQUE (project, alert_timestamp, alert_index)
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    commit_alert_id INTEGER NOT NULL REFERENCES commit_alerts (id) ON DELETE CASCADE,
+    project TEXT NOT NULL,
+    alert_timestamp INTEGER NOT NULL,
+    first_commit INTEGER,
+    most_recent_commit INTEGER,
+    analysed_until INTEGER,
+    finished INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    one_file_affected_count INTEGER,
+    both_files_affected_count INTEGER,
+    one_instance_affected_count INTEGER,
+    both_instances_affected_count INTEGER,
+    clone_findings_count INTEGER,
+    UNIQUE (commit_alert_id)
+);
+CREATE TABLE IF NOT EXISTS instance_metrics (
+    result_id INTEGER NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    role TEXT NOT NULL,
+    uniform_path TEXT NOT NULL,
+    corrected_start_line INTEGER,
+    corrected_end_line INTEGER,
+    file_affected_count INTEGER,
+    instance_affected_count INTEGER,
+    deleted INTEGER NOT NULL,
+    time_alive INTEGER,
+    PRIMARY KEY (result_id, role)
+);
+CREATE INDEX IF NOT EXISTS commit_alerts_by_alert ON commit_alerts (project, alert_timestamp);
+CREATE INDEX IF NOT EXISTS commit_alerts_by_clone_path ON commit_alerts (clone_path);
+CREATE INDEX IF NOT EXISTS commit_alerts_by_sibling_path ON commit_alerts (sibling_path);
+CREATE INDEX IF NOT EXISTS results_by_alert ON results (project, alert_timestamp);
+CREATE INDEX IF NOT EXISTS results_by_category ON results (project, category);
+CREATE INDEX IF NOT EXISTS instance_metrics_by_path ON instance_metrics (uniform_path, deleted);
+"""
+
+INSTANCE = "instance"
+SIBLING = "sibling"
+
+
+class ResultStore:
+    """Optional SQLite store of alert commits, commit alerts, analysis results and instance metrics.
+
+    The database runs in WAL mode, so several workers can write while others read. Every thread gets its own connection,
+    close closes the connections of all threads. Writes of one alert commit are a single transaction."""
+
+    def __init__(self, file_name: str, timeout: float = 30.0):
+        self.file_name = file_name
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: [sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self.get_connection() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    def get_connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # used by one thread only, but closed by the thread that closes the store
+            connection = sqlite3.connect(self.file_name, timeout=self.timeout, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA foreign_keys=ON")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def close(self):
+        """closes the connections of all threads. Must not be called while other threads use the store"""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+            self._local = threading.local()
+
+    def add_alert_commits(self, project: str, alert_commits: [Commit]):
+        with self.get_connection() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO alert_commits (project, timestamp, branch, commit_type) VALUES (?, ?, ?, ?)",
+                [(project, c.timestamp, c.branch, c.commit_type) for c in alert_commits]
+            )
+
+    def add_results(self, project: str, alert_commit_timestamp: int, results: [AnalysisResult]):
+        """stores the results of one alert commit. Results stored earlier for this alert commit are replaced."""
+        with self.get_connection() as connection:
+            connection.execute("DELETE FROM commit_alerts WHERE project = ? AND alert_timestamp = ?", (project, alert_commit_timestamp))
+            for alert_index, result in enumerate(results):
+                commit_alert_id = insert_commit_alert(connection, project, alert_commit_timestamp, alert_index, result.commit_alert)
+                result_id = connection.execute(
+                    "INSERT INTO results (commit_alert_id, project, alert_timestamp, first_commit, most_recent_commit, analysed_until,"
+                    " finished, category, one_file_affected_count, both_files_affected_count, one_instance_affected_count,"
+                    " both_instances_affected_count, clone_findings_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (commit_alert_id, project, alert_commit_timestamp, result.first_commit, result.most_recent_commit,
+                     result.analysed_until, result.finished, categorize_result(result).value, result.one_file_affected_count,
+                     result.both_files_affected_count, result.one_instance_affected_count, result.both_instances_affected_count,
+                     result.clone_findings_count)
+                ).lastrowid
+                ctx = result.commit_alert.context
+                insert_instance_metrics(connection, result_id, INSTANCE, result.instance_metrics, ctx.expected_clone_location.uniform_path)
+                insert_instance_metrics(connection, result_id, SIBLING, result.sibling_instance_metrics,
+                                        ctx.expected_sibling_location.uniform_path)
+
+    def get_alive_clones_in_file(self, project: str, uniform_path: str) -> [sqlite3.Row]:
+        """returns the results with a not deleted instance currently located in the given file"""
+        return self.get_connection().execute(
+            "SELECT results.*, instance_metrics.role, instance_metrics.corrected_start_line, instance_metrics.corrected_end_line"
+            " FROM instance_metrics JOIN results ON results.id = instance_metrics.result_id"
+            " WHERE instance_metrics.uniform_path = ? AND instance_metrics.deleted = 0 AND results.project = ?"
+            " ORDER BY results.alert_timestamp",
+            (uniform_path, project)
+        ).fetchall()
+
+    def get_results_since(self, project: str, alert_commit_timestamp: int, category: str = None) -> [sqlite3.Row]:
+        """returns the results of alert commits at or after the given timestamp, optionally of one category only"""
+        query = "SELECT * FROM results WHERE project = ? AND alert_timestamp >= ?"
+        parameters = [project, alert_commit_timestamp]
+        if category is not None:
+            query += " AND category = ?"
+            parameters.append(category)
+        return self.get_connection().execute(query + " ORDER BY alert_timestamp", parameters).fetchall()
+
+    def get_category_counts(self, project: str) -> dict[str, int]:
+        return {
+            row["category"]: row["count"] for row in self.get_connection().execute(
+                "SELECT category, COUNT(*) AS count FROM results WHERE project = ? AND finished = 1 GROUP BY category", (project,)
+            )
+        }
+
+
+def insert_commit_alert(connection: sqlite3.Connection, project: str, alert_commit_timestamp: int, alert_index: int,
+                        commit_alert: CommitAlert) -> int:
+    ctx = commit_alert.context
+    return connection.execute(
+        "INSERT INTO commit_alerts (project, alert_timestamp, alert_index, message, removed_clone_id, clone_path, clone_start_line,"
+        " clone_end_line, sibling_path, sibling_start_line, sibling_end_line) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (project, alert_commit_timestamp, alert_index, commit_alert.message, ctx.removed_clone_id,
+         ctx.expected_clone_location.uniform_path, ctx.expected_clone_location.raw_start_line, ctx.expected_clone_location.raw_end_line,
+         ctx.expected_sibling_location.uniform_path, ctx.expected_sibling_location.raw_start_line,
+         ctx.expected_sibling_location.raw_end_line)
+    ).lastrowid
+
+
+def insert_instance_metrics(connection: sqlite3.Connection, result_id: int, role: str, instance_metrics: InstanceMetrics,
+                            alert_uniform_path: str):
+    # results of older versions do not know the current path of the instance
+    uniform_path = instance_metrics.uniform_path if instance_metrics.uniform_path is not None else alert_uniform_path
+    connection.execute(
+        "INSERT INTO instance_metrics (result_id, role, uniform_path, corrected_start_line, corrected_end_line, file_affected_count,"
+        " instance_affected_count, deleted, time_alive) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (result_id, role, uniform_path, instance_metrics.corrected_start_line, instance_metrics.corrected_end_line,
+         instance_metrics.file_affected_count, instance_metrics.instance_affected_count, instance_metrics.deleted,
+         instance_metrics.time_alive)
+    )
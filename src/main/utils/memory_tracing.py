@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+
+# allocations of the tracing itself and of the import machinery are not interesting
+IGNORED_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+@dataclass
+class AlertMemoryRecord:
+    """memory of the analysis of one alert commit in bytes. Retained is what is still allocated after the analysis"""
+    alert_commit_timestamp: int
+    start: float
+    seconds: float
+    before: int
+    after: int
+    peak: int
+    retained: int
+    top_sites: list[tuple[str, int, int]]  # (file:line, size difference, count difference)
+
+
+def get_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, f) for f in IGNORED_FILES])
+
+
+def get_top_sites(statistics: list, count: int) -> list[tuple[str, int, int]]:
+    sites = []
+    for stat in statistics[:count]:
+        frame = stat.traceback[0]
+        sites.append((frame.filename + ":" + str(frame.lineno), getattr(stat, "size_diff", stat.size),
+                      getattr(stat, "count_diff", stat.count)))
+    return sites
+
+
+class MemoryTracer:
+    """Opt-in memory tracing with tracemalloc. Traces the analysis of every alert commit: peak and retained memory and the
+    allocation sites that grew the most. Every record is appended to a JSON lines timeline.
+
+    Peaks are process wide, so trace one alert commit at a time. The peak is only reset if no other alert commit is
+    traced, so the records of overlapping alert commits share one peak instead of losing it. Tracing slows the analysis
+    down considerably."""
+
+    def __init__(self, top_count: int = 10):
+        self.enabled = False
+        self.top_count = top_count
+        self.timeline_file_name: str = None
+        self.records: [AlertMemoryRecord] = []
+        self._start_snapshot: tracemalloc.Snapshot = None
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def start(self, timeline_file_name: str = None, frames: int = 1):
+        self.timeline_file_name = timeline_file_name
+        self.records = []
+        if timeline_file_name is not None:
+            open(timeline_file_name, "w").close()
+        tracemalloc.start(frames)
+        self._start_snapshot = get_snapshot()
+        self.enabled = True
+
+    def stop(self) -> list[tuple[str, int, int]]:
+        """stops tracing and returns the allocation sites that grew the most during the whole run"""
+        if not self.enabled:
+            return []
+        self.enabled = False
+        top_sites = get_top_sites(get_snapshot().compare_to(self._start_snapshot, "lineno"), self.top_count)
+        self._start_snapshot = None
+        tracemalloc.stop()
+        return top_sites
+
+    def trace(self, alert_commit_timestamp: int) -> "AlertMemoryTrace":
+        """context manager tracing the enclosed analysis of an alert commit. Its record is set when it is left"""
+        return AlertMemoryTrace(self if self.enabled else None, alert_commit_timestamp)
+
+    def begin(self) -> (tracemalloc.Snapshot, int):
+        with self._lock:
+            before_snapshot = get_snapshot()
+            before, _ = tracemalloc.get_traced_memory()
+            if self._active == 0:
+                tracemalloc.reset_peak()
+            self._active += 1
+        return before_snapshot, before
+
+    def end(self, alert_commit_timestamp: int, start: float, before_snapshot: tracemalloc.Snapshot, before: int
+            ) -> AlertMemoryRecord:
+        with self._lock:
+            self._active -= 1
+            after, peak = tracemalloc.get_traced_memory()
+            statistics = get_snapshot().compare_to(before_snapshot, "lineno")
+            record = AlertMemoryRecord(
+                alert_commit_timestamp, start, time.time() - start, before, after, peak, after - before,
+                get_top_sites(statistics, self.top_count)
+            )
+            self.records.append(record)
+            if self.timeline_file_name is not None:
+                with open(self.timeline_file_name, "a") as file:
+                    file.write(json.dumps(asdict(record)) + "\n")
+        return record
+
+
+class AlertMemoryTrace:
+    """The trace of the analysis of one alert commit. record is None until the trace is left, or if tracing is off"""
+
+    def __init__(self, tracer: MemoryTracer, alert_commit_timestamp: int):
+        self.tracer = tracer
+        self.alert_commit_timestamp = alert_commit_timestamp
+        self.record: AlertMemoryRecord = None
+        self._start = 0.0
+        self._before: (tracemalloc.Snapshot, int) = None
+
+    def __enter__(self) -> "AlertMemoryTrace":
+        if self.tracer is not None:
+            self._before = self.tracer.begin()
+            self._start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._before is not None:
+            self.record = self.tracer.end(self.alert_commit_timestamp, self._start, *self._before)
+
+
+memory_tracer: MemoryTracer = MemoryTracer()
+
+
+def format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return "{0:.1f} {1}".format(size, unit)
+        size /= 1024
+    return "{0:.1f} GiB".format(size)
+
+
+def format_memory_record(record: AlertMemoryRecord) -> str:
+    return "Memory of alert commit " + str(record.alert_commit_timestamp) + ": peak " + format_bytes(record.peak) \
+        + ", retained " + format_bytes(record.retained) + "\n" + format_top_sites(record.top_sites)
+
+
+def format_top_sites(top_sites: list[tuple[str, int, int]]) -> str:
+    return "\n".join("{0:>12} {1:>8} blocks  {2}".format(format_bytes(size), count, site) for site, size, count in top_sites)
@@ -0,0 +1,105 @@
+import threading
+import time
+from contextlib import nullcontext
+
+# the phases of the analysis of an alert commit
+COMMIT_LISTING = "commit listing"
+AFFECTED_FILES = "affected files fetch"
+DIFF = "diff fetch"
+LINE_CORRECTION = "line correction"
+CHURN_FETCH = "churn fetch"
+CHURN_FILTER = "churn filtering"
+PERSISTENCE = "persistence"
+PHASES = (COMMIT_LISTING, AFFECTED_FILES, DIFF, LINE_CORRECTION, CHURN_FETCH, CHURN_FILTER, PERSISTENCE)
+
+_NO_TIMER = nullcontext()
+
+
+class _PhaseTimer:
+    def __init__(self, timers: "PhaseTimers", name: str):
+        self.timers = timers
+        self.name = name
+        self.start = 0.0
+        self.nested_seconds = 0.0
+
+    def __enter__(self):
+        self.timers.get_stack().append(self)
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        seconds = time.perf_counter() - self.start
+        stack = self.timers.get_stack()
+        stack.pop()
+        if stack:
+            stack[-1].nested_seconds += seconds
+        self.timers.record(self.name, seconds - self.nested_seconds)
+
+
+class PhaseTimers:
+    """Wall clock time spent in the phases of the analysis, in total and per alert commit.
+
+    The alert commit a thread is working on is remembered per thread, so parallel workers are kept apart. Phases are
+    exclusive: the time of a phase nested in another one only counts for the inner phase, so the phases never add up to
+    more than the wall time of a thread. Disabled timers cost a single attribute check."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        # phase -> (seconds, count)
+        self.totals: dict[str, tuple[float, int]] = {}
+        # alert commit timestamp -> phase -> seconds
+        self.per_alert_commit: dict[int, dict[str, float]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def phase(self, name: str):
+        """context manager timing the enclosed code as the given phase"""
+        if not self.enabled:
+            return _NO_TIMER
+        return _PhaseTimer(self, name)
+
+    def get_stack(self) -> [_PhaseTimer]:
+        """the running phases of the current thread, innermost last"""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, name: str, seconds: float):
+        alert_commit_timestamp = getattr(self._local, "alert_commit_timestamp", None)
+        with self._lock:
+            total_seconds, count = self.totals.get(name, (0.0, 0))
+            self.totals[name] = (total_seconds + seconds, count + 1)
+            if alert_commit_timestamp is not None:
+                phases = self.per_alert_commit.setdefault(alert_commit_timestamp, {})
+                phases[name] = phases.get(name, 0.0) + seconds
+
+    def start_alert_commit(self, alert_commit_timestamp: int):
+        self._local.alert_commit_timestamp = alert_commit_timestamp
+
+    def finish_alert_commit(self) -> dict[str, float]:
+        """returns the seconds per phase of the alert commit the current thread worked on"""
+        alert_commit_timestamp = getattr(self._local, "alert_commit_timestamp", None)
+        self._local.alert_commit_timestamp = None
+        with self._lock:
+            return dict(self.per_alert_commit.get(alert_commit_timestamp, {}))
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.per_alert_commit.clear()
+
+
+phase_timers: PhaseTimers = PhaseTimers()
+
+
+def format_phase_breakdown(phases: dict[str, float], wall_seconds: float = None) -> str:
+    """one line per phase with the seconds and, if the wall time is given, the share of it"""
+    lines = []
+    for name in sorted(phases, key=lambda n: -phases[n]):
+        line = "{0:22}{1:10.3f} s".format(name + ":", phases[name])
+        if wall_seconds:
+            line += "{0:8.1%}".format(phases[name] / wall_seconds)
+        lines.append(line)
+    if wall_seconds is not None:
+        lines.append("{0:22}{1:10.3f} s".format("wall time:", wall_seconds))
+    return "\n".join(lines)
@@ -1,9 +1,13 @@
+import time
 from datetime import datetime
+from typing import TYPE_CHECKING
 
-from teamscale_client import TeamscaleClient
+if TYPE_CHECKING:
+    # only for annotations. Importing the client takes longer than the rest of the module
+    from teamscale_client import TeamscaleClient
 
 
-def add_branch(client: TeamscaleClient, commit_timestamp) -> str:
+def add_branch(client: "TeamscaleClient", commit_timestamp) -> str:
     return client.branch + ":" + str(commit_timestamp)
 
 
@@ -27,7 +31,12 @@ intervals = (
 
 
 def display_time(milliseconds, granularity=2):
-    milliseconds = int(str(milliseconds)[:-3])
+    """Formats a duration in milliseconds with its largest units, e.g. "2 days, 3 hours". Durations under a second are
+    an empty string. Negative durations get a leading minus."""
+    if int(milliseconds) < 0:
+        positive = display_time(-int(milliseconds), granularity)
+        return "-" + positive if positive else ""
+    milliseconds = int(milliseconds) // 1000
     result = []
 
     for name, count in intervals:
@@ -38,3 +47,24 @@ def display_time(milliseconds, granularity=2):
                 name = name.rstrip('s')
             result.append("{} {}".format(value, name))
     return ', '.join(result[:granularity])
+
+
+def parse_date(text: str) -> int:
+    """a date as YYYY-MM-DD or a timestamp in milliseconds"""
+    if text.isdigit():
+        return int(text)
+    return int(datetime.strptime(text, "%Y-%m-%d").timestamp() * 1000)
+
+
+class TimeBudget:
+    """A wall clock budget in seconds, starting at creation."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def is_exhausted(self) -> bool:
+        return time.monotonic() >= self.deadline
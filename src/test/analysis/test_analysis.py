@@ -0,0 +1,100 @@
+import unittest
+from contextlib import ExitStack
+from unittest.mock import patch
+
+from src.main.analysis import analysis
+from src.main.analysis.analysis import analyse_one_alert_commit
+from src.main.analysis.analysis_utils import TimeBudgetExhaustedError, AnalysisResult
+from src.main.api.data import Commit, CloneFindingChurn
+from src.main.utils.time_utils import TimeBudget
+from src.test.analysis.test_estimation import build_commit_alert
+
+DAY = 86400_000
+ALERT_COMMIT = 1_600_000_000_000
+COMMITS = [ALERT_COMMIT + i * 30 * DAY for i in range(1, 13)]
+MOST_RECENT_COMMIT = COMMITS[-1]
+
+
+class FakeClient:
+    project = "project"
+    branch = "main"
+    url = "http://localhost:8080"
+
+
+class CountingTimeBudget(TimeBudget):
+    """a time budget that is exhausted after a number of checks"""
+
+    def __init__(self, checks: int):
+        super().__init__(0)
+        self.checks = checks
+
+    def is_exhausted(self) -> bool:
+        self.checks -= 1
+        return self.checks < 0
+
+
+class TestAnalyseOneAlertCommit(unittest.TestCase):
+    def setUp(self):
+        self.analysed_commits = []
+        analysis.clone_finding_index_cache.clear()
+
+    def analyse(self, time_budget=None, resumed_results=None) -> [AnalysisResult]:
+        alerts = {Commit("main", ALERT_COMMIT, "simple"): [build_commit_alert("A", "B"), build_commit_alert("A", "C")]}
+
+        def get_affected_files(client, commit_timestamp):
+            self.analysed_commits.append(commit_timestamp)
+            return []
+
+        with ExitStack() as stack:
+            for name, kwargs in (
+                    ("get_commit_alerts", {"return_value": alerts}),
+                    ("get_repository_summary", {"return_value": (ALERT_COMMIT - DAY, MOST_RECENT_COMMIT)}),
+                    ("get_delta_affected_files", {"return_value": "changed"}),
+                    ("get_repository_commits", {"side_effect": lambda client, start, end: [
+                        Commit("main", t, "simple") for t in COMMITS if start <= t <= end
+                    ]}),
+                    ("get_affected_files", {"side_effect": get_affected_files}),
+                    ("get_clone_finding_churn", {"side_effect": lambda client, t: CloneFindingChurn(
+                        Commit("main", t, "simple"), [], [], [], [], []
+                    )})
+            ):
+                stack.enter_context(patch("src.main.analysis.analysis." + name, **kwargs))
+            return analyse_one_alert_commit(FakeClient(), ALERT_COMMIT, time_budget, resumed_results)
+
+    def test_time_budget(self):
+        # complete run
+        expected = self.analyse()
+        self.assertEqual(2 * COMMITS, self.analysed_commits)
+        self.assertTrue(all(r.finished for r in expected))
+        self.analysed_commits.clear()
+
+        # interrupt in the middle of the first commit alert
+        with self.assertRaises(TimeBudgetExhaustedError) as context:
+            self.analyse(CountingTimeBudget(7))
+        partial: [AnalysisResult] = context.exception.results
+        self.assertEqual(1, len(partial))
+        self.assertFalse(partial[0].finished)
+        self.assertEqual(COMMITS[4], partial[0].analysed_until)
+        self.assertEqual(COMMITS[:5], self.analysed_commits)
+
+        # resume with a budget which is exhausted in the second commit alert
+        with self.assertRaises(TimeBudgetExhaustedError) as context:
+            self.analyse(CountingTimeBudget(12), partial)
+        partial = context.exception.results
+        self.assertEqual([True, False], [r.finished for r in partial])
+
+        # resume without budget
+        results = self.analyse(resumed_results=partial)
+        self.assertEqual(2 * COMMITS, self.analysed_commits)
+        self.assertEqual([r.analysed_until for r in expected], [r.analysed_until for r in results])
+        self.assertEqual([r.instance_metrics.time_alive for r in expected], [r.instance_metrics.time_alive for r in results])
+
+    def test_exhausted_before_start(self):
+        with self.assertRaises(TimeBudgetExhaustedError) as context:
+            self.analyse(CountingTimeBudget(0))
+        self.assertEqual([], context.exception.results)
+        self.assertEqual([], self.analysed_commits)
+
+
+if __name__ == '__main__':
+    unittest.main()
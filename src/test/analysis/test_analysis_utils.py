@@ -4,8 +4,8 @@ import portion
 from portion import Interval
 
 from src.main.analysis.analysis_utils import is_file_affected_at_file_changes, are_left_lines_affected_at_diff, \
-    get_interval_length, correct_lines
-from src.main.api.data import FileChange, DiffDescription
+    get_interval_length, correct_lines, CloneFindingIndex, CloneFindingIndexCache
+from src.main.api.data import FileChange, DiffDescription, CloneFindingChurn
 
 
 def build_test_list() -> [FileChange]:
@@ -105,6 +105,49 @@ diff_desc_json = {
 }
 
 
+def build_location_json(uniform_path: str, start_line: int, end_line: int) -> dict:
+    return {
+        "location": uniform_path,
+        "rawEndLine": end_line,
+        "rawEndOffset": 0,
+        "rawStartLine": start_line,
+        "rawStartOffset": 0,
+        "type": "TextRegionLocation",
+        "uniformPath": uniform_path
+    }
+
+
+def build_clone_finding_json(finding_id: str, location: dict, sibling_locations: [dict], dead=False) -> dict:
+    commit = {"branchName": "master", "timestamp": 1534709210000, "type": "simple"}
+    json = {
+        "groupName": "Redundancy",
+        "categoryName": "Code Duplication",
+        "message": "Clone with 2 instances",
+        "location": location,
+        "id": finding_id,
+        "birth": commit,
+        "assessment": "YELLOW",
+        "siblingLocations": sibling_locations,
+        "properties": {"Instances": 2, "Length": 10, "Gaps": 0},
+        "analysisTimestamp": 1534709210000,
+        "typeId": "clone"
+    }
+    if dead:
+        json["death"] = commit
+    return json
+
+
+def build_clone_finding_churn(added_findings: [dict], findings_in_changed_code: [dict] = ()) -> CloneFindingChurn:
+    return CloneFindingChurn.from_json({
+        "commit": {"branchName": "master", "timestamp": 1534709210000, "type": "simple"},
+        "addedFindings": added_findings,
+        "findingsAddedInBranch": [],
+        "findingsInChangedCode": list(findings_in_changed_code),
+        "removedFindings": [],
+        "findingsRemovedInBranch": []
+    })
+
+
 class TestAnalysisUtils(unittest.TestCase):
     def test_is_file_affected_at_commit(self):
         tl = build_test_list()
@@ -163,5 +206,44 @@ class TestAnalysisUtils(unittest.TestCase):
         self.assertEqual(26, raw_end_line)
 
 
+class TestCloneFindingIndex(unittest.TestCase):
+    file = "src/A.java"
+    sibling = "src/B.java"
+
+    def build_index(self) -> CloneFindingIndex:
+        return CloneFindingIndex(build_clone_finding_churn([
+            # matches both instances
+            build_clone_finding_json("1", build_location_json(self.file, 10, 20), [build_location_json(self.sibling, 30, 40)]),
+            # matches only the instance
+            build_clone_finding_json("2", build_location_json(self.file, 11, 20), [build_location_json("src/C.java", 30, 40)]),
+            # overlaps the sibling less than the threshold
+            build_clone_finding_json("3", build_location_json(self.file, 10, 20), [build_location_json(self.sibling, 38, 60)]),
+            # already dead
+            build_clone_finding_json("4", build_location_json(self.file, 10, 20), [build_location_json(self.sibling, 30, 40)], True),
+            # long location starting far above the interval
+            build_clone_finding_json("5", build_location_json(self.file, 1, 100), [build_location_json(self.sibling, 25, 40)])
+        ], [
+            # duplicate of finding 1
+            build_clone_finding_json("1", build_location_json(self.file, 10, 20), [build_location_json(self.sibling, 30, 40)])
+        ]))
+
+    def test_query(self):
+        index = self.build_index()
+        self.assertEqual(4, len(index))
+        relevant = index.query(self.file, portion.closedopen(10, 20), self.sibling, portion.closedopen(30, 40))
+        self.assertEqual(["1", "5"], [finding.finding_id for finding in relevant])
+        self.assertEqual([], index.query(self.file, portion.closedopen(150, 160), self.sibling, portion.closedopen(30, 40)))
+        self.assertEqual([], index.query(self.file, portion.empty(), self.sibling, portion.closedopen(30, 40)))
+        self.assertEqual([], index.query("src/D.java", portion.closedopen(10, 20), self.sibling, portion.closedopen(30, 40)))
+
+    def test_cache(self):
+        cache = CloneFindingIndexCache(capacity=1)
+        first = cache.get(("p", "b", 1), lambda: build_clone_finding_churn([]))
+        self.assertIs(first, cache.get(("p", "b", 1), lambda: self.fail("cached index should be reused")))
+        cache.get(("p", "b", 2), lambda: build_clone_finding_churn([]))
+        self.assertIsNot(first, cache.get(("p", "b", 1), lambda: build_clone_finding_churn([])))
+        self.assertEqual((1, 3), (cache.hits, cache.misses))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,199 @@
+import json
+import unittest
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from teamscale_client import TeamscaleClient
+
+from src.main.analysis import analysis
+from src.main.analysis.analysis import analyse_one_alert_commit, update_filtered_alert_commits
+from src.main.api.api_utils import api_statistics, ApiStatistics
+from src.main.api.replay import build_response
+from src.main.pretty_print import module_levels, set_module_levels
+from src.benchmark.fixtures import scratch_root_dir, generate_commit_json, generate_commit_alert_json, \
+    generate_file_change_json, get_timestamp, parse_element
+
+DAY = 86400_000
+FIRST_COMMIT = 1_500_000_000_000
+ALERT_COMMIT = FIRST_COMMIT + 730 * DAY
+# six months after the alert commit, two analysis windows
+COMMITS = [ALERT_COMMIT + i * 10 * DAY for i in range(1, 19)]
+
+FILE = "src/main/java/A.java"
+SIBLING = "src/main/java/B.java"
+OTHER = "src/main/java/C.java"
+
+
+@dataclass
+class Change:
+    """a change of a file at COMMITS[commit]. hunks are (left_start, left_end, right_start, right_end) line intervals"""
+    commit: int
+    uniform_path: str
+    change_type: str = "EDIT"
+    origin_path: str = None
+    hunks: tuple = ()
+
+
+@dataclass
+class Scenario:
+    name: str
+    changes: [Change]
+    sibling: str = SIBLING
+    sibling_lines: (int, int) = (100, 150)
+
+
+def edits(path: str, commits, hunks: tuple = ((10, 12, 10, 14),)) -> [Change]:
+    return [Change(commit, path, hunks=hunks) for commit in commits]
+
+
+SCENARIOS = {
+    "untouched clone": Scenario("untouched clone", edits(OTHER, range(0, 18, 3))),
+    "heavily edited file": Scenario("heavily edited file", edits(FILE, range(0, 18), ((10, 12, 10, 14), (120, 121, 122, 126)))
+                                    + edits(SIBLING, range(1, 18, 4)) + edits(OTHER, range(0, 18, 2))),
+    "renamed file": Scenario("renamed file", edits(FILE, (1,)) + [
+        Change(4, "src/main/java/Renamed.java", "MOVE", FILE, ((1, 1, 1, 3),))
+    ] + edits("src/main/java/Renamed.java", (7, 12)) + edits(SIBLING, (9,))),
+    "deleted file": Scenario("deleted file", edits(FILE, (1,)) + [Change(5, FILE, "DELETE")] + edits(SIBLING, (2, 8, 14))),
+    "intra-file clone": Scenario("intra-file clone", edits(FILE, (0, 2, 4, 6), ((120, 121, 120, 121), (320, 322, 320, 321))),
+                                 sibling=FILE, sibling_lines=(300, 350)),
+}
+
+# the maximal number of requests per endpoint to analyse the alert commit of a scenario. Endpoints without a budget must
+# not be requested at all. Raise a budget only for a change that needs the additional requests.
+ANALYSIS_BUDGETS = {
+    "untouched clone": {"commit-alerts": 1, "repository-summary": 1, "delta/affected-files": 4},
+    "heavily edited file": {
+        "commit-alerts": 1, "repository-summary": 1, "delta/affected-files": 2, "repository-log-range": 2,
+        "commits/affected-files": 18, "compare-elements": 23, "finding-churn/list": 18
+    },
+    "renamed file": {
+        "commit-alerts": 1, "repository-summary": 1, "delta/affected-files": 2, "repository-log-range": 2,
+        "commits/affected-files": 18, "compare-elements": 5, "finding-churn/list": 18
+    },
+    "deleted file": {
+        "commit-alerts": 1, "repository-summary": 1, "delta/affected-files": 3, "repository-log-range": 2,
+        "commits/affected-files": 18, "compare-elements": 4, "finding-churn/list": 5
+    },
+    "intra-file clone": {
+        "commit-alerts": 1, "repository-summary": 1, "delta/affected-files": 3, "repository-log-range": 1,
+        "commits/affected-files": 9, "compare-elements": 8, "finding-churn/list": 9
+    },
+}
+
+
+class ScenarioClient(TeamscaleClient):
+    """Answers the requests of the analysis from a scenario: one alert commit on FILE and its sibling, followed by the
+    commits in COMMITS with the changes of the scenario."""
+
+    def __init__(self, scenario: Scenario):
+        self.scenario = scenario
+        self.alert = generate_commit_alert_json(FILE, (100, 150), scenario.sibling, scenario.sibling_lines)
+        super().__init__("http://scenario", "budget", "budget", "budget", branch="main")
+
+    def get_changes(self, timestamp: int) -> [Change]:
+        return [change for change in self.scenario.changes if COMMITS[change.commit] == timestamp]
+
+    def is_changed(self, uniform_path: str, t1: int, t2: int) -> bool:
+        return any(t1 <= COMMITS[c.commit] <= t2 for c in self.scenario.changes if uniform_path in (c.uniform_path, c.origin_path))
+
+    def respond(self, service: str, parameters: dict):
+        if service.endswith("service-api-info"):
+            return {"apiVersion": 8}
+        elif service == "repository-summary":
+            return {"firstCommit": FIRST_COMMIT, "mostRecentCommit": COMMITS[-1]}
+        elif service == "repository-log-range":
+            timestamps = [ALERT_COMMIT] if "commit-attribute" in parameters else [FIRST_COMMIT, ALERT_COMMIT] + COMMITS
+            return [{"commit": generate_commit_json(t)} for t in timestamps if parameters["start"] <= t <= parameters["end"]]
+        elif service == "commit-alerts":
+            return [{"commit": generate_commit_json(ALERT_COMMIT), "alerts": [self.alert]}]
+        elif service == "commits/affected-files":
+            return [generate_file_change_json(c.uniform_path, get_timestamp(parameters["commit"]), c.change_type, c.origin_path)
+                    for c in self.get_changes(get_timestamp(parameters["commit"]))]
+        elif service == "delta/affected-files":
+            path = parameters["uniform-path"]
+            return [{"uniformPath": path, "changeType": "EDIT"}] if self.is_changed(path, parameters["t1"], parameters["t2"]) else []
+        elif service == "api/compare-elements":
+            right_path, right_timestamp = parse_element(parameters["right"], self.project)
+            hunks = next(c.hunks for c in self.get_changes(right_timestamp) if c.uniform_path == right_path)
+            left_lines = [line for hunk in hunks for line in hunk[:2]]
+            right_lines = [line for hunk in hunks for line in hunk[2:]]
+            return [{"name": name, "leftChangeLines": left_lines, "rightChangeLines": right_lines,
+                     "leftChangeRegions": [], "rightChangeRegions": []}
+                    for name in ("line-based", "line-based (ignore whitespace)", "token-based")]
+        elif service == "finding-churn/list":
+            return {"commit": generate_commit_json(get_timestamp(parameters["t"])), "addedFindings": [],
+                    "findingsAddedInBranch": [], "findingsInChangedCode": [], "removedFindings": [],
+                    "findingsRemovedInBranch": []}
+        raise KeyError("Unknown service " + service)
+
+    def get(self, url, parameters=None):
+        service = url[len(self.url):].strip("/")
+        prefix = "api/projects/" + self.project + "/"
+        service = service[len(prefix):] if service.startswith(prefix) else service
+        return build_response(url, json.dumps(self.respond(service, parameters or {})))
+
+
+@contextmanager
+def count_requests() -> ApiStatistics:
+    api_statistics.reset()
+    analysis.clone_finding_index_cache.clear()
+    try:
+        yield api_statistics
+    finally:
+        api_statistics.reset()
+
+
+class TestApiBudget(unittest.TestCase):
+    def setUp(self):
+        self.levels = dict(module_levels)
+        set_module_levels("NONE")
+
+    def tearDown(self):
+        module_levels.clear()
+        module_levels.update(self.levels)
+
+    def assertWithinBudget(self, budget: dict[str, int], request_counts: dict[str, int]):
+        exceeded = {endpoint: str(count) + " > " + str(budget.get(endpoint, 0))
+                    for endpoint, count in request_counts.items() if count > budget.get(endpoint, 0)}
+        self.assertEqual({}, exceeded, "Requests per endpoint exceed the budget")
+
+    def test_analysis_budgets(self):
+        for name, scenario in SCENARIOS.items():
+            with self.subTest(name), count_requests() as statistics:
+                results = analyse_one_alert_commit(ScenarioClient(scenario), ALERT_COMMIT)
+                self.assertEqual(1, len(results))
+                self.assertWithinBudget(ANALYSIS_BUDGETS[name], statistics.request_counts)
+
+    def test_scenarios(self):
+        """the scenarios exercise what their names promise"""
+        results = {}
+        for name, scenario in SCENARIOS.items():
+            with count_requests():
+                results[name] = analyse_one_alert_commit(ScenarioClient(scenario), ALERT_COMMIT)[0]
+        self.assertEqual(0, results["untouched clone"].instance_metrics.file_affected_count)
+        heavily_edited = results["heavily edited file"].instance_metrics
+        self.assertEqual(18, heavily_edited.instance_affected_count + heavily_edited.file_affected_count)
+        self.assertGreater(heavily_edited.instance_affected_count, 0)
+        self.assertEqual("src/main/java/Renamed.java", results["renamed file"].instance_metrics.uniform_path)
+        self.assertTrue(results["deleted file"].instance_metrics.deleted)
+        self.assertEqual(3, results["deleted file"].sibling_instance_metrics.file_affected_count)
+        intra_file = results["intra-file clone"]
+        self.assertEqual((4, 4), (intra_file.instance_metrics.instance_affected_count,
+                                  intra_file.sibling_instance_metrics.instance_affected_count))
+
+    def test_update_filtered_alert_commits_budget(self):
+        with scratch_root_dir(), count_requests() as statistics:
+            client = ScenarioClient(SCENARIOS["untouched clone"])
+            alert_file = update_filtered_alert_commits(client, overwrite=True)
+            self.assertEqual([ALERT_COMMIT], [commit.timestamp for commit in alert_file.alert_commit_list])
+            # one request per six months of history
+            self.assertWithinBudget({"repository-summary": 1, "repository-log-range": 6}, statistics.request_counts)
+
+            # nothing new to discover
+            statistics.reset()
+            update_filtered_alert_commits(client)
+            self.assertWithinBudget({"repository-summary": 1}, statistics.request_counts)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+
+from src.main.analysis.analysis import get_analysis_windows
+from src.main.analysis.estimation import count_commits_in_window, estimate_alert_commit_cost, AlertCostEstimate
+from src.main.api.data import Commit, CommitAlert, CommitAlertContext, TextRegionLocation
+
+
+def build_commit_alert(file: str, sibling: str) -> CommitAlert:
+    return CommitAlert(CommitAlertContext(
+        TextRegionLocation(file, 20, 0, 10, 0, "TextRegionLocation", file),
+        TextRegionLocation(sibling, 20, 0, 10, 0, "TextRegionLocation", sibling),
+        TextRegionLocation(file, 20, 0, 10, 0, "TextRegionLocation", file),
+        "ID"
+    ), "Found potential inconsistent clone change")
+
+
+class TestEstimation(unittest.TestCase):
+    def test_get_analysis_windows(self):
+        self.assertEqual([(1, 10), (11, 20), (21, 25)], get_analysis_windows(0, 25, 9))
+        self.assertEqual([], get_analysis_windows(25, 25, 9))
+
+    def test_count_commits_in_window(self):
+        commit_timestamps = [1, 5, 10, 10, 20]
+        self.assertEqual(4, count_commits_in_window(commit_timestamps, 1, 10))
+        self.assertEqual(0, count_commits_in_window(commit_timestamps, 11, 19))
+        self.assertEqual(1, count_commits_in_window(commit_timestamps, 11, 20))
+
+    def test_estimate_alert_commit_cost(self):
+        alerts = {Commit("main", 0, "simple"): [build_commit_alert("A", "B"), build_commit_alert("A", "C")]}
+        # A changes in the first window only, C in the last window only
+        touched = {("A", 1), ("C", 21)}
+        with patch("src.main.analysis.estimation.get_commit_alerts", return_value=alerts), \
+                patch("src.main.analysis.estimation.get_analysis_windows", return_value=[(1, 10), (11, 20), (21, 25)]), \
+                patch("src.main.analysis.estimation.get_delta_affected_files",
+                      side_effect=lambda client, start, end, path: "change" if (path, start) in touched else None):
+            estimate: AlertCostEstimate = estimate_alert_commit_cost(None, 0, [2, 3, 12, 22], 25)
+        self.assertEqual(2, estimate.commit_alert_count)
+        self.assertEqual(6, estimate.window_count)
+        self.assertEqual(3, estimate.touched_window_count)
+        self.assertEqual(2 + 2 + 1, estimate.commit_count)
+        self.assertEqual(3, estimate.diff_count)
+        # the first window is shared between both commit alerts
+        self.assertEqual(3, estimate.churn_count)
+        self.assertEqual(2 + 12 + 3 + 5 + 3 + 3, estimate.get_request_count())
+
+
+if __name__ == '__main__':
+    unittest.main()
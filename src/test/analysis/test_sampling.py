@@ -0,0 +1,62 @@
+import unittest
+
+from src.main.analysis.sampling import StratifiedSampler, estimate_stratified_mean, estimate_stratified_share
+from src.main.api.data import Commit
+
+
+def build_alert_commits(count: int) -> [Commit]:
+    return [Commit("main", 1_600_000_000_000 + i, "simple") for i in range(count)]
+
+
+class TestStratifiedSampler(unittest.TestCase):
+    def test_allocation(self):
+        sampler = StratifiedSampler(build_alert_commits(100), strata_count=4, seed=1)
+        self.assertEqual([25, 25, 25, 25], [len(stratum) for stratum in sampler.strata])
+        self.assertEqual([3, 3, 2, 2], sorted(sampler.get_allocation(10), reverse=True))
+        self.assertEqual([1, 1, 0, 0], sorted(sampler.get_allocation(2), reverse=True))
+        self.assertEqual(100, sum(sampler.get_allocation(1000)))
+
+    def test_sample(self):
+        alert_commits = build_alert_commits(100)
+        small = StratifiedSampler(alert_commits, strata_count=4, seed=1).sample(8)
+        large = StratifiedSampler(alert_commits, strata_count=4, seed=1).sample(20)
+        # reproducible and nested
+        for small_stratum, large_stratum in zip(small, large):
+            self.assertEqual(small_stratum, large_stratum[:len(small_stratum)])
+        # stratified by time
+        for i, stratum in enumerate(large):
+            self.assertTrue(all(25 * i <= c.timestamp - 1_600_000_000_000 < 25 * (i + 1) for c in stratum))
+        self.assertNotEqual(small, StratifiedSampler(alert_commits, strata_count=4, seed=2).sample(8))
+
+
+class TestEstimation(unittest.TestCase):
+    def test_estimate_stratified_mean(self):
+        estimate = estimate_stratified_mean([[1.0, 0.0], [1.0, 1.0]], [10, 30], [2, 2], bounds=(0.0, 1.0))
+        self.assertAlmostEqual(0.25 * 0.5 + 0.75 * 1.0, estimate.value)
+        self.assertLess(estimate.lower, estimate.value)
+        self.assertEqual(1.0, estimate.upper)
+        # a full sample has no sampling error
+        estimate = estimate_stratified_mean([[1.0, 0.0], [1.0, 1.0]], [2, 2], [2, 2])
+        self.assertEqual(0.0, estimate.get_half_width())
+
+    def test_estimate_stratified_share(self):
+        # a category that was never observed still has an upper bound above zero
+        estimate = estimate_stratified_share([[0.0] * 10, [0.0] * 10], [100, 100], [10, 10])
+        self.assertEqual(0.0, estimate.value)
+        self.assertAlmostEqual(0.0, estimate.lower)
+        self.assertGreater(estimate.upper, 0.1)
+        # strata with a single result
+        estimate = estimate_stratified_share([[1.0], [0.0]], [50, 50], [1, 1])
+        self.assertAlmostEqual(0.5, estimate.value)
+        self.assertGreater(estimate.get_half_width(), 0.3)
+        # close to the normal interval for large samples
+        values = [[1.0] * 300 + [0.0] * 700]
+        wald = estimate_stratified_mean(values, [100_000], [1000])
+        wilson = estimate_stratified_share(values, [100_000], [1000])
+        self.assertAlmostEqual(wald.get_half_width(), wilson.get_half_width(), places=3)
+        # a full sample has no sampling error
+        self.assertEqual(0.0, estimate_stratified_share([[0.0, 0.0]], [2], [2]).get_half_width())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from src.main.analysis.estimation import AlertCostEstimate
+from src.main.analysis.scheduling import SchedulingPolicy, get_alert_commit_cost, schedule_alert_commits, run_scheduled, \
+    CostFactors
+
+
+class TestScheduling(unittest.TestCase):
+    def test_get_alert_commit_cost(self):
+        commit_timestamps = [1, 2, 3, 4, 5, 6]
+        # 4 commits after the alert in one window with two probes
+        self.assertEqual(4 + 2, get_alert_commit_cost(2, commit_timestamps))
+        estimate = AlertCostEstimate(2, commit_alert_count=2, window_count=4, touched_window_count=1)
+        self.assertEqual(2 * 4 * 0.25 + 8, get_alert_commit_cost(2, commit_timestamps, estimate))
+        # an alert commit without an estimate is costed with the mean factors of the others
+        factors = CostFactors.from_estimates([estimate, AlertCostEstimate(3, commit_alert_count=4, window_count=2,
+                                                                         touched_window_count=2)])
+        self.assertEqual((3, 0.625), (factors.commit_alert_count, factors.change_frequency))
+        self.assertEqual(3 * (4 * 0.625 + 2), get_alert_commit_cost(2, commit_timestamps, None, factors))
+
+    def test_schedule_alert_commits(self):
+        costs = [5, 1, 9, 1]
+        self.assertEqual([0, 1, 2, 3], schedule_alert_commits(costs, SchedulingPolicy.ORIGINAL))
+        self.assertEqual([2, 0, 1, 3], schedule_alert_commits(costs, SchedulingPolicy.LONGEST_FIRST))
+        self.assertEqual([1, 3, 0, 2], schedule_alert_commits(costs, SchedulingPolicy.SHORTEST_FIRST))
+
+    def test_run_scheduled(self):
+        started = []
+
+        def task(idx):
+            started.append(idx)
+            if idx == 1:
+                raise RuntimeError("failed")
+            return idx * 10
+
+        tasks = [lambda idx=idx: task(idx) for idx in range(4)]
+        outcomes = run_scheduled(tasks, [2, 0, 1, 3])
+        self.assertEqual([2, 0, 1, 3], started)
+        self.assertEqual([0, 20, 30], [outcomes[0], outcomes[2], outcomes[3]])
+        self.assertIsInstance(outcomes[1], RuntimeError)
+
+        outcomes = run_scheduled(tasks, [3, 2, 1, 0], workers=3)
+        self.assertEqual([0, 20, 30], [outcomes[0], outcomes[2], outcomes[3]])
+        self.assertIsInstance(outcomes[1], RuntimeError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from src.benchmark.replay_benchmark import compare_results
+from src.main.api.api import get_repository_summary
+from src.main.api.replay import ReplayClient, RecordingClient, MissingResponseError, get_request_key
+
+
+def build_replay_client() -> ReplayClient:
+    return ReplayClient.from_responses("http://teamscale", "project", "main", {
+        get_request_key("http://teamscale", "http://teamscale/service-api-info/"): '{"apiVersion": 8}',
+        get_request_key("http://teamscale", "http://teamscale/api/projects/project/repository-summary/",
+                        {"only-first-and-last": True}): '{"firstCommit": 1500000000000, "mostRecentCommit": 1600000000000}'
+    })
+
+
+class TestReplay(unittest.TestCase):
+    def test_request_key(self):
+        self.assertEqual(
+            get_request_key("http://a", "http://a/api/x/", {"b": 1, "a": [2]}),
+            get_request_key("http://b", "http://b/api/x", {"a": [2], "b": 1})
+        )
+
+    def test_replay(self):
+        client = build_replay_client()
+        self.assertEqual((1500000000000, 1600000000000), get_repository_summary(client))
+        with self.assertRaises(MissingResponseError):
+            client.get(client.url + "/api/unknown")
+
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for file_name in ("recording.jsonl", "recording.jsonl.gz"):
+                file_name = os.path.join(directory, file_name)
+                recording_client = RecordingClient(build_replay_client(), file_name)
+                recording_client.check_api_version()
+                self.assertEqual((1500000000000, 1600000000000), get_repository_summary(recording_client))
+                recording_client.close()
+
+                client = ReplayClient(file_name)
+                self.assertEqual(("project", "main"), (client.project, client.branch))
+                self.assertEqual(2, len(client.responses))
+                self.assertEqual((1500000000000, 1600000000000), get_repository_summary(client))
+
+    def test_compare_results(self):
+        expected = {1: {"kind": "successful", "results": []}, 2: {"kind": "failed", "results": None}}
+        self.assertEqual([], compare_results(dict(expected), expected))
+        self.assertEqual([2, 3], compare_results({1: expected[1], 3: expected[2]}, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.benchmark.concurrency_benchmark import StandInServer, TimedClient, run_concurrency_benchmark, get_percentiles
+from src.benchmark.synthetic_history import HistoryConfig, SyntheticHistory
+from src.main.api.api import get_repository_summary
+from src.main.pretty_print import module_levels, set_module_levels
+
+CONFIG = HistoryConfig(commit_count=60, file_count=15, alert_count=3, seed=2)
+
+
+class TestConcurrencyBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.levels = dict(module_levels)
+        set_module_levels("NONE")
+
+    def tearDown(self):
+        module_levels.clear()
+        module_levels.update(self.levels)
+
+    def test_stand_in_server(self):
+        history = SyntheticHistory(CONFIG)
+        with StandInServer(history, threads=1) as server:
+            client = TimedClient(server.get_url(), CONFIG.project, CONFIG.branch)
+            first_commit, most_recent_commit = get_repository_summary(client)
+            self.assertEqual((history.timestamps[0], history.timestamps[-1]),
+                             (first_commit, most_recent_commit))
+            # the api version check and the summary
+            self.assertEqual(2, len(client.latencies))
+            self.assertEqual(2, len(server.queue_seconds))
+
+    def test_server_queueing(self):
+        with StandInServer(SyntheticHistory(CONFIG), latency=0.02, threads=1) as server:
+            client = TimedClient(server.get_url(), CONFIG.project, CONFIG.branch)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: get_repository_summary(client), range(4)))
+            # one request is served at a time, the others wait for it
+            self.assertGreater(max(server.queue_seconds), 0.01)
+
+    def test_scaling(self):
+        measurements = run_concurrency_benchmark(SyntheticHistory(CONFIG), latencies=(0.0,), levels=(1, 2))
+        self.assertEqual([1, 2], [m["concurrency"] for m in measurements])
+        for measurement in measurements:
+            self.assertEqual([], measurement["mismatches"])
+            self.assertGreater(measurement["request_count"], 0)
+            self.assertLessEqual(measurement["request_latency"]["p50"], measurement["request_latency"]["p99"])
+        self.assertEqual(1.0, measurements[0]["speedup"])
+
+    def test_get_percentiles(self):
+        self.assertEqual({"p50": 2.0, "p99": 2.98, "mean": 2.0}, get_percentiles([1.0, 2.0, 3.0]))
+        self.assertEqual({"p50": None, "p99": None, "mean": None}, get_percentiles([]))
+
+
+if __name__ == '__main__':
+    unittest.main()
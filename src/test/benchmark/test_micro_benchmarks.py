@@ -0,0 +1,47 @@
+import unittest
+
+from src.benchmark.benchmark_utils import BenchmarkResult, Comparison, build_report, compare_reports, get_regressions, \
+    measure
+from src.benchmark.micro_benchmarks import build_diff, get_relevant_query, run_micro_benchmarks
+from src.benchmark.synthetic import generate_churn_json
+from src.main.analysis.analysis_utils import correct_lines, filter_relevant_clone_findings
+from src.main.api.data import CloneFindingChurn
+
+
+class TestSynthetic(unittest.TestCase):
+    def test_diff_location_is_unchanged(self):
+        diff, (start_line, end_line) = build_diff(100)
+        self.assertEqual(100, len(diff.left_change_line_intervals))
+        corrected_start_line, corrected_end_line = correct_lines(start_line, end_line, diff)
+        self.assertEqual(end_line - start_line, corrected_end_line - corrected_start_line)
+
+    def test_churn_query_has_result(self):
+        churn_json = generate_churn_json(200, seed=3)
+        self.assertEqual(200, sum(len(findings) for key, findings in churn_json.items() if key != "commit"))
+        file, sibling, analysis_result = get_relevant_query(churn_json)
+        churn = CloneFindingChurn.from_json(churn_json)
+        self.assertTrue(filter_relevant_clone_findings(churn, file, sibling, analysis_result))
+
+
+class TestBenchmarkUtils(unittest.TestCase):
+    def test_measure(self):
+        result = measure("sum", lambda: sum(range(10)), {"n": 10}, repeat=2, min_time=0.001)
+        self.assertEqual("sum[n=10]", result.get_id())
+        self.assertGreater(result.loops, 0)
+        self.assertLessEqual(result.min, result.median)
+
+    def test_compare_reports(self):
+        baseline = build_report("micro", [BenchmarkResult("a", min=1.0), BenchmarkResult("b", min=1.0)])
+        report = build_report("micro", [BenchmarkResult("a", min=1.5), BenchmarkResult("b", min=1.1),
+                                        BenchmarkResult("c", min=1.0)])
+        comparisons = compare_reports(report, baseline)
+        self.assertEqual(["a", "b"], [c.benchmark_id for c in comparisons])
+        self.assertEqual([Comparison("a", 1.0, 1.5)], get_regressions(comparisons, 0.2))
+
+    def test_run_filtered(self):
+        results = run_micro_benchmarks((10,), (), "correct_lines*", repeat=1, min_time=0.001)
+        self.assertEqual(["correct_lines[hunks=10]"], [result.get_id() for result in results])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.benchmark.replay_benchmark import replay_analysis, read_expected_results
+from src.benchmark.synthetic_history import HistoryConfig, SyntheticHistory, SyntheticClient
+from src.main.analysis.scheduling import SchedulingPolicy
+from src.main.api.api import get_repository_summary, get_repository_commits, get_commit_alerts, get_affected_files, \
+    get_diff, get_clone_finding_churn
+from src.main.api.data import DiffType, ChangeType
+from src.main.api.replay import ReplayClient, RecordingClient
+from src.main.pretty_print import module_levels, set_module_levels
+
+CONFIG = HistoryConfig(commit_count=200, file_count=30, alert_count=5, seed=1)
+
+
+class TestSyntheticHistory(unittest.TestCase):
+    def setUp(self):
+        self.levels = dict(module_levels)
+        set_module_levels("NONE")
+
+    def tearDown(self):
+        module_levels.clear()
+        module_levels.update(self.levels)
+
+    def test_deterministic(self):
+        history, other = SyntheticHistory(CONFIG), SyntheticHistory(CONFIG)
+        self.assertEqual(history.timestamps, other.timestamps)
+        self.assertEqual(history.alerts, other.alerts)
+        timestamp = history.timestamps[50]
+        self.assertEqual(json.dumps(history.get_finding_churn(timestamp)), json.dumps(other.get_finding_churn(timestamp)))
+        scaled = CONFIG.scale(10)
+        self.assertEqual((2000, 300, 50, CONFIG.max_hunks), (scaled.commit_count, scaled.file_count, scaled.alert_count,
+                                                             scaled.max_hunks))
+
+    def test_parsed_by_api(self):
+        client = SyntheticClient(SyntheticHistory(CONFIG))
+        first_commit, most_recent_commit = get_repository_summary(client)
+        commits = get_repository_commits(client, first_commit, most_recent_commit)
+        self.assertEqual(200, len(commits))
+        alert_commits = get_repository_commits(client, first_commit, most_recent_commit, filter_alerts=True)
+        self.assertEqual(5, len(alert_commits))
+        alerts = get_commit_alerts(client, alert_commits[0].timestamp)
+        self.assertTrue(alerts[alert_commits[0]])
+
+        change_types = set()
+        for previous, commit in zip(commits, commits[1:]):
+            for change in get_affected_files(client, commit.timestamp):
+                change_types.add(change.change_type)
+                if change.change_type in (ChangeType.EDIT, ChangeType.MOVE):
+                    diff, link = get_diff(client, change.origin_path or change.uniform_path, previous.timestamp,
+                                          change.uniform_path, commit.timestamp)
+                    self.assertEqual({DiffType.LINE_BASED, DiffType.TOKEN_BASED, DiffType.LINE_BASED_IGNORE_WHITESPACE},
+                                     set(diff))
+            get_clone_finding_churn(client, commit.timestamp)
+        self.assertTrue({ChangeType.EDIT, ChangeType.MOVE, ChangeType.DELETE} <= change_types)
+
+    def test_analysis_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "recording.jsonl.gz")
+            client = RecordingClient(SyntheticClient(SyntheticHistory(CONFIG)), file_name)
+            run = replay_analysis(client, SchedulingPolicy.ORIGINAL, 1)
+            self.assertEqual(5, run["results"]["successful"])
+
+            replayed = replay_analysis(ReplayClient(file_name), SchedulingPolicy.ORIGINAL, 1, read_expected_results(file_name))
+        self.assertEqual([], replayed["mismatches"])
+        self.assertEqual(run["request_count"], replayed["request_count"])
+
+
+if __name__ == '__main__':
+    unittest.main()
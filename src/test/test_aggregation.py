@@ -0,0 +1,54 @@
+import unittest
+
+from src.main.aggregation import aggregate_results, ResultAggregate
+from src.main.analysis.analysis_utils import ResultCategory
+from src.main.columnar import results_to_columns
+from src.test.test_persistence import build_analysis_result
+
+
+def build_aggregate() -> ResultAggregate:
+    deleted = build_analysis_result()
+    deleted.instance_metrics.deleted = True
+    deleted.instance_metrics.time_alive = 30
+    deleted.sibling_instance_metrics.time_alive = 50
+    both_deleted = build_analysis_result()
+    both_deleted.instance_metrics.deleted = True
+    both_deleted.instance_metrics.time_alive = 10
+    both_deleted.sibling_instance_metrics.deleted = True
+    both_deleted.sibling_instance_metrics.time_alive = 20
+    affected = build_analysis_result(clone_findings_count=2)
+    affected.instance_metrics.instance_affected_count = 3
+    affected.one_instance_affected_count = 3
+    return aggregate_results(results_to_columns([(10, [deleted, both_deleted]), (20, [affected])], [15]))
+
+
+class TestAggregation(unittest.TestCase):
+    def test_aggregate_results(self):
+        aggregate = build_aggregate()
+        self.assertEqual(3, aggregate.successful_result_count)
+        self.assertEqual(4, aggregate.get_run_count())
+        self.assertEqual(1, aggregate.category_counts[ResultCategory.ONE_INSTANCE_DELETED])
+        self.assertEqual(1, aggregate.category_counts[ResultCategory.BOTH_INSTANCES_DELETED])
+        self.assertEqual(1, aggregate.category_counts[ResultCategory.NEW_CLONE])
+        self.assertEqual(3, sum(aggregate.category_counts.values()))
+
+        self.assertEqual((2, 1, 1, 1), (aggregate.instance_deleted_count, aggregate.sibling_deleted_count,
+                                        aggregate.one_instance_deleted_count, aggregate.both_instances_deleted_count))
+        self.assertEqual(20, aggregate.get_average_time_until_deletion())
+        self.assertEqual(20, aggregate.lifetime_quantiles[0.5])
+
+        self.assertEqual([0, 0, 3, 0, 0, 0], aggregate.distributions['Sum Instance Affected'].tolist())
+        self.assertEqual([0, 0, 2], aggregate.distributions['New Clone Findings'].tolist())
+        self.assertEqual(
+            ['Sum Instance Affected', 'One Instance Affected', 'Both Instances Affected', 'New Clone Findings'],
+            list(aggregate.get_distributions(with_file_affections=False))
+        )
+
+    def test_empty(self):
+        aggregate = aggregate_results(results_to_columns([]))
+        self.assertEqual(0, aggregate.get_average_time_until_deletion())
+        self.assertEqual(0, aggregate.lifetime_quantiles[0.9])
+
+
+if __name__ == '__main__':
+    unittest.main()
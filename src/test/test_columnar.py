@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from src.main.analysis.analysis_utils import ResultCategory
+from src.main.columnar import results_to_columns, write_columns, read_columns, is_up_to_date, CATEGORIES, \
+    get_source_description
+from src.test.test_persistence import build_analysis_result
+
+
+class TestColumnar(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build_result_columns(self):
+        deleted = build_analysis_result()
+        deleted.instance_metrics.deleted = True
+        deleted.instance_metrics.time_alive = 30
+        return results_to_columns([(10, [build_analysis_result()]), (20, [deleted, build_analysis_result(clone_findings_count=2)])], [15])
+
+    def test_results_to_columns(self):
+        result_columns = self.build_result_columns()
+        self.assertEqual(3, len(result_columns))
+        self.assertEqual([10, 20, 20], result_columns["alert_timestamp"].tolist())
+        self.assertEqual([False, True, False], result_columns["instance_deleted"].tolist())
+        self.assertEqual([0, 0, 2], result_columns["clone_findings_count"].tolist())
+        self.assertEqual(
+            [ResultCategory.NOT_MODIFIED, ResultCategory.ONE_INSTANCE_DELETED, ResultCategory.NEW_CLONE],
+            [CATEGORIES[code] for code in result_columns["category"]]
+        )
+        self.assertEqual([10, 20], result_columns.successful_runs.tolist())
+        self.assertEqual([15], result_columns.failed_runs.tolist())
+
+    def test_empty(self):
+        result_columns = results_to_columns([])
+        self.assertEqual(0, len(result_columns))
+        self.assertEqual(np.int8, result_columns["category"].dtype)
+
+    def test_write_and_read(self):
+        result_columns = self.build_result_columns()
+        source_file = os.path.join(self.directory.name, "results.jsonl")
+        with open(source_file, "w") as file:
+            file.write("{}\n")
+        source = get_source_description(source_file)
+        columns_dir = os.path.join(self.directory.name, "columns")
+        self.assertFalse(is_up_to_date(columns_dir, source))
+
+        write_columns(columns_dir, result_columns, source)
+        self.assertTrue(is_up_to_date(columns_dir, source))
+        read = read_columns(columns_dir)
+        self.assertIsInstance(read["instance_time_alive"], np.memmap)
+        for name, column in result_columns.columns.items():
+            np.testing.assert_array_equal(column, read[name])
+        np.testing.assert_array_equal(result_columns.failed_runs, read.failed_runs)
+
+        # columns of a changed source are outdated
+        with open(source_file, "a") as file:
+            file.write("{}\n")
+        self.assertFalse(is_up_to_date(columns_dir, get_source_description(source_file)))
+
+
+if __name__ == '__main__':
+    unittest.main()
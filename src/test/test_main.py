@@ -0,0 +1,149 @@
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from unittest.mock import patch
+
+from defintions import ROOT_DIR, get_result_log_file_name, get_project_dir, get_result_log_header_file_name, \
+    get_store_file_name
+from src.benchmark.synthetic_history import HistoryConfig, SyntheticHistory, SyntheticClient
+from src.main.api.api_utils import api_statistics
+from src.main.api.replay import get_expected_results_file_name
+from src.main.columnar import load_result_columns
+from src.main import pretty_print
+from src.main.main import main, get_status, get_cache_files, run_command_line
+from src.main.persistence import parse_args, read_result_records, read_result_log_header, write_result_log_header
+from src.main.pretty_print import module_levels, set_module_levels, set_log_writer, LogWriter
+from src.main.store import ResultStore
+from src.benchmark.fixtures import scratch_root_dir
+
+CONFIG = HistoryConfig(commit_count=80, file_count=20, alert_count=3, seed=3)
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.levels = dict(module_levels)
+        set_module_levels("NONE")
+
+    def tearDown(self):
+        module_levels.clear()
+        module_levels.update(self.levels)
+
+    def test_parse_args(self):
+        # nothing listens at the url. Creating the client sends no request
+        client, args = parse_args(["status", "--project_id", "other", "--teamscale_url", "http://localhost:1"])
+        self.assertEqual(("status", "other"), (args.command, client.project))
+        # without a command, the analysis is run and plotted as before
+        client, args = parse_args(["--workers", "4"])
+        self.assertEqual(("analyse", 4, True), (args.command, args.workers, args.plot))
+        self.assertFalse(parse_args(["analyse"])[1].plot)
+        # peaks of parallel alert commits cannot be told apart
+        with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+            parse_args(["analyse", "--trace_memory", "--workers", "2"])
+
+    def test_commands(self):
+        client = SyntheticClient(SyntheticHistory(CONFIG))
+        with scratch_root_dir():
+            self.assertIsNone(get_status(CONFIG.project)["alert_commits"])
+            main(client, parse_args(["discover"])[1])
+            status = get_status(CONFIG.project)
+            self.assertEqual(3, status["alert_commits"])
+            self.assertEqual(0, sum(status["results"].values()))
+
+            main(client, parse_args(["analyse"])[1])
+            self.assertEqual({"successful": 3, "failed": 0, "unfinished": 0}, get_status(CONFIG.project)["results"])
+
+            # status, stats and cache only read local files. status writes nothing
+            api_statistics.reset()
+            modification_times = {f: os.stat(os.path.join(d, f)).st_mtime_ns
+                                  for d, _, files in os.walk(get_project_dir(CONFIG.project)) for f in files}
+            main(client, parse_args(["status"])[1])
+            self.assertEqual(modification_times, {f: os.stat(os.path.join(d, f)).st_mtime_ns
+                                                  for d, _, files in os.walk(get_project_dir(CONFIG.project)) for f in files})
+            main(client, parse_args(["stats", "--since", "2000-01-01", "--path", "*.java"])[1])
+            load_result_columns(CONFIG.project)
+            self.assertTrue(get_cache_files(CONFIG.project))
+            main(client, parse_args(["cache", "--clear"])[1])
+            self.assertEqual([], get_cache_files(CONFIG.project))
+            self.assertEqual(0, api_statistics.get_request_count())
+
+    def test_resume_after_crash(self):
+        client = SyntheticClient(SyntheticHistory(CONFIG))
+        with scratch_root_dir():
+            main(client, parse_args(["analyse"])[1])
+            file_name = get_result_log_file_name(CONFIG.project)
+            self.assertTrue(read_result_log_header(get_result_log_header_file_name(CONFIG.project))["complete"])
+            with open(file_name, "r") as file:
+                first_record = file.readline()
+            # a killed run leaves the successful records, a truncated line and an incomplete header
+            with open(file_name, "w") as file:
+                file.write(first_record + first_record[:20])
+            write_result_log_header(get_result_log_header_file_name(CONFIG.project), 0, complete=False)
+
+            main(client, parse_args(["analyse", "--sqlite"])[1])
+            # the skipped alert commit is stored as well
+            store = ResultStore(get_store_file_name(CONFIG.project))
+            self.assertEqual(3, len({row["alert_timestamp"] for row in store.get_results_since(CONFIG.project, 0)}))
+            store.close()
+            with open(file_name, "r") as file:
+                lines = file.readlines()
+            self.assertEqual(first_record, lines[0])
+            self.assertEqual(3, len(lines))
+            self.assertEqual({"successful": 3, "failed": 0, "unfinished": 0}, get_status(CONFIG.project)["results"])
+
+            # the previous run completed, so its results are continued. The history did not change
+            records = read_result_records(file_name)
+            api_statistics.reset()
+            main(client, parse_args(["analyse"])[1])
+            continued_requests = api_statistics.get_request_count()
+            self.assertEqual(records, read_result_records(file_name))
+            with open(file_name, "r") as file:
+                self.assertEqual(6, len(file.readlines()))
+
+            api_statistics.reset()
+            main(client, parse_args(["analyse", "--fresh"])[1])
+            self.assertLess(continued_requests, api_statistics.get_request_count())
+            with open(file_name, "r") as file:
+                self.assertEqual(3, len(file.readlines()))
+
+    def test_stats_json(self):
+        client = SyntheticClient(SyntheticHistory(CONFIG))
+        with scratch_root_dir():
+            main(client, parse_args(["analyse"])[1])
+            pretty_print.log_writer.flush()
+            stdout, stderr = io.StringIO(), io.StringIO()
+            try:
+                with redirect_stdout(stdout), redirect_stderr(stderr):
+                    # the log goes to stderr, even at the most verbose level
+                    run_command_line(["stats", "--project_id", CONFIG.project, "--json", "--log_level", "DEBUG"])
+                    pretty_print.log_writer.flush()
+            finally:
+                set_log_writer(LogWriter())
+        stats = json.loads(stdout.getvalue())
+        self.assertEqual((CONFIG.project, 3), (stats["project"], stats["runs"]["successful"]))
+        self.assertNotIn("Access Token", stderr.getvalue())
+
+    def test_recording_closed_on_error(self):
+        client = SyntheticClient(SyntheticHistory(CONFIG))
+        with scratch_root_dir() as directory, patch("src.main.main.run_analysis_with_options", side_effect=RuntimeError):
+            file_name = os.path.join(directory, "recording.jsonl.gz")
+            with self.assertRaises(RuntimeError):
+                main(client, parse_args(["analyse", "--record", file_name])[1])
+            # a complete gzip stream, but no expected results
+            self.assertGreater(os.path.getsize(file_name), 0)
+            with gzip.open(file_name, "rt") as file:
+                file.read()
+            self.assertFalse(os.path.isfile(get_expected_results_file_name(file_name)))
+
+    def test_status_without_plotting_imports(self):
+        code = "import sys, src.main.main; print(sorted({'matplotlib', 'seaborn', 'numpy'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+        self.assertEqual("[]", output.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
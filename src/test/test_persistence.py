@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.main.analysis.analysis_utils import AnalysisResult
+from src.main.api.data import Commit
+from src.main.persistence import ResultLogWriter, ResultLog, AlertLog, AlertFile, read_result_kinds
+from src.test.analysis.test_estimation import build_commit_alert
+
+
+def build_analysis_result(first_commit: int = 1, clone_findings_count: int = 0) -> AnalysisResult:
+    analysis_result = AnalysisResult.from_alert("project", first_commit, 100, 50, build_commit_alert("A", "B"))
+    analysis_result.clone_findings_count = clone_findings_count
+    return analysis_result
+
+
+class TestResultLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "results.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_write_and_read(self):
+        with ResultLogWriter(self.file_name, fsync_every=2) as writer:
+            writer.append_successful(3, [build_analysis_result(clone_findings_count=3)])
+            writer.append_unfinished(1, [build_analysis_result()])
+            writer.append_failed(2)
+        self.assertEqual({"successful": 1, "failed": 1, "unfinished": 1}, writer.counts)
+
+        # the next invocation continues the unfinished alert commit
+        with ResultLogWriter(self.file_name, append=True) as writer:
+            writer.append_successful(1, [build_analysis_result(clone_findings_count=1), build_analysis_result()])
+
+        result_log = ResultLog(self.file_name)
+        successful_runs = result_log.successful_runs()
+        self.assertEqual(2, len(successful_runs))
+        # sorted by alert commit timestamp, re-iterable
+        for _ in range(2):
+            self.assertEqual([(1, [1, 0]), (3, [3])],
+                             [(t, [r.clone_findings_count for r in results]) for t, results in successful_runs])
+        self.assertEqual(build_analysis_result(clone_findings_count=3), list(successful_runs)[1][1][0])
+        self.assertEqual([2], result_log.failed_runs())
+        self.assertEqual([], list(result_log.unfinished_runs()))
+        self.assertEqual({1: "successful", 2: "failed", 3: "successful"}, read_result_kinds(self.file_name))
+        # the index is built without decoding a record
+        with patch("src.main.persistence.json.loads", side_effect=AssertionError):
+            self.assertEqual([1, 3], ResultLog(self.file_name).get_timestamps(ResultLogWriter.SUCCESSFUL))
+
+    def test_crash(self):
+        with ResultLogWriter(self.file_name) as writer:
+            writer.append_successful(1, [build_analysis_result()])
+            writer.append_successful(2, [build_analysis_result()])
+        with open(self.file_name, "rb+") as file:
+            file.truncate(os.path.getsize(self.file_name) - 10)
+
+        self.assertEqual([1], ResultLog(self.file_name).get_timestamps(ResultLogWriter.SUCCESSFUL))
+        self.assertEqual({1: "successful"}, read_result_kinds(self.file_name))
+        with ResultLogWriter(self.file_name, append=True) as writer:
+            writer.append_failed(2)
+        result_log = ResultLog(self.file_name)
+        self.assertEqual([1], result_log.get_timestamps(ResultLogWriter.SUCCESSFUL))
+        self.assertEqual([2], result_log.failed_runs())
+
+
+class TestAlertLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.alert_log = AlertLog(os.path.join(self.directory.name, "alerts.jsonl"),
+                                  os.path.join(self.directory.name, "alerts_header.json"))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_append_and_read(self):
+        self.assertIsNone(self.alert_log.read())
+        alert_file = self.alert_log.create(AlertFile("project", 1, 100, 0, []))
+        alert_file.analysed_until = 50
+        self.alert_log.append(alert_file, [Commit("main", 10, "simple"), Commit("main", 20, "simple")])
+        alert_file.analysed_until = 100
+        self.alert_log.append(alert_file, [Commit("main", 60, "simple")])
+
+        self.assertEqual(AlertFile("project", 1, 100, 100, [Commit("main", t, "simple") for t in (10, 20, 60)]), self.alert_log.read())
+
+    def test_interrupted_append(self):
+        alert_file = self.alert_log.create(AlertFile("project", 1, 100, 50, [Commit("main", 10, "simple")]))
+        # the records of the next window are written, but the header is not updated
+        with open(self.alert_log.file_name, "a") as file:
+            file.write('{"branch":"main","timestamp":60,"commit_type":"simple","parent_commits":[]}\n{"bra')
+        self.assertEqual(alert_file, self.alert_log.read())
+        self.assertEqual(alert_file, self.alert_log.read())
+
+    def test_append_to_meta(self):
+        alert_file = self.alert_log.create(AlertFile("project", 1, 100, 0, [Commit("main", 10, "simple")]))
+        self.alert_log.append(alert_file, [Commit("main", 20, "simple")])
+        # the alert commits are not decoded
+        meta = self.alert_log.read_meta()
+        self.assertEqual(("project", 0, []), (meta.project, meta.analysed_until, meta.alert_commit_list))
+        meta.analysed_until = 100
+        self.alert_log.append(meta, [Commit("main", 60, "simple")])
+
+        self.assertEqual(3, self.alert_log.read_header()["count"])
+        self.assertEqual(AlertFile("project", 1, 100, 100, [Commit("main", t, "simple") for t in (10, 20, 60)]), self.alert_log.read())
+
+    def test_compact(self):
+        alert_file = self.alert_log.create(AlertFile("project", 1, 100, 50, [Commit("main", 10, "simple")]))
+        self.alert_log.append(alert_file, [Commit("main", 20, "simple"), Commit("main", 10, "simple")])
+
+        read = self.alert_log.read()
+        self.assertEqual([10, 20], [c.timestamp for c in read.alert_commit_list])
+        self.assertEqual(2, self.alert_log.read_header()["count"])
+
+
+if __name__ == '__main__':
+    unittest.main()
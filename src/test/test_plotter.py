@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+
+import matplotlib
+import numpy as np
+from matplotlib import cbook
+
+matplotlib.use("Agg")
+from matplotlib import pyplot as plt
+
+from src.main.plotter import get_box_stats, get_binned_density, sample_strip_points, plot_instance_metrics, \
+    STRIP_SAMPLE_SIZE, AGGREGATE_THRESHOLD
+from src.test.test_aggregation import build_aggregate
+
+
+def count_drawn_points(fig) -> int:
+    return sum(len(collection.get_offsets()) for ax in fig.axes for collection in ax.collections)
+
+
+class TestAggregatedPlots(unittest.TestCase):
+    def test_get_box_stats(self):
+        data = np.random.default_rng(1).poisson(3, 1000)
+        data[:5] = 40  # outliers
+        expected = cbook.boxplot_stats(data)[0]
+        stats = get_box_stats(data, "label")
+        for key in ("med", "q1", "q3", "whislo", "whishi"):
+            self.assertAlmostEqual(expected[key], stats[key], msg=key)
+        self.assertTrue(np.isnan(get_box_stats(np.array([]), "empty")["med"]))
+
+    def test_get_binned_density(self):
+        edges, density = get_binned_density(np.array([0, 1, 1, 3]))
+        self.assertEqual([-0.5, 0.5, 1.5, 2.5, 3.5], list(edges))
+        self.assertEqual([0.5, 1.0, 0.0, 0.5], list(density))
+        edges, density = get_binned_density(np.arange(10_000), bins=50)
+        self.assertEqual(50, len(density))
+
+    def test_sample_strip_points(self):
+        data = np.arange(10_000)
+        sample = sample_strip_points(data, 100, np.random.default_rng(0))
+        self.assertEqual(100, len(set(sample)))
+        self.assertEqual(list(sample), list(sample_strip_points(data, 100, np.random.default_rng(0))))
+        self.assertEqual(3, len(sample_strip_points(data[:3], 100, np.random.default_rng(0))))
+
+    def test_fixed_cost(self):
+        aggregate = build_aggregate()
+        rng = np.random.default_rng(2)
+        aggregate.distributions = {label: rng.poisson(3, 20_000) for label in aggregate.distributions}
+        for boxplot in (True, False):
+            fig = plot_instance_metrics("project", aggregate, boxplot=boxplot)
+            self.assertLessEqual(count_drawn_points(fig), STRIP_SAMPLE_SIZE * len(aggregate.distributions) + 100)
+            plt.close(fig)
+
+    def test_aggregated_by_default_for_large_results(self):
+        aggregate = build_aggregate()
+        with patch("src.main.plotter.plot_aggregated_box") as plot_aggregated_box:
+            plt.close(plot_instance_metrics("project", aggregate, boxplot=True))
+            plot_aggregated_box.assert_not_called()
+            aggregate.distributions["New Clone Findings"] = np.zeros(AGGREGATE_THRESHOLD + 1)
+            plt.close(plot_instance_metrics("project", aggregate, boxplot=True))
+            plot_aggregated_box.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import io
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from src.main import pretty_print
+from src.main.pretty_print import MyPrinter, LogLevel, LogWriter, set_module_levels
+
+
+class TestMyPrinter(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.writer = LogWriter(self.stream)
+        patcher = patch.object(pretty_print, "log_writer", self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(pretty_print.module_levels.clear)
+
+    def test_lazy_message(self):
+        printer = MyPrinter(LogLevel.INFO)
+
+        def build():
+            raise AssertionError("must not be built")
+
+        printer.white(build, LogLevel.DEBUG)
+        printer.white(lambda: "built", LogLevel.INFO)
+        self.writer.flush()
+        self.assertIn("built", self.stream.getvalue())
+
+    def test_module_levels(self):
+        printer = MyPrinter(LogLevel.DEBUG, "src.main.analysis.analysis")
+        set_module_levels("analysis.analysis=INFO,api=DUMP")
+        self.assertFalse(printer.is_enabled(LogLevel.VERBOSE))
+        self.assertTrue(MyPrinter(LogLevel.INFO, "src.main.api.api").is_enabled(LogLevel.DUMP))
+        set_module_levels("CRUCIAL")
+        self.assertFalse(MyPrinter(LogLevel.INFO, "src.main.main").is_enabled(LogLevel.INFO))
+
+    def test_parallel_messages_do_not_interleave(self):
+        printer = MyPrinter(LogLevel.INFO)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda i: printer.blue("first " + str(i) + "\nsecond " + str(i), LogLevel.INFO), range(50)))
+        self.writer.flush()
+        lines = self.stream.getvalue().splitlines()
+        self.assertEqual(100, len(lines))
+        for first, second in zip(lines[::2], lines[1::2]):
+            self.assertEqual(first.split()[-1], second.split()[-1].replace("\x1b[0m", ""))
+
+
+class TestLogWriter(unittest.TestCase):
+    def test_file_rotation(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_name = os.path.join(directory, "analysis.log")
+            writer = LogWriter(io.StringIO(), file_name, max_bytes=100, backup_count=2)
+            for i in range(10):
+                writer.write("\x1b[94m" + 20 * str(i) + "\x1b[0m")
+                writer.flush()
+            writer.close()
+            self.assertEqual({"analysis.log", "analysis.log.1", "analysis.log.2"}, set(os.listdir(directory)))
+            with open(file_name + ".1") as file:
+                self.assertNotIn("\x1b", file.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import io
+import json
+import unittest
+from types import SimpleNamespace
+
+from src.main.api.api_utils import ApiStatistics
+from src.main.progress import ProgressReporter
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestProgressReporter(unittest.TestCase):
+    def test_records(self):
+        stream = io.StringIO()
+        statistics = ApiStatistics()
+        cache = SimpleNamespace(hits=0, misses=0)
+        progress = ProgressReporter(4, done=1, stream=stream, interval=0, statistics=statistics, cache=cache)
+        self.assertIsNone(progress.get_eta())
+
+        progress.start_alert_commit(10)
+        statistics.record("commits", 0.1)
+        cache.hits, cache.misses = 1, 1
+        progress.commit_processed(10)
+        progress.commit_processed(10)
+        record = json.loads(stream.getvalue().splitlines()[-1])["progress"]
+        self.assertEqual({"10": 2}, record["running"])
+        self.assertEqual(0.5, record["cache_hit_rate"])
+        self.assertIsNone(record["eta_seconds"])
+
+        progress.finish_alert_commit(10)
+        progress.finish_alert_commit(20, failed=True)
+        record = json.loads(stream.getvalue().splitlines()[-1])["progress"]
+        self.assertEqual((3, 1, 2, {}), (record["done"], record["failed"], record["commits"], record["running"]))
+        self.assertIsNotNone(record["eta_seconds"])
+
+    def test_rate_limit(self):
+        stream = io.StringIO()
+        progress = ProgressReporter(10, stream=stream, interval=3600, statistics=ApiStatistics())
+        for _ in range(100):
+            progress.commit_processed(10)
+        progress.close()
+        self.assertEqual(2, len(stream.getvalue().splitlines()))
+
+    def test_status_line(self):
+        stream = TtyStream()
+        progress = ProgressReporter(2, stream=stream, interval=0, statistics=ApiStatistics())
+        progress.finish_alert_commit(10)
+        progress.close()
+        self.assertIn("\r", stream.getvalue())
+        self.assertIn("1/2 alert commits (50%), 0 failed", stream.getvalue())
+        self.assertTrue(stream.getvalue().endswith("\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.main.render import render_results
+from src.test.test_aggregation import build_aggregate
+
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_render_results(self):
+        pgf_dir = self.directory.name + "/"
+        with patch("src.main.render.get_pgf_dir", return_value=pgf_dir):
+            file_names = render_results("project", build_aggregate(), ["png", "svg"], workers=2)
+        self.assertEqual(8, len(file_names))
+        self.assertIn(pgf_dir + "project_violin.svg", file_names)
+        for file_name in file_names:
+            self.assertGreater(os.path.getsize(file_name), 0)
+
+    def test_render_cache(self):
+        pgf_dir = self.directory.name + "/"
+        aggregate = build_aggregate()
+        with patch("src.main.render.get_pgf_dir", return_value=pgf_dir):
+            self.assertEqual(4, len(render_results("project", aggregate, ["png"], workers=1)))
+            self.assertEqual([], render_results("project", aggregate, ["png"], workers=1))
+
+            # only the figures showing changed data are rendered again
+            aggregate.distributions['New Clone Findings'][0] = 5
+            self.assertEqual([pgf_dir + "project_box.png", pgf_dir + "project_violin.png"],
+                             render_results("project", aggregate, ["png"], workers=1))
+            os.remove(pgf_dir + "project_pie.png")
+            self.assertEqual([pgf_dir + "project_pie.png"], render_results("project", aggregate, ["png"], workers=1))
+            self.assertEqual(4, len(render_results("project", aggregate, ["png"], workers=1, use_cache=False)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+
+import jsonpickle
+
+from src.main import serialization
+from src.main.analysis.estimation import AlertCostEstimate
+from src.main.api.data import Commit
+from src.main.persistence import AlertFile, write_to_file, read_from_file, migrate_file, ResultLog, ResultLogWriter, \
+    migrate_result_log
+from src.test.test_persistence import build_analysis_result
+
+
+def build_alert_file() -> AlertFile:
+    return AlertFile("project", 1, 100, 50, [Commit("main", 10, "simple"), Commit("main", 20, "merge", [10])])
+
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "file.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        result = build_analysis_result(clone_findings_count=2)
+        result.instance_metrics.time_alive = 42
+        content = {
+            "alert file": build_alert_file(), "successful runs": [(10, [result])], "failed runs": [20],
+            "estimates": [AlertCostEstimate(10, 1, 2, 1, 5, 3, 4)]
+        }
+        for compression in (None, serialization.GZIP):
+            write_to_file(self.file_name, content, compression)
+            read = read_from_file(self.file_name)
+            self.assertEqual(build_alert_file(), read["alert file"])
+            self.assertEqual([[10, [result]]], read["successful runs"])
+            self.assertEqual(42, read["successful runs"][0][1][0].instance_metrics.time_alive)
+            self.assertEqual([AlertCostEstimate(10, 1, 2, 1, 5, 3, 4)], read["estimates"])
+
+    def test_unknown_type(self):
+        with self.assertRaises(serialization.SchemaError):
+            serialization.dumps(object())
+
+    def test_migrate_file(self):
+        with open(self.file_name, "w") as file:
+            file.write(jsonpickle.encode(build_alert_file()))
+        self.assertEqual(build_alert_file(), read_from_file(self.file_name))
+        self.assertTrue(migrate_file(self.file_name))
+        self.assertFalse(migrate_file(self.file_name))
+        with open(self.file_name, "rb") as file:
+            self.assertNotIn(b"py/object", file.read())
+        self.assertEqual(build_alert_file(), read_from_file(self.file_name))
+
+    def test_migrate_result_log(self):
+        with open(self.file_name, "w") as file:
+            file.write(jsonpickle.encode({"kind": "successful", "timestamp": 1, "results": [build_analysis_result()]}) + "\n")
+        with ResultLogWriter(self.file_name, append=True) as writer:
+            writer.append_failed(2)
+        self.assertEqual([(1, [build_analysis_result()])], list(ResultLog(self.file_name).successful_runs()))
+
+        migrate_result_log(self.file_name)
+        with open(self.file_name, "r") as file:
+            self.assertNotIn("py/object", file.read())
+        result_log = ResultLog(self.file_name)
+        self.assertEqual([(1, [build_analysis_result()])], list(result_log.successful_runs()))
+        self.assertEqual([2], result_log.failed_runs())
+        # a current log is left alone
+        inode = os.stat(self.file_name).st_ino
+        migrate_result_log(self.file_name)
+        self.assertEqual(inode, os.stat(self.file_name).st_ino)
+
+
+if __name__ == '__main__':
+    unittest.main()
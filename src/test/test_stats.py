@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+from defintions import ROOT_DIR
+from src.main.analysis.result_metrics import ResultCategory
+from src.main.persistence import ResultLogWriter
+from src.main.stats import compute_stats, read_runs, format_stats, ResultFilter
+from src.main.utils.time_utils import parse_date
+from src.test.test_aggregation import build_aggregate
+from src.test.test_persistence import build_analysis_result
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.directory.name, "results.jsonl")
+        # the runs of build_aggregate
+        deleted = build_analysis_result()
+        deleted.instance_metrics.deleted = True
+        deleted.instance_metrics.time_alive = 30
+        deleted.sibling_instance_metrics.time_alive = 50
+        both_deleted = build_analysis_result()
+        both_deleted.instance_metrics.deleted = True
+        both_deleted.instance_metrics.time_alive = 10
+        both_deleted.sibling_instance_metrics.deleted = True
+        both_deleted.sibling_instance_metrics.time_alive = 20
+        affected = build_analysis_result(clone_findings_count=2)
+        affected.instance_metrics.instance_affected_count = 3
+        affected.one_instance_affected_count = 3
+        affected.instance_metrics.uniform_path = "src/Moved.java"
+        with ResultLogWriter(self.file_name) as writer:
+            writer.append_unfinished(10, [deleted])
+            writer.append_successful(10, [deleted, both_deleted])
+            writer.append_failed(15)
+            writer.append_successful(20, [affected])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_as_aggregate(self):
+        aggregate = build_aggregate()
+        stats = compute_stats(read_runs(self.file_name))
+        self.assertEqual({"successful": 2, "failed": 1, "unfinished": 0}, stats["runs"])
+        self.assertEqual(aggregate.successful_result_count, stats["result_count"])
+        for category in ResultCategory:
+            self.assertEqual(aggregate.category_counts[category], stats["categories"][category.value], category)
+        self.assertEqual(1, stats["categories"]["Analysis Error"])
+
+        deletion = stats["deletion"]
+        self.assertEqual((aggregate.instance_deleted_count, aggregate.sibling_deleted_count,
+                          aggregate.one_instance_deleted_count, aggregate.both_instances_deleted_count),
+                         (deletion["instance_deleted"], deletion["sibling_deleted"], deletion["one_instance_deleted"],
+                          deletion["both_instances_deleted"]))
+        self.assertEqual(aggregate.get_average_time_alive(), deletion["average_time_alive"])
+        self.assertEqual(aggregate.get_average_time_until_deletion(), deletion["average_time_until_deletion"])
+        self.assertEqual({str(q): v for q, v in aggregate.lifetime_quantiles.items()}, deletion["lifetime_quantiles"])
+
+        for label, values in aggregate.distributions.items():
+            summary = stats["distributions"][label]
+            self.assertEqual(len(values), summary["count"], label)
+            self.assertAlmostEqual(float(np.mean(values)), summary["mean"])
+            self.assertAlmostEqual(float(np.quantile(values, 0.9)), summary["p90"])
+        self.assertIn("Both Instances Deleted", format_stats(stats))
+        json.dumps(stats)
+
+    def test_filters(self):
+        records = read_runs(self.file_name)
+        stats = compute_stats(records, ResultFilter(since=20))
+        self.assertEqual((1, 0), (stats["result_count"], stats["runs"]["failed"]))
+        stats = compute_stats(records, ResultFilter(until=20))
+        self.assertEqual((2, 1), (stats["result_count"], stats["runs"]["failed"]))
+        # the path after a move matches, failed runs are left out
+        stats = compute_stats(records, ResultFilter(path_pattern="src/*.java"))
+        self.assertEqual((1, 0), (stats["result_count"], stats["runs"]["failed"]))
+        self.assertEqual(0, compute_stats(records, ResultFilter(path_pattern="test/*"))["result_count"])
+        self.assertEqual(1577836800000, parse_date("1577836800000"))
+
+    def test_other_schema_version(self):
+        with open(self.file_name, "a") as file:
+            file.write('{"schema":2,"kind":"failed","timestamp":30,"results":null}\n')
+        with self.assertRaises(ValueError):
+            read_runs(self.file_name)
+
+    def test_no_plotting_imports(self):
+        code = "import sys, src.main.stats; print(sorted({'matplotlib', 'seaborn', 'requests'} & set(sys.modules)))"
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+        self.assertEqual("[]", output.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
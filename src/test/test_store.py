@@ -0,0 +1,61 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.main.api.data import Commit
+from src.main.store import ResultStore
+from src.test.test_persistence import build_analysis_result
+
+
+class TestResultStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.directory.name, "results.sqlite"))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_wal_mode(self):
+        self.assertEqual("wal", self.store.get_connection().execute("PRAGMA journal_mode").fetchone()[0])
+
+    def test_add_results(self):
+        self.store.add_alert_commits("project", [Commit("main", 10, "simple"), Commit("main", 20, "simple")])
+        deleted = build_analysis_result()
+        deleted.sibling_instance_metrics.deleted = True
+        moved = build_analysis_result(clone_findings_count=1)
+        moved.instance_metrics.uniform_path = "D"
+        self.store.add_results("project", 10, [build_analysis_result()])
+        self.store.add_results("project", 20, [deleted, moved])
+
+        self.assertEqual(2, len(self.store.get_alive_clones_in_file("project", "A")))
+        self.assertEqual(2, len(self.store.get_alive_clones_in_file("project", "B")))
+        self.assertEqual(["instance"], [row["role"] for row in self.store.get_alive_clones_in_file("project", "D")])
+        self.assertEqual(2, len(self.store.get_results_since("project", 15)))
+        self.assertEqual(1, len(self.store.get_results_since("project", 15, "New Clone")))
+        self.assertEqual({"Not Modified at All": 1, "One Instance Deleted": 1, "New Clone": 1}, self.store.get_category_counts("project"))
+
+        # results of an alert commit are replaced, e.g. when an unfinished analysis is continued
+        self.store.add_results("project", 20, [build_analysis_result()])
+        self.assertEqual({"Not Modified at All": 2}, self.store.get_category_counts("project"))
+        self.assertEqual(4, self.store.get_connection().execute("SELECT COUNT(*) FROM instance_metrics").fetchone()[0])
+
+    def test_concurrent_writes(self):
+        def write(timestamp: int) -> sqlite3.Connection:
+            self.store.add_results("project", timestamp, [build_analysis_result(), build_analysis_result()])
+            return self.store.get_connection()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            connections = set(executor.map(write, range(40)))
+        self.assertEqual(80, len(self.store.get_results_since("project", 0)))
+        # the connections of the workers are closed as well
+        self.store.close()
+        for connection in connections:
+            with self.assertRaises(sqlite3.ProgrammingError):
+                connection.execute("SELECT 1")
+
+
+if __name__ == '__main__':
+    unittest.main()
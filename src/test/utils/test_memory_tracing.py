@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.main.utils.memory_tracing import MemoryTracer, format_bytes
+
+
+class TestMemoryTracer(unittest.TestCase):
+    def test_trace(self):
+        tracer = MemoryTracer(top_count=3)
+        with tracer.trace(1) as trace:
+            pass
+        self.assertEqual([], tracer.records)
+        self.assertIsNone(trace.record)
+
+        with tempfile.TemporaryDirectory() as directory:
+            timeline_file_name = os.path.join(directory, "timeline.jsonl")
+            tracer.start(timeline_file_name)
+            try:
+                retained = []
+                with tracer.trace(1) as trace:
+                    retained.append(bytearray(1_000_000))
+                    bytearray(4_000_000)
+            finally:
+                tracer.stop()
+            with open(timeline_file_name) as file:
+                timeline = [json.loads(line) for line in file]
+
+        record = tracer.records[0]
+        self.assertIs(record, trace.record)
+        self.assertGreaterEqual(record.retained, 1_000_000)
+        self.assertLess(record.retained, 2_000_000)
+        self.assertGreaterEqual(record.peak - record.before, 4_000_000)
+        self.assertTrue(record.top_sites[0][0].startswith(__file__))
+        self.assertEqual(1, len(timeline))
+        self.assertEqual(record.peak, timeline[0]["peak"])
+        self.assertFalse(tracer.enabled)
+
+    def test_overlapping_traces_keep_their_peak(self):
+        tracer = MemoryTracer(top_count=1)
+        tracer.start()
+        try:
+            with tracer.trace(1) as first:
+                bytearray(4_000_000)
+                with tracer.trace(2) as second:
+                    pass
+        finally:
+            tracer.stop()
+        self.assertEqual(2, second.record.alert_commit_timestamp)
+        self.assertGreater(first.record.peak - first.record.before, 3_500_000)
+
+    def test_format_bytes(self):
+        self.assertEqual("512.0 B", format_bytes(512))
+        self.assertEqual("1.5 MiB", format_bytes(1536 * 1024))
+
+
+if __name__ == '__main__':
+    unittest.main()
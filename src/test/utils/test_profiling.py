@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+
+from src.main.utils.profiling import PhaseTimers, DIFF, CHURN_FETCH, CHURN_FILTER, format_phase_breakdown
+
+
+class TestPhaseTimers(unittest.TestCase):
+    def test_disabled(self):
+        timers = PhaseTimers()
+        with timers.phase(DIFF):
+            pass
+        self.assertEqual({}, timers.totals)
+
+    def test_per_alert_commit(self):
+        timers = PhaseTimers(enabled=True)
+
+        def work(alert_commit_timestamp: int):
+            timers.start_alert_commit(alert_commit_timestamp)
+            with timers.phase(DIFF):
+                pass
+            timers.record(CHURN_FETCH, alert_commit_timestamp)
+            phases[alert_commit_timestamp] = timers.finish_alert_commit()
+
+        phases = {}
+        threads = [threading.Thread(target=work, args=(ts,)) for ts in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # outside an alert commit, only the totals count
+        timers.record(CHURN_FETCH, 4)
+
+        self.assertEqual({1: 1, 2: 2}, {ts: p[CHURN_FETCH] for ts, p in phases.items()})
+        self.assertEqual((7, 3), timers.totals[CHURN_FETCH])
+        self.assertEqual(2, timers.totals[DIFF][1])
+
+    def test_nested_phases_are_exclusive(self):
+        timers = PhaseTimers(enabled=True)
+        timers.start_alert_commit(1)
+        with timers.phase(CHURN_FILTER):
+            with timers.phase(CHURN_FETCH):
+                time.sleep(0.05)
+            with timers.phase(CHURN_FETCH):
+                time.sleep(0.05)
+        phases = timers.finish_alert_commit()
+        self.assertGreaterEqual(phases[CHURN_FETCH], 0.1)
+        self.assertLess(phases[CHURN_FILTER], 0.05)
+        self.assertEqual(1, timers.totals[CHURN_FILTER][1])
+
+    def test_format_phase_breakdown(self):
+        lines = format_phase_breakdown({DIFF: 1.0, CHURN_FETCH: 3.0}, 8.0).splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].startswith(CHURN_FETCH) and lines[0].endswith("37.5%"))
+        self.assertTrue(lines[2].startswith("wall time:"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from src.main.utils.time_utils import display_time
+
+
+class TestDisplayTime(unittest.TestCase):
+    def test_display_time(self):
+        self.assertEqual("1 day, 2 hours", display_time((86400 + 7200 + 5) * 1000))
+        self.assertEqual("1 minute, 30 seconds", display_time(90_500))
+        self.assertEqual("1 second", display_time(1000))
+
+    def test_sub_second(self):
+        self.assertEqual("", display_time(0))
+        self.assertEqual("", display_time(999))
+
+    def test_negative(self):
+        self.assertEqual("-1 minute, 30 seconds", display_time(-90_000))
+        self.assertEqual("", display_time(-500))
+
+
+if __name__ == '__main__':
+    unittest.main()